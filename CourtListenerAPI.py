@@ -1,25 +1,131 @@
 import os
+import sys
 import json
+import time
+import random
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from tabulate import tabulate
 
+from http_cache import DEFAULT_CACHE_PATH, HTTPCache, normalise_key
+
 # Configuration settings
 API_BASE_URL = "https://www.courtlistener.com/api/rest/v4/"
+STORAGE_BASE_URL = "https://storage.courtlistener.com/"
 API_KEY = "" 
+# Transient failures worth retrying; anything else is returned to the caller.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHECKPOINT_FILE = ".harvest_checkpoint.json"
+
+# ------------------------------
+# Rate Limiting
+# ------------------------------
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
 
 class CourtListenerClient:
-    """Client for interacting with the Court Listener API"""
+    """Client for interacting with the Court Listener API
+
+    All requests share one pooled session, wait for the token bucket and are
+    retried with exponential backoff (honouring Retry-After) on 429/5xx and
+    connection errors, so the client is safe to use from many threads. With
+    a `cache` (http_cache.HTTPCache), repeated GETs are answered from disk
+    or revalidated with a conditional request. Streamed downloads bypass the
+    cache: their bodies go straight to disk.
+    """
 
-    def __init__(self, api_key, base_url=API_BASE_URL):
+    def __init__(self, api_key, base_url=API_BASE_URL, storage_url=STORAGE_BASE_URL, rate=4.0,
+                 download_rate=0, max_retries=5, pool_size=16, timeout=60, cache=None):
         """Initialize with your API key"""
         self.api_key = api_key
         self.base_url = base_url
+        self.storage_url = storage_url
         self.headers = {
             "Authorization": f"Token {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate)
+        # Opinion files are served from a different host (storage), with its own budget.
+        self.download_bucket = TokenBucket(download_rate)
+        self.retries = 0
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, url, params=None, headers=None, stream=False, bucket=None):
+        """GET through the cache when there is one; see `send` for the network path."""
+        if self.cache is None or stream:
+            return self.send(url, params, headers, stream, bucket)
+
+        key = normalise_key(url, params)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.count("fresh_hits")
+            return entry.to_response(key)
+        if entry is not None and self.cache.can_revalidate(entry):
+            headers = {**(headers or {}), **entry.conditional_headers()}
+        response = self.send(url, params, headers, stream, bucket)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.mark_validated(key)
+            self.cache.count("revalidated")
+            return entry.to_response(key)
+        self.cache.count("misses")
+        if response.status_code == 200:
+            self.cache.put(key, response, response.content)
+        return response
+
+    def send(self, url, params=None, headers=None, stream=False, bucket=None):
+        """GET with rate limiting and retry/backoff; returns the last response."""
+        for attempt in range(self.max_retries + 1):
+            (bucket or self.bucket).acquire()
+            try:
+                response = self.session.get(url, params=params, headers=headers, stream=stream, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                response = None
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt == self.max_retries:
+                return response
+            self.retries += 1
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            if response is not None:
+                response.close()
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else min(60, 2 ** attempt)
+            time.sleep(delay * (1 + random.random() * 0.25))
 
     def search_cases(self, query, page=1, page_size=10, **kwargs):
         """Search for cases matching the query"""
@@ -32,7 +138,7 @@ class CourtListenerClient:
             **kwargs
         }
 
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.request(endpoint, params=params, headers=self.headers)
         if response.status_code == 200:
             return response.json()
         else:
@@ -75,11 +181,291 @@ class CourtListenerClient:
         
         print(tabulate(table, headers=headers, tablefmt="grid"))
 
+# ------------------------------
+# Bulk Harvest
+# ------------------------------
+class HarvestError(Exception):
+    pass
+
+def date_shards(filed_after=None, filed_before=None, shards=1):
+    """Split [filed_after, filed_before] into contiguous date ranges that are paginated concurrently.
+
+    Search results are cursor-paginated, so one query can only be walked page
+    by page; disjoint date ranges are independent queries.
+    """
+    if not (filed_after and filed_before) or shards <= 1:
+        return [(filed_after or None, filed_before or None)]
+    start = datetime.date.fromisoformat(filed_after)
+    days = (datetime.date.fromisoformat(filed_before) - start).days + 1
+    shards = max(1, min(shards, days))
+    bounds = [start + datetime.timedelta(days=days * i // shards) for i in range(shards + 1)]
+    return [(bounds[i].isoformat(), (bounds[i + 1] - datetime.timedelta(days=1)).isoformat()) for i in range(shards)]
+
+def case_folder_name(case):
+    case_id = case.get("cluster_id") or case.get("id")
+    return str(case_id) if case_id else None
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+class HarvestCheckpoint:
+    """Next page URL of every date shard, saved after each page whose cases are all handled.
+
+    A resumed crawl re-fetches at most the page it was on; cases already
+    written (their data.json exists) are skipped. Cases whose PDFs failed to
+    download are kept in `retry` (folder -> search result) until a later
+    attempt saves them.
+    """
+
+    def __init__(self, path, key, shards=None, retry=None):
+        self.path = path
+        self.key = key
+        self.shards = shards or {}
+        self.retry = retry or {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, key):
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("key") == key:
+                return cls(path, key, data["shards"], data.get("retry"))
+            print(f"Checkpoint {path} is for a different query; starting over.")
+        return cls(path, key)
+
+    def save(self):
+        with self.lock:
+            self._write()
+
+    def _write(self):
+        write_json_atomic(self.path, {"key": self.key, "shards": self.shards, "retry": self.retry})
+
+    def shard(self, name):
+        with self.lock:
+            return dict(self.shards.setdefault(name, {"next": None, "done": False, "pages": 0}))
+
+    def advance(self, name, next_url):
+        with self.lock:
+            state = self.shards[name]
+            state.update(next=next_url, done=next_url is None, pages=state["pages"] + 1)
+            self._write()
+
+    def add_retry(self, case):
+        with self.lock:
+            self.retry[case_folder_name(case)] = case
+
+    def resolve(self, folder):
+        with self.lock:
+            self.retry.pop(folder, None)
+
+    def pending(self):
+        with self.lock:
+            return list(self.retry.values())
+
+class BulkHarvester:
+    """Crawls search results into the `<case_folder>/data.json + *.pdf` layout that ingestion reads.
+
+    Date shards are paginated concurrently and every case's opinion PDFs are
+    downloaded on a shared worker pool. data.json is written last, and only
+    once every PDF is on disk, so a folder with one is complete. Cases with a
+    failed download are retried at the end of the crawl and, if they still
+    fail, by the next resumed run.
+    """
+
+    def __init__(self, client, out_dir, page_size=20, shards=1, download_workers=8, max_cases=None,
+                 download_pdfs=True):
+        self.client = client
+        self.out_dir = out_dir
+        self.page_size = page_size
+        self.shards = shards
+        self.download_workers = download_workers
+        self.max_cases = max_cases
+        self.download_pdfs = download_pdfs
+        self.lock = threading.Lock()
+        self.stats = {"pages": 0, "saved": 0, "existing": 0, "skipped": 0, "incomplete": 0, "pdfs": 0,
+                      "pdf_bytes": 0, "pdf_failures": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def limit_reached(self):
+        # Checked between pages, so a crawl can overshoot by up to a page per shard.
+        return self.max_cases is not None and self.stats["saved"] >= self.max_cases
+
+    def harvest(self, query, filed_after=None, filed_before=None, **params):
+        os.makedirs(self.out_dir, exist_ok=True)
+        start = time.perf_counter()
+        key = {"query": query, "filed_after": filed_after, "filed_before": filed_before, "params": params,
+               "page_size": self.page_size, "shards": self.shards}
+        checkpoint = HarvestCheckpoint.load(os.path.join(self.out_dir, CHECKPOINT_FILE), key)
+        ranges = date_shards(filed_after, filed_before, self.shards)
+
+        failures = []
+        with ThreadPoolExecutor(self.download_workers, thread_name_prefix="download") as downloads, \
+                ThreadPoolExecutor(len(ranges), thread_name_prefix="search") as pagers:
+            futures = {pagers.submit(self.harvest_shard, query, after, before, params, checkpoint, downloads):
+                       (after, before) for after, before in ranges}
+            for future, (after, before) in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append(f"Shard {after or '*'}..{before or '*'}: {e} "
+                                    f"(resume to continue from its checkpoint)")
+            self.retry_incomplete(checkpoint, downloads)
+        self.stats["incomplete"] = len(checkpoint.retry)
+        if checkpoint.retry:
+            failures.append(f"{len(checkpoint.retry)} cases have failed PDF downloads and no data.json "
+                            f"(resume to retry them)")
+
+        elapsed = time.perf_counter() - start
+        stats = self.stats
+        print(f"✅ Harvested {stats['saved']} new cases ({stats['existing']} already present, "
+              f"{stats['skipped']} without an ID) from {stats['pages']} pages in {elapsed:.1f}s "
+              f"({stats['saved'] / elapsed if elapsed else 0:.1f} cases/s, {stats['incomplete']} incomplete); "
+              f"{stats['pdfs']} PDFs ({stats['pdf_bytes'] / 2**20:.1f} MB), {stats['pdf_failures']} failed downloads, "
+              f"{self.client.retries} retried requests.")
+        if self.client.cache is not None:
+            print(self.client.cache.describe())
+        for failure in failures:
+            print(f"❌ {failure}")
+        return stats, failures
+
+    def harvest_shard(self, query, filed_after, filed_before, params, checkpoint, downloads):
+        name = f"{filed_after or '*'}..{filed_before or '*'}"
+        state = checkpoint.shard(name)
+        if state["done"]:
+            return
+        url, page_params = state["next"], None
+        if url is None:
+            url = f"{self.client.base_url}search/"
+            page_params = {"q": query, "type": "o", "page_size": self.page_size, **params}
+            if filed_after:
+                page_params["filed_after"] = filed_after
+            if filed_before:
+                page_params["filed_before"] = filed_before
+
+        while url and not self.limit_reached():
+            response = self.client.request(url, params=page_params, headers=self.client.headers)
+            if response.status_code != 200:
+                raise HarvestError(f"HTTP {response.status_code} for {response.url}")
+            page = response.json()
+            cases = page.get("results", [])
+            # Wait for the whole page before checkpointing past it.
+            for case, outcome in zip(cases, downloads.map(self.save_case, cases)):
+                if outcome == "incomplete":
+                    checkpoint.add_retry(case)
+                else:
+                    self.count(outcome)
+            url, page_params = page.get("next"), None
+            checkpoint.advance(name, url)
+            self.count("pages")
+
+    def retry_incomplete(self, checkpoint, downloads):
+        """Try the cases with failed downloads once more; PDFs already on disk are not fetched again."""
+        cases = checkpoint.pending()
+        if not cases:
+            return
+        for case, outcome in zip(cases, downloads.map(self.save_case, cases)):
+            if outcome != "incomplete":
+                checkpoint.resolve(case_folder_name(case))
+                self.count(outcome)
+        checkpoint.save()
+
+    def opinion_pdf_url(self, opinion):
+        local_path = opinion.get("local_path") or ""
+        if local_path.lower().endswith(".pdf"):
+            return requests.compat.urljoin(self.client.storage_url, local_path)
+        download_url = opinion.get("download_url") or ""
+        return download_url if download_url.lower().endswith(".pdf") else None
+
+    def save_case(self, case):
+        folder = case_folder_name(case)
+        if folder is None:
+            return "skipped"
+        case_dir = os.path.join(self.out_dir, folder)
+        metadata_file = os.path.join(case_dir, "data.json")
+        if os.path.exists(metadata_file):
+            return "existing"
+        os.makedirs(case_dir, exist_ok=True)
+        complete = True
+        if self.download_pdfs:
+            for number, opinion in enumerate(case.get("opinions") or []):
+                url = self.opinion_pdf_url(opinion)
+                if url and not self.download(url, os.path.join(case_dir, f"{opinion.get('id') or number}.pdf")):
+                    complete = False
+        if not complete:
+            return "incomplete"
+        write_json_atomic(metadata_file, case)
+        return "saved"
+
+    def download(self, url, path):
+        if os.path.exists(path):
+            return True
+        try:
+            with self.client.request(url, stream=True, bucket=self.client.download_bucket) as response:
+                if response.status_code != 200:
+                    raise HarvestError(f"HTTP {response.status_code}")
+                size = 0
+                with open(f"{path}.part", "wb") as f:
+                    for block in response.iter_content(chunk_size=1 << 16):
+                        f.write(block)
+                        size += len(block)
+            os.replace(f"{path}.part", path)
+        except Exception as e:
+            # The case's data.json is held back until a retry gets this file.
+            print(f"❌ {url}: {e}")
+            self.count("pdf_failures")
+            return False
+        self.count("pdfs")
+        self.count("pdf_bytes", size)
+        return True
+
+def harvest_main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-harvest CourtListener opinions into Final_data case folders.")
+    parser.add_argument("query")
+    parser.add_argument("--out", default="./Final_data")
+    parser.add_argument("--filed-after", default=None, help="YYYY-MM-DD")
+    parser.add_argument("--filed-before", default=None, help="YYYY-MM-DD")
+    parser.add_argument("--court", default=None, help="Court ID(s), space separated.")
+    parser.add_argument("--shards", type=int, default=4,
+                        help="Date ranges paginated concurrently (needs --filed-after and --filed-before).")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent PDF downloads.")
+    parser.add_argument("--max-cases", type=int, default=None)
+    parser.add_argument("--rate", type=float, default=4.0, help="API requests per second.")
+    parser.add_argument("--download-rate", type=float, default=0, help="PDF downloads per second (0: unlimited).")
+    parser.add_argument("--no-pdfs", action="store_true", help="Save data.json only.")
+    parser.add_argument("--cache-path", default=os.getenv("COURTLISTENER_CACHE_PATH", DEFAULT_CACHE_PATH))
+    parser.add_argument("--cache-mb", type=float, default=512, help="Evict least recently used responses beyond this.")
+    parser.add_argument("--cache-max-age", type=float, default=24 * 3600,
+                        help="Seconds a response is reused without revalidating.")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--api-key", default=os.getenv("COURTLISTENER_API_KEY", API_KEY))
+    parser.add_argument("--base-url", default=os.getenv("COURTLISTENER_BASE_URL", API_BASE_URL))
+    parser.add_argument("--storage-url", default=os.getenv("COURTLISTENER_STORAGE_URL", STORAGE_BASE_URL))
+    args = parser.parse_args(argv)
+
+    cache = None
+    if not args.no_cache:
+        cache = HTTPCache(args.cache_path, max_bytes=int(args.cache_mb * 2**20), max_age=args.cache_max_age)
+    client = CourtListenerClient(args.api_key, base_url=args.base_url, storage_url=args.storage_url, rate=args.rate,
+                                 download_rate=args.download_rate, pool_size=args.workers + args.shards, cache=cache)
+    harvester = BulkHarvester(client, args.out, page_size=args.page_size, shards=args.shards,
+                              download_workers=args.workers, max_cases=args.max_cases, download_pdfs=not args.no_pdfs)
+    params = {"court": args.court} if args.court else {}
+    _, failures = harvester.harvest(args.query, args.filed_after, args.filed_before, **params)
+    return 1 if failures else 0
+
 def main():
     """Main function to run the Court Listener API search"""
     # Initialize API client
     api_key = input("Enter your Court Listener API key (or press Enter to skip): ")
-    api = CourtListenerClient(api_key)
+    api = CourtListenerClient(api_key, cache=HTTPCache(os.getenv("COURTLISTENER_CACHE_PATH", DEFAULT_CACHE_PATH)))
 
     # Step 1: Collect data
     print("Step 1: Collecting data from Court Listener API")
@@ -106,4 +492,7 @@ def main():
     api.print_case_results(results)
 
 if __name__ == "__main__":
+    # `python CourtListenerAPI.py harvest "<query>" ...` for a bulk crawl; no arguments for the interactive search.
+    if sys.argv[1:2] == ["harvest"]:
+        sys.exit(harvest_main(sys.argv[2:]))
     main()
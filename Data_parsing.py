@@ -1,46 +1,30 @@
 import os
+import sys
 import json
+import time
 import re
-import unicodedata
-import pdfplumber
-import torch
+import shutil
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import nltk
 from nltk.tokenize import sent_tokenize
-from transformers import AutoModel, AutoTokenizer
-from sentence_transformers import SentenceTransformer
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.core import VectorStoreIndex, Settings, get_response_synthesizer
+from llama_index.core import VectorStoreIndex, Settings, StorageContext, load_index_from_storage
 from llama_index.core.ingestion import IngestionPipeline
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from chromadb import PersistentClient
-from llama_index.core.query_engine import CustomQueryEngine
-from llama_index.core.retrievers import BaseRetriever
-from llama_index.core.response_synthesizers import BaseSynthesizer
-from llama_index.llms.ollama import Ollama
 from llama_index.core.schema import Document
 
-nltk.download('punkt')
-
-def new_preprocess_text(file_path, text):
-    text = unicodedata.normalize('NFKC', text)
-    text = re.sub(r'\.{3,}', '.', text)
-    text = re.sub(r'\n\s*\n+', '\n\n', text)
-    text = re.sub(r'Page\s+\d+\s+of\s+\d+', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-def extract_pdf_text(pdf_file_path):
-    text_runs = []
-    try:
-        with pdfplumber.open(pdf_file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_runs.append(page_text)
-    except Exception as e:
-        print(f"Error reading PDF {pdf_file_path}: {e}")
-    return "\n".join(text_runs)
+from pdf_extraction import ExtractionReport, extract_and_normalise
+from ingest_manifest import IngestManifest, make_chunk_id
+from semantic_chunker import SemanticChunker, ensure_punkt
+from chroma_writer import (COLLECTION_OPTIONS, WriteStats, bulk_upsert, max_batch_size, publish_staged_collection,
+                           staged_collection_name)
+from ingest_pipeline import StagedPipeline, ProgressReporter, batched
+from backend.embedding_backend import EMBED_BACKENDS, EMBED_MODEL_NAME, load_embed_model
+from backend.lexical_index import BM25Index
+from backend.shared_index import publish_generation
+from backend.flat_vector_store import DTYPES, FlatVectorStore
+from backend.index_storage import load_storage_context
+from backend.sqlite_docstore import SQLiteDocumentStore
 
 def load_metadata(metadata_file_path):
     try:
@@ -50,83 +34,121 @@ def load_metadata(metadata_file_path):
         print(f"Error reading metadata {metadata_file_path}: {e}")
         return {}
 
-def load_case_documents(dataset_path: str) -> list[Document]:
-    """
-    Load and process case documents from folders containing PDFs and JSON metadata.
-    Falls back to JSON snippet if PDF text is missing or unchunkable.
+def list_case_folders(dataset_path: str) -> list[str]:
+    return [f for f in os.listdir(dataset_path) if os.path.isdir(os.path.join(dataset_path, f))]
+
+def case_folder_files(case_path):
+    pdf_files = [os.path.join(case_path, f) for f in os.listdir(case_path) if f.lower().endswith(".pdf")]
+    return pdf_files, os.path.join(case_path, "data.json")
+
+def build_case_document(case_folder, pdf_files, metadata_file, pdf_texts):
+    metadata = load_metadata(metadata_file) if os.path.exists(metadata_file) else {}
+
+    # Each PDF is normalised on its own so it can be cached; normalisation
+    # collapses whitespace anyway, so joining with a space gives effectively
+    # the same text as normalising the combined PDFs.
+    cleaned_text = " ".join(text for text in pdf_texts if text)
+
+    # Final fallback to JSON snippet
+    if not cleaned_text and "opinions" in metadata:
+        cleaned_text = metadata["opinions"][0].get("snippet", "")
+
+    if not cleaned_text:
+        print(f"Skipping folder {case_folder}: No usable text in PDF or JSON.")
+        return None
+
+    metadata.update({
+        "case_folder": case_folder,
+        "pdf_files": pdf_files,
+        "metadata_file": metadata_file if os.path.exists(metadata_file) else None
+    })
+    metadata["file_name"] = case_folder
+
+    return Document(text=cleaned_text, metadata=metadata)
+
+def json_snippet_document(dataset_path, case_folder):
+    case_path = os.path.join(dataset_path, case_folder)
+    metadata_file = os.path.join(case_path, "data.json")
+
+    if os.path.isdir(case_path) and os.path.exists(metadata_file):
+        try:
+            with open(metadata_file, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+
+            snippet = metadata.get("opinions", [{}])[0].get("snippet", "").strip()
+            judge = metadata.get("judge", "")
+            court = metadata.get("court", "")
+            case_name = metadata.get("caseName", "")
+
+            if snippet:
+                text = f"{snippet}\n\nJudge: {judge}\nCourt: {court}\nCase Name: {case_name}"
+                doc_metadata = {
+                    "file_name": case_folder,
+                    "case_folder": case_folder,
+                    "source": "json_snippet",
+                    "num_tokens": len(text.split()),
+                    "num_chars": len(text),
+                    "judge": judge,
+                    "court": court,
+                    "case_name": case_name
+                }
+                return Document(text=text, metadata=doc_metadata)
+        except Exception as e:
+            print(f"❌ Error processing JSON for folder '{case_folder}': {e}")
+    return None
+
+def iter_case_documents(dataset_path, case_folders, extraction: ExtractionReport, pool=None, cache_dir=None, window=32,
+                        pdf_hashes=None):
+    """Yield (case_folder, documents) one folder at a time, in order.
+
+    PDFs of the next `window` folders are extracted ahead on `pool`, so the
+    workers stay busy without the text of the whole corpus ever being in memory.
+    `pdf_hashes` (path -> sha256, from the manifest scan) saves hashing PDFs again for the text cache.
     """
-    documents = []
-    for case_folder in os.listdir(dataset_path):
-        case_path = os.path.join(dataset_path, case_folder)
-        if os.path.isdir(case_path):
-            pdf_files = [os.path.join(case_path, f) for f in os.listdir(case_path) if f.lower().endswith(".pdf")]
-            metadata_file = os.path.join(case_path, "data.json")
-            
+    pdf_hashes = pdf_hashes or {}
+    pending = deque()
+    folders = iter(case_folders)
+
+    def submit_next():
+        for case_folder in folders:
+            case_path = os.path.join(dataset_path, case_folder)
+            pdf_files, metadata_file = case_folder_files(case_path)
             if not pdf_files and not os.path.exists(metadata_file):
                 print(f"Skipping folder {case_folder}: No PDF or JSON found.")
-                continue
-
-            metadata = load_metadata(metadata_file) if os.path.exists(metadata_file) else {}
-            pdf_texts = []
-
-            for pdf_file in sorted(pdf_files):
-                pdf_text = extract_pdf_text(pdf_file)
-                if pdf_text:
-                    pdf_texts.append(pdf_text)
-
-            combined_pdf_text = "\n\n".join(pdf_texts).strip()
-            cleaned_text = new_preprocess_text(metadata_file, combined_pdf_text) if combined_pdf_text else ""
-
-            # Final fallback to JSON snippet
-            if not cleaned_text and "opinions" in metadata:
-                cleaned_text = metadata["opinions"][0].get("snippet", "")
-
-            if not cleaned_text:
-                print(f"Skipping folder {case_folder}: No usable text in PDF or JSON.")
-                continue
-
-            metadata.update({
-                "case_folder": case_folder,
-                "pdf_files": pdf_files,
-                "metadata_file": metadata_file if os.path.exists(metadata_file) else None
-            })
-            metadata["file_name"] = case_folder
-
-            documents.append(Document(text=cleaned_text, metadata=metadata))
-    return documents
-
-
-def add_json_snippet_documents(documents, dataset_path):
-    for case_folder in os.listdir(dataset_path):
-        case_path = os.path.join(dataset_path, case_folder)
-        metadata_file = os.path.join(case_path, "data.json")
-
-        if os.path.isdir(case_path) and os.path.exists(metadata_file):
-            try:
-                with open(metadata_file, "r", encoding="utf-8") as f:
-                    metadata = json.load(f)
-
-                snippet = metadata.get("opinions", [{}])[0].get("snippet", "").strip()
-                judge = metadata.get("judge", "")
-                court = metadata.get("court", "")
-                case_name = metadata.get("caseName", "")
-
-                if snippet:
-                    text = f"{snippet}\n\nJudge: {judge}\nCourt: {court}\nCase Name: {case_name}"
-                    doc_metadata = {
-                        "file_name": case_folder,
-                        "case_folder": case_folder,
-                        "source": "json_snippet",
-                        "num_tokens": len(text.split()),
-                        "num_chars": len(text),
-                        "judge": judge,
-                        "court": court,
-                        "case_name": case_name
-                    }
-                    documents.append(Document(text=text, metadata=doc_metadata))
-            except Exception as e:
-                print(f"❌ Error processing JSON for folder '{case_folder}': {e}")
-    return documents
+                pending.append((case_folder, None, None, None))
+                return
+            pdf_files_sorted = sorted(pdf_files)
+            if pool is not None:
+                work = [pool.submit(extract_and_normalise, pdf_file, cache_dir, pdf_hashes.get(pdf_file))
+                        for pdf_file in pdf_files_sorted]
+            else:
+                work = pdf_files_sorted
+            pending.append((case_folder, pdf_files, metadata_file, work))
+            return
+
+    for _ in range(window):
+        submit_next()
+    while pending:
+        case_folder, pdf_files, metadata_file, work = pending.popleft()
+        submit_next()
+        if work is None:
+            yield case_folder, []
+            continue
+        if pool is not None:
+            results = [w.result() for w in work]
+        else:
+            results = [extract_and_normalise(w, cache_dir, pdf_hashes.get(w)) for w in work]
+        for result in results:
+            extraction.add(result, keep_text=False)
+
+        documents = []
+        document = build_case_document(case_folder, pdf_files, metadata_file, [r.text for r in results])
+        if document is not None:
+            documents.append(document)
+        snippet_document = json_snippet_document(dataset_path, case_folder)
+        if snippet_document is not None:
+            documents.append(snippet_document)
+        yield case_folder, documents
 
 def merge_short_chunks(chunks, min_tokens=20):
     if not chunks:
@@ -153,6 +175,7 @@ def structure_aware_chunking(text):
     return sections
 
 def sentence_grouping(text, model, threshold=0.75, max_tokens=150):
+    ensure_punkt()
     sentences = sent_tokenize(text)
     embeddings = model.encode(sentences)
     chunks = []
@@ -177,31 +200,10 @@ def sentence_grouping(text, model, threshold=0.75, max_tokens=150):
 
     return chunks
 
-try:
-    legal_model_name = "nlpaueb/legal-bert-base-uncased"
-    Settings.embed_model = HuggingFaceEmbedding(model_name=legal_model_name)
-    print(f"✅ Model {legal_model_name} loaded successfully for indexing.")
-except Exception as e:
-    print(f"❌ Error loading embedding model for indexing: {e}")
-    exit()
+# Chunk bookkeeping that must not leak into the embedded or prompted text.
+CHUNK_INTERNAL_METADATA = ["source", "chunk_index"]
 
-Settings.llm = Ollama(model="llama3.1:latest", request_timeout=120.0)
-
-legal_dataset_path = "/Users/liteshperumalla/Desktop/Files/masters/Legal LLM/Final_data"
-docs = load_case_documents(legal_dataset_path)
-docs = add_json_snippet_documents(docs, legal_dataset_path)
-
-if not docs:
-    print("❌ No case documents loaded. Check your dataset structure.")
-    exit()
-print(f"✅ Loaded {len(docs)} case documents from folders (PDF and JSON).")
-
-semantic_model = SentenceTransformer("all-mpnet-base-v2")
-
-processed_docs = []
-for doc in docs:
-    doc_text = doc.get_content()
-    
+def document_sections(doc_text):
     # Step 1: Try structure-aware chunking
     structured_chunks = structure_aware_chunking(doc_text)
 
@@ -212,69 +214,334 @@ for doc in docs:
     # Step 3: If still empty, fallback to entire text
     if not structured_chunks:
         structured_chunks = [doc_text]
+    return structured_chunks
+
+def chunk_documents(docs, chunker: SemanticChunker, verbose=False) -> list[Document]:
+    """Split case documents into semantic chunks with stable, content-derived IDs.
 
-    final_chunks = []
-    for section in structured_chunks:
-        section_chunks = sentence_grouping(section, semantic_model)
-        final_chunks.extend(section_chunks)
-
-    # Merge tiny chunks if needed
-    if final_chunks:
-        final_chunks = merge_short_chunks(final_chunks)
-
-    if not final_chunks:
-        print(f"Skipping document {doc.metadata.get('file_name', 'Unknown')}: No valid chunks found.")
-        continue
-
-    for i, chunk in enumerate(final_chunks):
-        metadata = {
-            "case_folder": doc.metadata.get("case_folder", ""),
-            "file_name": doc.metadata.get("file_name", ""),
-            "num_tokens": len(chunk.split()),
-            "num_chars": len(chunk)
-        }
-        print(f"--- Chunk {i+1} for case '{metadata['file_name']}' ---")
-        print(chunk)
-        print("Metadata:", metadata)
-        print("\n")
-        processed_docs.append({
-            "doc_id": doc.doc_id,
-            "text": chunk,
-            "metadata": metadata,
-        })
-
-
-document_objects = [Document(text=d["text"], metadata=d["metadata"]) for d in processed_docs]
-
-pipeline = IngestionPipeline(transformations=[Settings.embed_model])
-try:
-    nodes = pipeline.run(documents=document_objects)
-    if not nodes:
-        print("❌ No nodes were created. Check document parsing.")
-        exit()
-    print(f"✅ {len(nodes)} document nodes created and ready for indexing.")
-
-    chroma_path = "./chroma_db_legal"
-    chroma_client = PersistentClient(path=chroma_path)
-    collection = chroma_client.get_or_create_collection("legal_document_chunks")
-    vector_store = ChromaVectorStore(chroma_client, collection_name="legal_document_chunks")
-    for i, node in enumerate(nodes):
-        collection.add(
-            ids=[str(i)],
-            documents=[node.text],
-            metadatas=[node.metadata]
-        )
-except Exception as e:
-    print(f"❌ Error during ingestion pipeline: {e}")
-    exit()
-
-try:
-    index = VectorStoreIndex(nodes, vector_store=vector_store)
-    print("✅ Legal vector store index created successfully.")
-    persist_dir = "./persisted_legal_index"
-    os.makedirs(persist_dir, exist_ok=True)
-    index.storage_context.persist(persist_dir=persist_dir)
-    print(f"✅ Legal index persisted to {persist_dir}")
-except Exception as e:
-    print(f"❌ Error creating legal VectorStoreIndex: {e}")
-    exit()
\ No newline at end of file
+    The sections of all `docs` are chunked together so their sentences are
+    embedded in large batches.
+    """
+    doc_sections = [document_sections(doc.get_content()) for doc in docs]
+    grouped = iter(chunker.chunk_sections([section for sections in doc_sections for section in sections]))
+
+    chunk_docs = []
+    for doc, sections in zip(docs, doc_sections):
+        final_chunks = []
+        for _ in sections:
+            final_chunks.extend(next(grouped))
+
+        # Merge tiny chunks if needed
+        if final_chunks:
+            final_chunks = merge_short_chunks(final_chunks)
+
+        if not final_chunks:
+            print(f"Skipping document {doc.metadata.get('file_name', 'Unknown')}: No valid chunks found.")
+            continue
+
+        source = doc.metadata.get("source", "pdf")
+        for i, chunk in enumerate(final_chunks):
+            metadata = {
+                "case_folder": doc.metadata.get("case_folder", ""),
+                "file_name": doc.metadata.get("file_name", ""),
+                "num_tokens": len(chunk.split()),
+                "num_chars": len(chunk),
+                "source": source,
+                "chunk_index": i,
+            }
+            if verbose:
+                print(f"--- Chunk {i+1} for case '{metadata['file_name']}' ---")
+                print(chunk)
+                print("Metadata:", metadata)
+                print("\n")
+            chunk_docs.append(Document(
+                id_=make_chunk_id(metadata["case_folder"], source, i, chunk),
+                text=chunk,
+                metadata=metadata,
+                excluded_embed_metadata_keys=CHUNK_INTERNAL_METADATA,
+                excluded_llm_metadata_keys=CHUNK_INTERNAL_METADATA,
+            ))
+    return chunk_docs
+
+def delete_chunks(index, chunk_ids):
+    """Remove chunks from every part of the LlamaIndex index (Chroma follows once the index is live)."""
+    if not chunk_ids:
+        return
+    index.delete_nodes(chunk_ids, delete_from_docstore=True)
+    # delete_nodes leaves the IDs in the index struct; drop them so the
+    # persisted index_store does not point at deleted nodes.
+    for chunk_id in chunk_ids:
+        index.index_struct.delete(chunk_id)
+    index.storage_context.index_store.add_index_struct(index.index_struct)
+
+class FolderBatch:
+    """A group of case folders travelling through the pipeline together."""
+
+    def __init__(self, folders, documents):
+        self.folders = folders
+        self.documents = documents
+        self.nodes = []
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Chunk, embed and index the legal case corpus.")
+    parser.add_argument("--dataset-path", default="/Users/liteshperumalla/Desktop/Files/masters/Legal LLM/Final_data",
+                        help="Folder of case folders, each with data.json and opinion PDFs.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processes used for PDF extraction (1 = serial, in-process).")
+    parser.add_argument("--pdf-cache-dir", default="./pdf_text_cache",
+                        help="Where extracted PDF text is cached by file content hash ('' disables the cache).")
+    parser.add_argument("--encode-batch-size", type=int, default=256,
+                        help="Sentences per forward pass of the chunking model.")
+    parser.add_argument("--chroma-path", default="./chroma_db_legal")
+    parser.add_argument("--chroma-batch-size", type=int, default=1000,
+                        help="Rows per Chroma upsert call.")
+    parser.add_argument("--persist-dir", default="./persisted_legal_index")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only ingest new or changed case folders and drop chunks of removed ones.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted full ingestion from its last checkpoint.")
+    parser.add_argument("--manifest", default=None,
+                        help="Ingest manifest path (default: ingest_manifest.json in the index directory).")
+    parser.add_argument("--folders-per-batch", type=int, default=16,
+                        help="Case folders chunked and embedded together.")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="Batches buffered between pipeline stages; bounds memory.")
+    parser.add_argument("--checkpoint-every", type=int, default=500,
+                        help="Persist the index and manifest after this many case folders.")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Seconds between progress lines.")
+    parser.add_argument("--docstore", choices=["sqlite", "json"], default="sqlite",
+                        help="Node store for a full build: docstore.sqlite (read on demand) or docstore.json.")
+    parser.add_argument("--vector-store", choices=["flat", "simple"], default="flat",
+                        help="Vector store for a full build: quantised memory-mapped matrix, or JSON SimpleVectorStore.")
+    parser.add_argument("--flat-dtype", choices=DTYPES, default="float16",
+                        help="Storage type of the flat vector store's matrix.")
+    parser.add_argument("--embed-backend", choices=EMBED_BACKENDS, default="torch",
+                        help="legal-bert backend for chunk embeddings; the int8 ones are faster on CPU.")
+    parser.add_argument("--embed-threads", type=int, default=None, help="Embedding threads (default: all cores).")
+    parser.add_argument("--publish-shared", default=os.getenv("SHARED_INDEX_ROOT") or None, metavar="ROOT",
+                        help="Also publish the finished index as the next generation under ROOT for the API workers.")
+    parser.add_argument("--verbose", action="store_true", help="Print every chunk as it is created.")
+    return parser.parse_args()
+
+
+def has_persisted_index(persist_dir):
+    return os.path.exists(os.path.join(persist_dir, "index_store.json"))
+
+
+def stage_index_copy(persist_dir, build_dir):
+    """Copy the live index to build_dir, so an incremental run never writes files that are being served."""
+    shutil.rmtree(build_dir, ignore_errors=True)
+    shutil.copytree(persist_dir, build_dir, ignore=shutil.ignore_patterns("*.tmp", "*.old", "*-journal"))
+
+
+def swap_in_directory(build_dir, target_dir):
+    """Replace target_dir with build_dir, leaving the old index in place until the new one is ready."""
+    old_dir = f"{target_dir}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(target_dir):
+        os.replace(target_dir, old_dir)
+    os.replace(build_dir, target_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def main():
+    args = parse_args()
+    # Imported here, not at module level: they take seconds to import, and the
+    # benchmarks (and --help) use this module without them.
+    from chromadb import PersistentClient
+    from llama_index.llms.ollama import Ollama
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        Settings.embed_model = load_embed_model(EMBED_MODEL_NAME, backend=args.embed_backend,
+                                                threads=args.embed_threads)
+        print(f"✅ Model {EMBED_MODEL_NAME} ({args.embed_backend}) loaded successfully for indexing.")
+    except Exception as e:
+        print(f"❌ Error loading embedding model for indexing: {e}")
+        sys.exit(1)
+
+    Settings.llm = Ollama(model="llama3.1:latest", request_timeout=120.0)
+
+    legal_dataset_path = args.dataset_path
+
+    # Every run builds into a staging directory and swaps it in at the end, so
+    # the live index (and the API workers reading it) never sees a partial
+    # build. Incremental runs apply their changes to a copy of the live index.
+    persist_dir = args.persist_dir
+    index_dir = persist_dir.rstrip("/\\") + ".building"
+    manifest_path = args.manifest or os.path.join(index_dir, "ingest_manifest.json")
+
+    chroma_client = PersistentClient(path=args.chroma_path)
+    if args.incremental and not has_persisted_index(persist_dir):
+        print(f"❌ No persisted index in {persist_dir}; run a full ingestion first.")
+        sys.exit(1)
+    resuming = not args.incremental and args.resume and has_persisted_index(index_dir)
+    if args.incremental:
+        manifest = IngestManifest.load(args.manifest or os.path.join(persist_dir, "ingest_manifest.json"))
+    elif resuming:
+        manifest = IngestManifest.load(manifest_path)
+    else:
+        shutil.rmtree(index_dir, ignore_errors=True)
+        manifest = IngestManifest(manifest_path)
+
+    # Only files whose size or mtime differ from the manifest are read and hashed.
+    folder_scans = {f: manifest.scan(legal_dataset_path, f) for f in list_case_folders(legal_dataset_path)}
+    folder_hashes = {folder: folder_hash for folder, (folder_hash, _) in folder_scans.items()}
+
+    plan = None
+    if args.incremental:
+        plan = manifest.plan(folder_hashes)
+        print(f"Incremental ingestion: {plan.describe()}.")
+        refreshed = [manifest.refresh_files(folder, folder_scans[folder][1]) for folder in plan.unchanged]
+        if not plan.has_changes:
+            if any(refreshed):
+                manifest.save()
+            print("✅ Index is up to date.")
+            return
+        target_folders = plan.to_ingest
+        stage_index_copy(persist_dir, index_dir)
+        # Checkpoints go with the staged copy; an explicit --manifest is only
+        # updated once the new index is live.
+        manifest.path = os.path.join(index_dir, "ingest_manifest.json")
+    elif resuming:
+        target_folders = [f for f in sorted(folder_hashes) if f not in manifest.folders]
+        print(f"Resuming full ingestion: {len(manifest.folders)} case folders done, {len(target_folders)} to go.")
+    else:
+        target_folders = sorted(folder_hashes)
+
+    if not target_folders and not args.incremental and not manifest.folders:
+        print("❌ No case folders found. Check your dataset structure.")
+        sys.exit(1)
+
+    # Chroma rows are staged too, and published after the index swap: a full
+    # run replaces the live collection (so chunks from earlier runs cannot
+    # linger), an incremental one merges into it. Only a resumed full run
+    # keeps what an earlier attempt staged.
+    if not resuming:
+        try:
+            chroma_client.delete_collection(staged_collection_name())
+        except Exception:
+            pass
+    collection = chroma_client.get_or_create_collection(staged_collection_name(), **COLLECTION_OPTIONS)
+    chroma_batch_size = max_batch_size(chroma_client, args.chroma_batch_size)
+
+    if has_persisted_index(index_dir):
+        index = load_index_from_storage(load_storage_context(index_dir))
+    else:
+        os.makedirs(index_dir, exist_ok=True)
+        storage_kwargs = {}
+        if args.docstore == "sqlite":
+            storage_kwargs["docstore"] = SQLiteDocumentStore.from_persist_dir(index_dir)
+        if args.vector_store == "flat":
+            storage_kwargs["vector_store"] = FlatVectorStore(dtype=args.flat_dtype)
+        index = VectorStoreIndex([], storage_context=StorageContext.from_defaults(**storage_kwargs))
+
+    def checkpoint():
+        os.makedirs(index_dir, exist_ok=True)
+        index.storage_context.persist(persist_dir=index_dir)
+        manifest.save()
+
+    stale_chunk_ids = []
+    if plan is not None:
+        stale_chunk_ids = manifest.chunk_ids_for(plan.changed + plan.removed)
+        delete_chunks(index, stale_chunk_ids)
+        print(f"✅ Removed {len(stale_chunk_ids)} chunks of changed or removed case folders.")
+        # Until they are re-ingested, changed folders count as new, so an
+        # interrupted run picks them up again.
+        for folder in plan.changed + plan.removed:
+            manifest.forget(folder)
+        checkpoint()
+
+    # ------------------------------
+    # Streaming pipeline: folders -> text -> chunks -> embeddings -> stores
+    # ------------------------------
+    semantic_model = SentenceTransformer("all-mpnet-base-v2")
+    chunker = SemanticChunker(semantic_model, batch_size=args.encode_batch_size)
+    embed_pipeline = IngestionPipeline(transformations=[Settings.embed_model])
+    extraction = ExtractionReport(workers=args.workers)
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers and args.workers > 1 else None
+
+    def chunk_stage(folder_docs):
+        folders = [folder for folder, _ in folder_docs]
+        documents = [doc for _, docs in folder_docs for doc in docs]
+        return FolderBatch(folders, chunk_documents(documents, chunker, verbose=args.verbose))
+
+    def embed_stage(batch):
+        batch.nodes = embed_pipeline.run(documents=batch.documents) if batch.documents else []
+        batch.documents = None
+        return batch
+
+    pdf_hashes = {os.path.join(legal_dataset_path, folder, name): file_stat[2]
+                  for folder in target_folders for name, file_stat in folder_scans[folder][1].items()}
+    folder_stream = iter_case_documents(legal_dataset_path, target_folders, extraction, pool=pool,
+                                        cache_dir=args.pdf_cache_dir or None, window=args.folders_per_batch * 2,
+                                        pdf_hashes=pdf_hashes)
+    pipeline = StagedPipeline(batched(folder_stream, args.folders_per_batch), [chunk_stage, embed_stage],
+                              queue_size=args.queue_size)
+    progress = ProgressReporter(len(target_folders), interval=args.progress_interval, depths=pipeline.queue_depths)
+
+    extraction_start = time.perf_counter()
+    folders_since_checkpoint = 0
+    write_stats = WriteStats()
+    try:
+        for batch in pipeline:
+            write_stats.add(bulk_upsert(collection, batch.nodes, batch_size=chroma_batch_size))
+            index.insert_nodes(batch.nodes)
+
+            chunk_ids_by_folder = {folder: [] for folder in batch.folders}
+            for node in batch.nodes:
+                chunk_ids_by_folder[node.metadata["case_folder"]].append(node.node_id)
+            for folder, chunk_ids in chunk_ids_by_folder.items():
+                manifest.record(folder, folder_hashes[folder], chunk_ids, folder_scans[folder][1])
+
+            progress.update(folders=len(batch.folders), chunks=len(batch.nodes))
+            folders_since_checkpoint += len(batch.folders)
+            if folders_since_checkpoint >= args.checkpoint_every:
+                checkpoint()
+                folders_since_checkpoint = 0
+    except Exception as e:
+        print(f"❌ Error during ingestion pipeline: {e}")
+        print("   Progress up to the last checkpoint is kept; re-run with --resume (or --incremental) to continue.")
+        sys.exit(1)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    extraction.wall_seconds = time.perf_counter() - extraction_start
+    extraction.print_summary()
+    progress.report(final=True)
+    print(f"✅ Chroma upsert: {write_stats.describe()}.")
+
+    try:
+        checkpoint()
+        lexical_index = BM25Index.from_docstore(index.docstore)
+        lexical_index.save(index_dir)
+        print(f"✅ Lexical index built over {len(lexical_index)} chunks.")
+        swap_in_directory(index_dir, persist_dir)
+        if args.incremental and args.manifest:
+            manifest.path = args.manifest
+            manifest.save()
+        print(f"✅ Legal index persisted to {persist_dir} ({write_stats.rows} chunks written this run).")
+    except Exception as e:
+        print(f"❌ Error persisting legal index: {e}")
+        sys.exit(1)
+    try:
+        live_collection = publish_staged_collection(chroma_client, delete_ids=stale_chunk_ids, replace=plan is None,
+                                                    batch_size=chroma_batch_size)
+        print(f"✅ Chroma collection {live_collection.name} updated ({live_collection.count()} chunks).")
+    except Exception as e:
+        print(f"❌ Error publishing the Chroma collection: {e}")
+        print("   The new index is live but Chroma is not; run a full ingestion to rebuild both.")
+        sys.exit(1)
+    if args.publish_shared:
+        try:
+            generation = publish_generation(persist_dir, args.publish_shared)
+            print(f"✅ Published as shared index generation {generation} under {args.publish_shared}.")
+        except Exception as e:
+            print(f"❌ Error publishing shared index: {e}")
+            sys.exit(1)
+    print(f"✅ Ingest manifest covers {len(manifest.folders)} case folders.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,28 @@
 import os
-import json
-import datetime
+import argparse
 import logging
-from llama_index.core import StorageContext, load_index_from_storage, Settings
+from llama_index.core import load_index_from_storage, Settings
 from llama_index.llms.ollama import Ollama
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.core.schema import Document
 from llama_index.core.base.llms.types import ChatMessage
-from chromadb import PersistentClient
+
+from backend.answer_cache import SemanticAnswerCache, text_key
+from backend.chat_store import DEFAULT_SESSION, DEFAULT_USER, ChatStore
+from backend.context_packer import ContextPacker
+from backend.embedding_backend import EMBED_BACKENDS, EMBED_MODEL_NAME, load_embed_model
+from backend.fallback import CaseNameIndex, load_fallback_metadata, search_fallback_context
+from backend.lexical_index import RETRIEVAL_MODES, build_retriever
+from backend.retrieval_context import embed_and_retrieve
+from backend.index_storage import load_storage_context
+from backend.startup import StartupProfile
+
+startup = StartupProfile()
+startup.mark("imports")
 
 # Logging and environment setup
 logging.getLogger("sentence_transformers.SentenceTransformer").setLevel(logging.ERROR)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-model_name = "nlpaueb/legal-bert-base-uncased"
-Settings.embed_model = HuggingFaceEmbedding(model_name=model_name)
-
 # ------------------------------
 # Argument Generator Class
 # ------------------------------
@@ -43,73 +50,50 @@ Answer:
         response = self.model.complete(prompt)
         return response.text.strip()
 
-# ------------------------------
-# ChromaDB Utility Functions
-# ------------------------------
-def load_chat_history(chroma_client):
-    try:
-        chat_collection = chroma_client.get_or_create_collection("chat_history")
-        result = chat_collection.get()
-        return [ChatMessage(role=meta.get("role", "unknown"), content=doc)
-                for doc, meta in zip(result["documents"], result["metadatas"])]
-    except Exception as e:
-        print(f"Error loading chat history: {e}")
-        return []
-
-def save_chat_message(chroma_client, message_id, role, content):
-    chat_collection = chroma_client.get_or_create_collection("chat_history")
-    chat_collection.add(
-        ids=[str(message_id)],
-        documents=[content],
-        metadatas=[{"role": role, "timestamp": datetime.datetime.now().isoformat()}]
-    )
-
-# ------------------------------
-# Metadata Fallback Loader
-# ------------------------------
-def load_fallback_metadata(json_dir="./Final_data"):
-    fallback_contexts = {}
-    for folder in os.listdir(json_dir):
-        json_path = os.path.join(json_dir, folder, "data.json")
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                    snippet = data.get("opinions", [{}])[0].get("snippet", "")
-                    case_name = data.get("caseName", folder).lower()
-                    judge = data.get("judge", "Unknown")
-                    court = data.get("court", "Unknown")
-                    fallback_contexts[case_name] = f"{snippet}\n\nJudge: {judge}\nCourt: {court}"
-                except Exception as e:
-                    print(f"Error loading {json_path}: {e}")
-    return fallback_contexts
-
-def search_fallback_context(query, fallback_contexts):
-    query_lower = query.lower()
-    for case_name, context in fallback_contexts.items():
-        if case_name in query_lower:
-            return context
-    return None
-
 # ------------------------------
 # Main Chat Application
 # ------------------------------
-def main():
-    Settings.llm = Ollama(model="llama3.1:latest", request_timeout=120.0)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Interactive legal argument generator.")
+    parser.add_argument("--persist-dir", default="./persisted_legal_index")
+    parser.add_argument("--retriever", choices=RETRIEVAL_MODES, default=os.getenv("RETRIEVAL_MODE", "hybrid"),
+                        help="Dense-only vector search, or vector + BM25 fused by reciprocal rank.")
+    parser.add_argument("--chat-db", default=os.getenv("CHAT_DB_PATH", "./chat_history.db"))
+    parser.add_argument("--user", default=DEFAULT_USER)
+    parser.add_argument("--session", default=DEFAULT_SESSION)
+    parser.add_argument("--history", type=int, default=50, help="Earlier messages of the session to load.")
+    parser.add_argument("--context-budget", type=int, default=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")),
+                        help="Token budget for the retrieved context in the prompt.")
+    parser.add_argument("--embed-backend", choices=EMBED_BACKENDS, default=os.getenv("EMBED_BACKEND", "torch"),
+                        help="Query embedding backend; the int8 ones are faster on CPU.")
+    parser.add_argument("--embed-threads", type=int, default=None, help="Embedding threads (default: all cores).")
+    return parser.parse_args()
 
-    storage_context = StorageContext.from_defaults(persist_dir="./persisted_legal_index")
-    index = load_index_from_storage(storage_context)
+def main():
+    args = parse_args()
+    with startup.phase("embed_model"):
+        Settings.embed_model = load_embed_model(EMBED_MODEL_NAME, backend=args.embed_backend,
+                                                threads=args.embed_threads)
+    with startup.phase("llm"):
+        Settings.llm = Ollama(model="llama3.1:latest", request_timeout=120.0)
+
+    with startup.phase("index"):
+        storage_context = load_storage_context(args.persist_dir)
+        index = load_index_from_storage(storage_context)
     print("✅ Persisted index loaded successfully.")
 
-    chroma_client = PersistentClient(path="./chroma_db_legal")
-    chat_history = load_chat_history(chroma_client)
+    chat_store = ChatStore(args.chat_db)
+    chat_history = [ChatMessage(role=m.role, content=m.content)
+                    for m in chat_store.recent(args.user, args.session, limit=args.history)]
 
-    fallback_contexts = load_fallback_metadata()
+    fallback_index = CaseNameIndex(load_fallback_metadata())
     arg_gen = ArgumentGenerator(Settings.llm)
-
-    chat_collection = chroma_client.get_or_create_collection("chat_history")
-    existing = chat_collection.get()
-    next_message_id = len(existing.get("ids", [])) + 1
+    retriever = build_retriever(index, args.persist_dir, mode=args.retriever, similarity_top_k=3)
+    answer_cache = SemanticAnswerCache()
+    context_packer = ContextPacker(token_budget=args.context_budget)
+    startup.mark("retrieval_setup")
+    startup.mark_ready()
+    print(f"({startup.describe()})")
 
     print("\nWelcome to the Legal Argument Generator Chat Engine! Type 'exit' to quit.")
 
@@ -119,34 +103,38 @@ def main():
             print("Goodbye!")
             break
 
-        save_chat_message(chroma_client, next_message_id, "user", user_input)
-        next_message_id += 1
+        chat_store.append(args.user, args.session, "user", user_input)
         chat_history.append(ChatMessage(role="user", content=user_input))
 
-        query_engine = index.as_query_engine(similarity_top_k=3, include_text=True)
-        response = query_engine.query(user_input)
+        query_embedding, source_nodes = embed_and_retrieve(retriever, user_input)
 
-        retrieved_context = ""
-        if response.source_nodes:
+        chunk_ids = [node.node.node_id for node in source_nodes]
+        if source_nodes:
             print("\nTop 3 Relevant Chunks:")
-            for node in response.source_nodes:
-                chunk = node.node.text.strip()
-                print("\n> Text:", chunk)
+            for node in source_nodes:
+                print("\n> Text:", node.node.text.strip())
                 print("Metadata:", node.node.metadata)
-                retrieved_context += chunk + "\n\n"
+            packed = context_packer.pack(source_nodes)
+            retrieved_context = packed.text
+            print(f"\n({packed.describe()})")
         else:
             print("\nNo relevant chunks found. Searching fallback metadata.")
-            fallback = search_fallback_context(user_input, fallback_contexts)
+            fallback = search_fallback_context(user_input, fallback_index)
             if fallback:
                 retrieved_context = fallback
             else:
                 retrieved_context = "No relevant discussion found in the retrieved legal context."
+            chunk_ids = [text_key(retrieved_context)]
 
-        response_text = arg_gen.generate_argument(user_input, retrieved_context)
+        response_text = answer_cache.lookup(query_embedding, chunk_ids)
+        if response_text is None:
+            response_text = arg_gen.generate_argument(user_input, retrieved_context)
+            answer_cache.store(query_embedding, chunk_ids, response_text)
+        else:
+            print("\n(Answer reused from an earlier, near-identical question.)")
 
         print("\n📄 Legal Argument:\n", response_text)
-        save_chat_message(chroma_client, next_message_id, "assistant", response_text)
-        next_message_id += 1
+        chat_store.append(args.user, args.session, "assistant", response_text)
         chat_history.append(ChatMessage(role="assistant", content=response_text))
 
 if __name__ == "__main__":
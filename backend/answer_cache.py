@@ -0,0 +1,135 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def context_key(chunk_ids):
+    """Order-insensitive key for the set of retrieved chunks an answer was generated from."""
+    return tuple(sorted(chunk_ids))
+
+
+def text_key(text):
+    """Stand-in chunk ID for context that did not come from the index (e.g. the metadata fallback)."""
+    return "text:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("key", "embedding", "answer", "created_at", "size")
+
+    def __init__(self, key, embedding, answer):
+        self.key = key
+        self.embedding = embedding
+        self.answer = answer
+        self.created_at = time.monotonic()
+        self.size = embedding.nbytes + len(answer.encode("utf-8")) + sum(len(k) for k in key)
+
+
+# ------------------------------
+# Semantic Answer Cache
+# ------------------------------
+class SemanticAnswerCache:
+    """Reuses generated answers for repeated and paraphrased questions.
+
+    An answer is only reused when the new question retrieved exactly the same
+    chunks *and* its query embedding is within `similarity_threshold` cosine
+    similarity of the cached question, so a paraphrase that lands on different
+    precedents always gets a fresh generation. Entries expire after
+    `ttl_seconds` and are evicted least-recently-used once either
+    `max_entries` or `max_bytes` is exceeded.
+
+    `generation` ties entries to one build of the index: `invalidate()` clears
+    everything, and `store()` ignores answers produced against an older build.
+    """
+
+    def __init__(self, similarity_threshold=0.97, max_entries=2048, ttl_seconds=3600, max_bytes=64 * 1024 * 1024):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.generation = None
+        self._entries = OrderedDict()  # entry id -> _Entry, in LRU order
+        self._by_key = {}  # context key -> set of entry ids
+        self._next_id = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalise(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry.size
+        ids = self._by_key[entry.key]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_key[entry.key]
+
+    def _expired(self, entry, now):
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+
+    def lookup(self, embedding, chunk_ids):
+        key = context_key(chunk_ids)
+        query = self._normalise(embedding)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id in list(self._by_key.get(key, ())):
+                entry = self._entries[entry_id]
+                if self._expired(entry, now):
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(query, entry.embedding))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id].answer
+
+    def store(self, embedding, chunk_ids, answer, generation=None):
+        if not answer or generation != self.generation:
+            return
+        entry = _Entry(context_key(chunk_ids), self._normalise(embedding), answer)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._by_key.setdefault(entry.key, set()).add(entry_id)
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, generation=None):
+        """Drop every entry; call whenever the index is rebuilt or reloaded."""
+        with self._lock:
+            self._entries.clear()
+            self._by_key.clear()
+            self._bytes = 0
+            self.generation = generation
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "generation": self.generation,
+            }
@@ -0,0 +1,154 @@
+"""Append-only chat history in SQLite, partitioned by user and session.
+
+Replaces the Chroma `chat_history` collection, where every write listed the
+whole collection to pick the next ID (slow, and colliding under concurrent
+writers) and every read returned every user's messages.
+"""
+import os
+import sqlite3
+import argparse
+import datetime
+import threading
+from dataclasses import dataclass
+
+DEFAULT_USER = "anonymous"
+DEFAULT_SESSION = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    next_seq INTEGER NOT NULL,
+    PRIMARY KEY (user_id, session_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS messages (
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, session_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class StoredMessage:
+    seq: int
+    role: str
+    content: str
+    created_at: str
+
+    def as_dict(self):
+        return {"seq": self.seq, "role": self.role, "content": self.content, "created_at": self.created_at}
+
+
+class ChatStore:
+    """Messages keyed by (user, session, seq).
+
+    Sequence numbers are allocated per session inside the same transaction
+    as the insert, so concurrent writers (threads or processes) never collide
+    and an append costs the same however long the history is.
+    """
+
+    def __init__(self, path="./chat_history.db"):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        # One connection per thread; WAL lets readers proceed while a writer commits.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, user_id, session_id, role, content):
+        """Append one message; returns its sequence number."""
+        return self.append_many(user_id, session_id, [(role, content)])[0]
+
+    def append_many(self, user_id, session_id, messages):
+        """Append (role, content) pairs in one transaction; returns their sequence numbers."""
+        messages = list(messages)
+        if not messages:
+            return []
+        created_at = datetime.datetime.now().isoformat()
+        with _Transaction(self._connection()) as conn:
+            (end,) = conn.execute(
+                "INSERT INTO sessions (user_id, session_id, next_seq) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, session_id) DO UPDATE SET next_seq = next_seq + excluded.next_seq - 1 "
+                "RETURNING next_seq",
+                (user_id, session_id, len(messages) + 1),
+            ).fetchone()
+            first = end - len(messages)
+            conn.executemany(
+                "INSERT INTO messages (user_id, session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, session_id, first + i, role, content, created_at)
+                 for i, (role, content) in enumerate(messages)],
+            )
+        return list(range(first, end))
+
+    def recent(self, user_id, session_id, limit=50, before=None):
+        """The last `limit` messages (oldest first), optionally only those with seq < `before`.
+
+        Pass the smallest seq of one page as `before` to fetch the page before it.
+        """
+        query = "SELECT seq, role, content, created_at FROM messages WHERE user_id = ? AND session_id = ?"
+        params = [user_id, session_id]
+        if before is not None:
+            query += " AND seq < ?"
+            params.append(before)
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        rows = self._connection().execute(query, params).fetchall()
+        return [StoredMessage(*row) for row in reversed(rows)]
+
+    def sessions(self, user_id):
+        rows = self._connection().execute(
+            "SELECT session_id, next_seq - 1 FROM sessions WHERE user_id = ? ORDER BY session_id", (user_id,)
+        ).fetchall()
+        return [{"session_id": session_id, "messages": count} for session_id, count in rows]
+
+
+class _Transaction:
+    """`with` block that runs as one IMMEDIATE transaction (write lock taken up front)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+
+
+# ------------------------------
+# Migration from Chroma
+# ------------------------------
+def import_chroma_history(chroma_path, store: ChatStore, user_id=DEFAULT_USER, session_id=DEFAULT_SESSION):
+    """Copy the old Chroma `chat_history` collection into one session of the store."""
+    from chromadb import PersistentClient
+
+    result = PersistentClient(path=chroma_path).get_or_create_collection("chat_history").get()
+    rows = sorted(zip(result["ids"], result["documents"], result["metadatas"]),
+                  key=lambda row: (0, int(row[0]), "") if row[0].isdigit() else (1, 0, row[0]))
+    return store.append_many(user_id, session_id, [(meta.get("role", "unknown"), doc) for _, doc, meta in rows])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the Chroma chat_history collection into the chat store.")
+    parser.add_argument("--chroma-path", default="./chroma_db_legal")
+    parser.add_argument("--db", default=os.getenv("CHAT_DB_PATH", "./chat_history.db"))
+    parser.add_argument("--user", default=DEFAULT_USER)
+    parser.add_argument("--session", default=DEFAULT_SESSION)
+    args = parser.parse_args()
+    imported = import_chroma_history(args.chroma_path, ChatStore(args.db), args.user, args.session)
+    print(f"✅ Imported {len(imported)} messages into {args.db} ({args.user}/{args.session}).")
@@ -0,0 +1,134 @@
+"""Prompt context assembly: drop repeated passages, merge neighbouring chunks, fit a token budget.
+
+Retrieved chunks often say the same thing twice: a case's JSON-snippet
+document quotes its own opinion text, and hybrid retrieval can return
+overlapping passages. Every repeat costs prefill time, so the packer keeps
+only sentences that are not already (nearly) in the context, joins chunks
+of the same case in reading order, and stops at `token_budget`.
+"""
+import re
+from dataclasses import dataclass, field
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+MARKUP = re.compile(r"<[^>]+>")  # CourtListener snippets highlight matches with <mark>
+WORD = re.compile(r"\w+")
+
+
+def approx_tokens(text):
+    # Llama-family tokenizers average about 1.3 tokens per English word; close
+    # enough for budgeting without loading a tokenizer in the request path.
+    return (len(text.split()) * 4 + 2) // 3
+
+
+def shingles(sentence, size):
+    words = WORD.findall(MARKUP.sub(" ", sentence).lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+@dataclass
+class PackedContext:
+    text: str
+    input_tokens: int
+    packed_tokens: int
+    duplicate_sentences: int = 0
+    merged_chunks: int = 0
+    truncated: bool = False
+    chunk_ids: list = field(default_factory=list)
+
+    @classmethod
+    def unpacked(cls, text, count_tokens=approx_tokens):
+        tokens = count_tokens(text)
+        return cls(text=text, input_tokens=tokens, packed_tokens=tokens)
+
+    @property
+    def saved_tokens(self):
+        return max(0, self.input_tokens - self.packed_tokens)
+
+    def describe(self):
+        return (f"context {self.input_tokens}->{self.packed_tokens} tokens ({self.saved_tokens} saved, "
+                f"{self.duplicate_sentences} duplicate sentences, {self.merged_chunks} chunks merged"
+                f"{', truncated' if self.truncated else ''})")
+
+
+class ContextPacker:
+    def __init__(self, token_budget=1500, duplicate_threshold=0.8, shingle_size=4, count_tokens=approx_tokens):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.shingle_size = shingle_size
+        self.count_tokens = count_tokens
+
+    def pack(self, nodes):
+        """Pack retrieved nodes (NodeWithScore, best first) into prompt context text."""
+        texts = [node.node.get_content().strip() for node in nodes]
+        input_tokens = self.count_tokens("".join(text + "\n\n" for text in texts))
+
+        # 1. Near-duplicate removal, sentence by sentence, in rank order so the best-ranked copy survives.
+        seen = set()
+        kept = []  # (rank, node, sentences)
+        duplicates = 0
+        for rank, (node, text) in enumerate(zip(nodes, texts)):
+            sentences = []
+            for sentence in SENTENCE_BOUNDARY.split(text):
+                grams = shingles(sentence, self.shingle_size)
+                if not grams:
+                    continue
+                if len(grams & seen) >= self.duplicate_threshold * len(grams):
+                    duplicates += 1
+                    continue
+                seen |= grams
+                sentences.append(sentence)
+            if sentences:
+                kept.append((rank, node, sentences))
+
+        # 2. One passage per case and source, chunks in document order, placed at its best rank.
+        passages = {}
+        for rank, node, sentences in kept:
+            metadata = node.node.metadata
+            key = (metadata.get("case_folder"), metadata.get("source")) if "chunk_index" in metadata else (rank,)
+            passages.setdefault(key, []).append((metadata.get("chunk_index", 0), rank, sentences))
+        merged = 0
+        ordered = []
+        for members in passages.values():
+            members.sort()
+            parts = [" ".join(members[0][2])]
+            for (previous, _, _), (index, _, sentences) in zip(members, members[1:]):
+                # Adjacent chunks continue each other; a gap is marked so the text does not read as continuous.
+                parts.append((" " if index == previous + 1 else " [...] ") + " ".join(sentences))
+                merged += 1
+            ordered.append((min(rank for _, rank, _ in members), "".join(parts)))
+        ordered.sort()
+
+        # 3. Fit the budget: whole passages while they fit, then as many sentences of the next as fit.
+        output = []
+        used = 0
+        truncated = False
+        for _, passage in ordered:
+            tokens = self.count_tokens(passage)
+            if used + tokens <= self.token_budget:
+                output.append(passage)
+                used += tokens
+                continue
+            truncated = True
+            partial = []
+            for sentence in SENTENCE_BOUNDARY.split(passage):
+                sentence_tokens = self.count_tokens(sentence)
+                if used + sentence_tokens > self.token_budget:
+                    break
+                partial.append(sentence)
+                used += sentence_tokens
+            if partial:
+                output.append(" ".join(partial))
+            break
+
+        text = "".join(passage + "\n\n" for passage in output)
+        return PackedContext(
+            text=text,
+            input_tokens=input_tokens,
+            packed_tokens=self.count_tokens(text),
+            duplicate_sentences=duplicates,
+            merged_chunks=merged,
+            truncated=truncated,
+            chunk_ids=[node.node.node_id for node in nodes],
+        )
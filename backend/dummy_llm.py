@@ -1,23 +1,76 @@
 # dummy_llm.py
-import asyncio
+import time
 import random
-import json
-
-
-class DummyLLM:
-    def __init__(self):
-        self.responses = [
-            "That's an interesting point. Can you tell me more?",
-            "I understand what you're saying. Here's what I think...",
-            "Based on what you've shared, I'd suggest considering these ideas...",
-            "Let me analyze this further... The key aspects to consider are...",
-            "That's a great question! From my perspective...",
-            "I've processed your request and here's what I found...",
-            "Thanks for sharing that. My thoughts on this topic are...",
-            "I've considered multiple angles on this issue, and here's my analysis...",
-            "Your question touches on several important concepts. Let me break it down...",
-            "I find this topic fascinating. Here's what I know about it..."
-        ]
+import asyncio
+from typing import Any
+
+from llama_index.core.llms import CompletionResponse, CustomLLM, LLMMetadata
+
+RESPONSES = [
+    "That's an interesting point. Can you tell me more?",
+    "I understand what you're saying. Here's what I think...",
+    "Based on what you've shared, I'd suggest considering these ideas...",
+    "Let me analyze this further... The key aspects to consider are...",
+    "That's a great question! From my perspective...",
+    "I've processed your request and here's what I found...",
+    "Thanks for sharing that. My thoughts on this topic are...",
+    "I've considered multiple angles on this issue, and here's my analysis...",
+    "Your question touches on several important concepts. Let me break it down...",
+    "I find this topic fascinating. Here's what I know about it..."
+]
+
+
+class DummyLLM(CustomLLM):
+    """Stand-in for Ollama: streams canned words at a fixed token rate after a fixed first-token latency.
+
+    Drop-in for `Settings.llm`, so the real streaming path can be benchmarked without a model server.
+    """
+
+    tokens_per_second: float = 50.0
+    first_token_latency: float = 0.3
+    max_tokens: int = 200
+    responses: list = RESPONSES
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="dummy", num_output=self.max_tokens)
+
+    def _words(self):
+        words = []
+        while len(words) < self.max_tokens:
+            words.extend(random.choice(self.responses).split())
+        return words[:self.max_tokens]
+
+    def _token_delay(self, i):
+        # Seconds after the first token at which token i is due; pacing against a schedule avoids drift.
+        return i / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        response = None
+        for response in self.stream_complete(prompt, formatted=formatted, **kwargs):
+            pass
+        return CompletionResponse(text=response.text if response else "")
+
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        time.sleep(self.first_token_latency)
+        start = time.perf_counter()
+        text = ""
+        for i, word in enumerate(self._words()):
+            time.sleep(max(0.0, start + self._token_delay(i) - time.perf_counter()))
+            text += word + " "
+            yield CompletionResponse(text=text, delta=word + " ")
+
+    async def astream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        async def gen():
+            await asyncio.sleep(self.first_token_latency)
+            start = time.perf_counter()
+            text = ""
+            for i, word in enumerate(self._words()):
+                await asyncio.sleep(max(0.0, start + self._token_delay(i) - time.perf_counter()))
+                text += word + " "
+                yield CompletionResponse(text=text, delta=word + " ")
+
+        return gen()
 
     async def generate_large_response(self):
         """
@@ -51,4 +104,3 @@ class DummyLLM:
             chunk = " ".join(words[i:i + chunk_size])
             yield f"data: {chunk}\n\n"
             await asyncio.sleep(0.2)  # Simulate real-time delay between chunks
-
@@ -0,0 +1,136 @@
+"""legal-bert embeddings on CPU: the stock fp32 model or a faster backend behind one factory.
+
+    torch       HuggingFaceEmbedding as before (fp32 PyTorch)
+    torch-int8  the same model with its Linear layers dynamically quantised to int8
+    onnx        the model exported once to ONNX and run by onnxruntime (fp32)
+    onnx-int8   the exported graph with int8 weights (onnxruntime dynamic quantisation)
+
+Every backend returns mean-pooled, L2-normalised vectors of the same model,
+so an index built with one can be queried with another; cosine parity with
+fp32 is checked by benchmarks/bench_embedding_backend.py and
+tests/test_embedding_backend.py. Exporting the ONNX graph needs the `onnx`
+package on top of onnxruntime.
+
+torch, transformers and sentence-transformers are imported when a model is
+loaded, not with this module; they take seconds to import.
+"""
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import Field, PrivateAttr
+
+EMBED_MODEL_NAME = "nlpaueb/legal-bert-base-uncased"
+EMBED_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+DEFAULT_ONNX_DIR = "./onnx_models"
+
+
+def load_embed_model(model_name=EMBED_MODEL_NAME, backend="torch", threads=None, onnx_dir=DEFAULT_ONNX_DIR, **kwargs):
+    """Embedding model for Settings.embed_model; `threads` caps the intra-op threads (default: all cores)."""
+    if backend not in EMBED_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(EMBED_BACKENDS)}")
+    if backend.startswith("onnx"):
+        return OnnxEmbedding(model_name=model_name, quantize=backend == "onnx-int8", threads=threads,
+                             onnx_dir=onnx_dir, **kwargs)
+
+    import torch
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    if threads:
+        torch.set_num_threads(threads)
+    if backend == "torch-int8":
+        kwargs["device"] = "cpu"  # dynamic quantisation only has CPU kernels
+    model = HuggingFaceEmbedding(model_name=model_name, **kwargs)
+    if backend == "torch-int8":
+        torch.ao.quantization.quantize_dynamic(model._model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def export_onnx(model_name, onnx_dir=DEFAULT_ONNX_DIR, quantize=False):
+    """Path of the model's ONNX graph under `onnx_dir`, exporting (and quantising) it on first use."""
+    model_dir = os.path.join(onnx_dir, model_name.replace("/", "__"))
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    int8_path = os.path.join(model_dir, "model.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        os.makedirs(model_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        tokenizer.save_pretrained(model_dir)
+        model = AutoModel.from_pretrained(model_name).eval()
+        sample = tokenizer(["Was the hearsay properly admitted?"], return_tensors="pt")
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        tmp_path = f"{fp32_path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(model, tuple(sample[name] for name in names), tmp_path, input_names=names,
+                              output_names=["last_hidden_state"],
+                              dynamic_axes={**axes, "last_hidden_state": {0: "batch", 1: "sequence"}},
+                              opset_version=17)
+        os.replace(tmp_path, fp32_path)  # several workers may export at once; the last complete file wins
+        print(f"✅ Exported {model_name} to {fp32_path}.")
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+        print(f"✅ Quantised {fp32_path} to int8.")
+    return int8_path
+
+
+class OnnxEmbedding(BaseEmbedding):
+    """legal-bert through onnxruntime, pooled and normalised the way HuggingFaceEmbedding does it."""
+
+    max_length: int = Field(default=512, description="Tokens per text; longer texts are truncated.")
+    quantize: bool = Field(default=False, description="Run the int8 graph.")
+
+    _session: Any = PrivateAttr()
+    _tokenizer: Any = PrivateAttr()
+    _input_names: List[str] = PrivateAttr()
+
+    def __init__(self, model_name=EMBED_MODEL_NAME, quantize=False, threads=None, onnx_dir=DEFAULT_ONNX_DIR,
+                 **kwargs):
+        import onnxruntime
+        from transformers import AutoTokenizer
+        super().__init__(model_name=model_name, quantize=quantize, **kwargs)
+        path = export_onnx(model_name, onnx_dir, quantize=quantize)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(path))
+        self._input_names = [inp.name for inp in self._session.get_inputs()]
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+
+    def _embed(self, texts: List[str], prompt_name: Optional[str] = None) -> List[List[float]]:
+        # legal-bert has no query/text prompts; `prompt_name` is accepted to match HuggingFaceEmbedding._embed.
+        encoded = self._tokenizer(texts, padding=True, truncation=True, max_length=self.max_length,
+                                  return_tensors="np")
+        (hidden,) = self._session.run(["last_hidden_state"], {name: encoded[name] for name in self._input_names})
+        mask = encoded["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query], prompt_name="query")[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text], prompt_name="text")[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, prompt_name="text")
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embedding(text)
@@ -0,0 +1,77 @@
+import os
+import json
+from collections import Counter, defaultdict
+
+# ------------------------------
+# Metadata Fallback Loader
+# ------------------------------
+def load_fallback_metadata(json_dir="./Final_data"):
+    fallback_contexts = {}
+    for folder in os.listdir(json_dir):
+        json_path = os.path.join(json_dir, folder, "data.json")
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                    snippet = data.get("opinions", [{}])[0].get("snippet", "")
+                    case_name = data.get("caseName", folder).lower()
+                    judge = data.get("judge", "Unknown")
+                    court = data.get("court", "Unknown")
+                    fallback_contexts[case_name] = f"{snippet}\n\nJudge: {judge}\nCourt: {court}"
+                except Exception as e:
+                    print(f"Error loading {json_path}: {e}")
+    return fallback_contexts
+
+# ------------------------------
+# Case-name Index
+# ------------------------------
+class CaseNameIndex:
+    """Finds every case name that occurs in a query without scanning all names.
+
+    Each name is filed under its rarest character n-gram. A name can only be a
+    substring of the query if that n-gram is in the query too, so a lookup
+    checks just the names filed under the query's own n-grams.
+    """
+
+    def __init__(self, fallback_contexts, gram_size=4):
+        self.contexts = fallback_contexts
+        self.gram_size = gram_size
+        self.postings = defaultdict(list)  # rarest n-gram -> case names
+        self.short_names = []  # names shorter than one n-gram are always checked
+
+        name_grams = {name: self._grams(name) for name in fallback_contexts}
+        frequency = Counter(gram for grams in name_grams.values() for gram in grams)
+        for name, grams in name_grams.items():
+            if grams:
+                rarest = min(grams, key=lambda gram: (frequency[gram], gram))
+                self.postings[rarest].append(name)
+            elif name:
+                self.short_names.append(name)
+        self.postings = dict(self.postings)
+
+    def _grams(self, text):
+        return {text[i:i + self.gram_size] for i in range(len(text) - self.gram_size + 1)}
+
+    def __len__(self):
+        return len(self.contexts)
+
+    def matches(self, query):
+        """All (case_name, context) pairs found in the query, longest name first."""
+        query_lower = query.lower()
+        candidates = list(self.short_names)
+        for gram in self._grams(query_lower):
+            candidates.extend(self.postings.get(gram, ()))
+
+        found = []
+        for name in set(candidates):
+            position = query_lower.find(name)
+            if position >= 0:
+                found.append((-len(name), position, name))
+        found.sort()
+        return [(name, self.contexts[name]) for _, _, name in found]
+
+
+def search_fallback_context(query, fallback_index: CaseNameIndex):
+    """Context of the longest case name mentioned in the query, or None."""
+    matches = fallback_index.matches(query)
+    return matches[0][1] if matches else None
@@ -0,0 +1,359 @@
+"""Exact top-k search over a quantised, memory-mapped embedding matrix.
+
+For a corpus of this size a brute-force scan of float16 or int8 vectors is
+as fast as an HNSW graph, has no approximation error and needs a fraction
+of the memory: the matrix is mmap'd, so processes serving the same index
+share its pages through the OS page cache.
+
+Layout under <persist_dir>/flat_vector_store/:
+    vectors.npy   (rows, dim) float16, or int8 with per-row scales
+    scales.npy    (rows,) float32, int8 only
+    rows.json     node ids, ref doc ids and scalar metadata columns
+
+    python -m backend.flat_vector_store ./persisted_legal_index --dtype int8   # convert default__vector_store.json
+"""
+import os
+import json
+import shutil
+import argparse
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+
+FLAT_STORE_DIRNAME = "flat_vector_store"
+FLAT_STORE_VERSION = 1
+DTYPES = ("float16", "int8")
+SIMPLE_VECTOR_STORE_FNAME = "default__vector_store.json"
+
+
+def normalise(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantise(vectors, dtype):
+    """Unit-normalised vectors as (matrix, per-row scales or None)."""
+    vectors = normalise(vectors)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def scalar_metadata(metadata):
+    return {k: v for k, v in (metadata or {}).items() if isinstance(v, (str, int, float, bool)) or v is None}
+
+
+class FlatVectorStore(BasePydanticVectorStore):
+    """Exact cosine search over a quantised matrix, with metadata pre-filter masks.
+
+    Nodes live in the docstore (stores_text=False); this store only holds
+    vectors, node ids and the scalar metadata used for filtering. Adds and
+    deletes are buffered in memory and compacted into the matrix on persist.
+    """
+
+    stores_text: bool = False
+    dtype: str = "float16"
+    block_rows: int = 65536
+
+    _vectors: Any = PrivateAttr(default=None)
+    _scales: Any = PrivateAttr(default=None)
+    _ids: list = PrivateAttr(default_factory=list)
+    _ref_doc_ids: list = PrivateAttr(default_factory=list)
+    _columns: dict = PrivateAttr(default_factory=dict)
+    _row_of: dict = PrivateAttr(default_factory=dict)
+    _alive: Any = PrivateAttr(default=None)
+    _pending: list = PrivateAttr(default_factory=list)
+    _value_rows: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, dtype="float16", block_rows=65536, **kwargs):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {', '.join(DTYPES)}")
+        super().__init__(dtype=dtype, block_rows=block_rows, **kwargs)
+        self._alive = np.zeros(0, dtype=bool)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FlatVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    def count(self):
+        # Not __len__: StorageContext.from_defaults tests `if vector_store:`.
+        self._consolidate()
+        return int(self._alive.sum())
+
+    # ------------------------------
+    # Writes
+    # ------------------------------
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        embeddings = [node.get_embedding() for node in nodes]
+        self._pending.append((list(nodes), quantise(embeddings, self.dtype)))
+        return [node.node_id for node in nodes]
+
+    def _consolidate(self):
+        """Fold buffered adds into the matrix (copying it out of the mmap if needed)."""
+        if not self._pending:
+            return
+        matrices = [] if self._vectors is None else [np.asarray(self._vectors)]
+        scales = [] if self._scales is None else [np.asarray(self._scales)]
+        alive = [self._alive]
+        for nodes, (matrix, row_scales) in self._pending:
+            start = len(self._ids)
+            for offset, node in enumerate(nodes):
+                previous = self._row_of.get(node.node_id)
+                if previous is not None:
+                    self._alive[previous] = False  # re-added node: the new row wins
+                self._row_of[node.node_id] = start + offset
+                self._ids.append(node.node_id)
+                self._ref_doc_ids.append(node.ref_doc_id)
+                metadata = scalar_metadata(node.metadata)
+                for key in set(self._columns) | set(metadata):
+                    self._columns.setdefault(key, [None] * (start + offset)).append(metadata.get(key))
+            matrices.append(matrix)
+            if row_scales is not None:
+                scales.append(row_scales)
+            alive.append(np.ones(len(nodes), dtype=bool))
+        self._vectors = np.concatenate(matrices)
+        self._scales = np.concatenate(scales) if scales else None
+        self._alive = np.concatenate(alive)
+        self._pending = []
+        self._value_rows = {}
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._consolidate()
+        for row, row_ref_doc_id in enumerate(self._ref_doc_ids):
+            if row_ref_doc_id == ref_doc_id:
+                self._drop_row(row)
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters: Optional[MetadataFilters] = None,
+                     **delete_kwargs: Any) -> None:
+        self._consolidate()
+        if node_ids is not None:
+            for node_id in node_ids:
+                row = self._row_of.get(node_id)
+                if row is not None:
+                    self._drop_row(row)
+        if filters is not None:
+            for row in np.flatnonzero(self._filter_mask(filters) & self._alive):
+                self._drop_row(int(row))
+
+    def _drop_row(self, row):
+        self._alive[row] = False
+        if self._row_of.get(self._ids[row]) == row:
+            del self._row_of[self._ids[row]]
+
+    def clear(self) -> None:
+        self.__init__(dtype=self.dtype, block_rows=self.block_rows)
+
+    # ------------------------------
+    # Search
+    # ------------------------------
+    def _rows_with(self, key, value):
+        """Row numbers whose metadata `key` equals `value`, cached per key."""
+        if key not in self._value_rows:
+            by_value = {}
+            for row, row_value in enumerate(self._columns.get(key, ())):
+                by_value.setdefault(row_value, []).append(row)
+            self._value_rows[key] = {v: np.array(rows, dtype=np.int64) for v, rows in by_value.items()}
+        return self._value_rows[key].get(value, np.zeros(0, dtype=np.int64))
+
+    def _filter_mask(self, filters: MetadataFilters):
+        masks = []
+        for metadata_filter in filters.filters:
+            if isinstance(metadata_filter, MetadataFilters):
+                masks.append(self._filter_mask(metadata_filter))
+                continue
+            mask = np.zeros(len(self._ids), dtype=bool)
+            operator = metadata_filter.operator
+            if operator in (FilterOperator.EQ, FilterOperator.NE):
+                values = [metadata_filter.value]
+            elif operator in (FilterOperator.IN, FilterOperator.NIN):
+                values = list(metadata_filter.value)
+            else:
+                raise ValueError(f"FlatVectorStore does not support the {operator.value!r} filter operator")
+            for value in values:
+                mask[self._rows_with(metadata_filter.key, value)] = True
+            if operator in (FilterOperator.NE, FilterOperator.NIN):
+                mask = ~mask
+            masks.append(mask)
+        if not masks:
+            return np.ones(len(self._ids), dtype=bool)
+        if filters.condition == FilterCondition.OR:
+            return np.logical_or.reduce(masks)
+        return np.logical_and.reduce(masks)
+
+    def _query_mask(self, query: VectorStoreQuery):
+        mask = self._alive
+        if query.filters is not None:
+            mask = mask & self._filter_mask(query.filters)
+        if query.node_ids:
+            allowed = np.zeros(len(self._ids), dtype=bool)
+            allowed[[self._row_of[i] for i in query.node_ids if i in self._row_of]] = True
+            mask = mask & allowed
+        if query.doc_ids:
+            doc_ids = set(query.doc_ids)
+            mask = mask & np.array([r in doc_ids for r in self._ref_doc_ids], dtype=bool)
+        return mask
+
+    def search(self, query_embeddings, top_k, mask=None):
+        """Exact top-k for a batch of queries: (rows, scores), each (queries, k), best first.
+
+        The matrix is scanned in blocks of `block_rows`, so the float32 working
+        set stays bounded however large the index is.
+        """
+        self._consolidate()
+        queries = normalise(np.atleast_2d(query_embeddings))
+        mask = self._alive if mask is None else mask
+        num_queries = len(queries)
+        best_scores = np.full((num_queries, 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((num_queries, 0), dtype=np.int64)
+        for start in range(0, len(self._ids), self.block_rows):
+            end = min(start + self.block_rows, len(self._ids))
+            block_mask = mask[start:end]
+            if not block_mask.any():
+                continue
+            scores = queries @ np.asarray(self._vectors[start:end], dtype=np.float32).T
+            if self._scales is not None:
+                scores *= self._scales[start:end]
+            scores[:, ~block_mask] = -np.inf
+            k = min(top_k, end - start)
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, candidates + start], axis=1)
+            if best_scores.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("FlatVectorStore needs a query embedding")
+        self._consolidate()
+        if not self._ids:
+            return VectorStoreQueryResult(ids=[], similarities=[])
+        mask = self._query_mask(query)
+        rows, scores = self.search(query.query_embedding, query.similarity_top_k, mask)
+        hits = [(int(r), float(s)) for r, s in zip(rows[0], scores[0]) if np.isfinite(s)]
+        return VectorStoreQueryResult(ids=[self._ids[r] for r, _ in hits], similarities=[s for _, s in hits])
+
+    # ------------------------------
+    # Persistence
+    # ------------------------------
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        """Write the compacted store next to `persist_path` (StorageContext passes a JSON file path)."""
+        self._consolidate()
+        store_dir = os.path.join(os.path.dirname(persist_path) or ".", FLAT_STORE_DIRNAME)
+        tmp_dir = f"{store_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        keep = np.flatnonzero(self._alive) if len(self._alive) else np.zeros(0, dtype=np.int64)
+        dim = self._vectors.shape[1] if self._vectors is not None else 0
+        vectors = np.asarray(self._vectors)[keep] if self._vectors is not None else np.zeros((0, 0), np.float16)
+        np.save(os.path.join(tmp_dir, "vectors.npy"), vectors)
+        if self._scales is not None:
+            np.save(os.path.join(tmp_dir, "scales.npy"), np.asarray(self._scales)[keep])
+        rows = {
+            "version": FLAT_STORE_VERSION,
+            "dtype": self.dtype,
+            "dim": dim,
+            "ids": [self._ids[r] for r in keep],
+            "ref_doc_ids": [self._ref_doc_ids[r] for r in keep],
+            "columns": {key: [values[r] for r in keep] for key, values in self._columns.items()},
+        }
+        with open(os.path.join(tmp_dir, "rows.json"), "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+
+        old_dir = f"{store_dir}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(store_dir):
+            os.replace(store_dir, old_dir)
+        os.replace(tmp_dir, store_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def from_arrays(cls, node_ids, vectors, dtype="float16", ref_doc_ids=None, metadata=None, **kwargs):
+        """Store built directly from an (n, dim) embedding matrix."""
+        store = cls(dtype=dtype, **kwargs)
+        store._vectors, store._scales = quantise(vectors, dtype)
+        store._ids = list(node_ids)
+        store._ref_doc_ids = list(ref_doc_ids) if ref_doc_ids is not None else [None] * len(store._ids)
+        rows = [scalar_metadata(m) for m in metadata] if metadata is not None else []
+        for key in {key for row in rows for key in row}:
+            store._columns[key] = [row.get(key) for row in rows]
+        store._row_of = {node_id: row for row, node_id in enumerate(store._ids)}
+        store._alive = np.ones(len(store._ids), dtype=bool)
+        return store
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir, mmap=True, **kwargs):
+        store_dir = os.path.join(persist_dir, FLAT_STORE_DIRNAME)
+        with open(os.path.join(store_dir, "rows.json"), encoding="utf-8") as f:
+            rows = json.load(f)
+        if rows.get("version") != FLAT_STORE_VERSION:
+            raise ValueError(f"{store_dir} was written by an unsupported version: {rows.get('version')}")
+        store = cls(dtype=rows["dtype"], **kwargs)
+        mmap_mode = "r" if mmap else None
+        store._vectors = np.load(os.path.join(store_dir, "vectors.npy"), mmap_mode=mmap_mode)
+        if rows["dtype"] == "int8":
+            store._scales = np.load(os.path.join(store_dir, "scales.npy"))
+        store._ids = rows["ids"]
+        store._ref_doc_ids = rows["ref_doc_ids"]
+        store._columns = rows["columns"]
+        store._row_of = {node_id: row for row, node_id in enumerate(store._ids)}
+        store._alive = np.ones(len(store._ids), dtype=bool)
+        return store
+
+
+def has_flat_vector_store(persist_dir):
+    return os.path.isdir(os.path.join(persist_dir, FLAT_STORE_DIRNAME))
+
+
+# ------------------------------
+# Converter
+# ------------------------------
+def convert_simple_vector_store(persist_dir, dtype="float16"):
+    """Build flat_vector_store/ from the index's default__vector_store.json."""
+    with open(os.path.join(persist_dir, SIMPLE_VECTOR_STORE_FNAME), encoding="utf-8") as f:
+        data = json.load(f)
+    embeddings = data.get("embedding_dict", {})
+    ref_doc_ids = data.get("text_id_to_ref_doc_id", {})
+    metadata = data.get("metadata_dict", {})
+    node_ids = list(embeddings)
+    store = FlatVectorStore.from_arrays(
+        node_ids,
+        np.array([embeddings[node_id] for node_id in node_ids], dtype=np.float32),
+        dtype=dtype,
+        ref_doc_ids=[ref_doc_ids.get(node_id) for node_id in node_ids],
+        metadata=[metadata.get(node_id) for node_id in node_ids],
+    )
+    store.persist(os.path.join(persist_dir, SIMPLE_VECTOR_STORE_FNAME))
+    return len(node_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a persisted index's vector store to a flat quantised one.")
+    parser.add_argument("persist_dir", nargs="?", default="./persisted_legal_index")
+    parser.add_argument("--dtype", choices=DTYPES, default="float16")
+    args = parser.parse_args()
+    count = convert_simple_vector_store(args.persist_dir, dtype=args.dtype)
+    print(f"✅ Wrote {count} {args.dtype} vectors to {os.path.join(args.persist_dir, FLAT_STORE_DIRNAME)}.")
@@ -0,0 +1,115 @@
+import time
+import threading
+from collections import deque
+
+
+# ------------------------------
+# Per-generation Timer
+# ------------------------------
+class GenerationTimer:
+    """Measures time-to-first-token and decode speed of one streamed generation."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.tokens = 0
+
+    def on_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+
+    def finish(self):
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+        return self
+
+    @property
+    def ttft(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def tokens_per_second(self):
+        # Decode rate only: the prefill wait before the first token is what TTFT measures.
+        if self.first_token_at is None or self.tokens < 2:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        elapsed = end - self.first_token_at
+        return (self.tokens - 1) / elapsed if elapsed > 0 else None
+
+    def as_dict(self):
+        return {
+            "ttft_s": self.ttft,
+            "total_s": self.total,
+            "tokens": self.tokens,
+            "tokens_per_s": self.tokens_per_second,
+        }
+
+
+# ------------------------------
+# Rolling Aggregate
+# ------------------------------
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+class GenerationStats:
+    """Keeps the last `window` finished generations for p50/p95 reporting."""
+
+    def __init__(self, window=500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.cancelled = 0
+        self.errors = 0
+
+    def record(self, timer: GenerationTimer):
+        with self._lock:
+            self._samples.append(timer.as_dict())
+            self.completed += 1
+
+    def record_cancelled(self):
+        # Cut-short generations would skew the latency percentiles, so they are only counted.
+        with self._lock:
+            self.cancelled += 1
+
+    def record_error(self):
+        # A failed generation's timings describe the failure, not the model; counted apart from cancellations.
+        with self._lock:
+            self.errors += 1
+
+    def summary(self):
+        with self._lock:
+            samples = list(self._samples)
+            completed = self.completed
+            cancelled = self.cancelled
+            errors = self.errors
+
+        def describe(key):
+            values = sorted(s[key] for s in samples if s[key] is not None)
+            return {
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "max": values[-1] if values else None,
+            }
+
+        return {
+            "completed": completed,
+            "cancelled": cancelled,
+            "errors": errors,
+            "window": len(samples),
+            "ttft_s": describe("ttft_s"),
+            "total_s": describe("total_s"),
+            "tokens_per_s": describe("tokens_per_s"),
+        }
@@ -0,0 +1,14 @@
+"""Opens a persisted index with whichever storage backends it was built with."""
+from llama_index.core import StorageContext
+
+from backend.flat_vector_store import FlatVectorStore, has_flat_vector_store
+from backend.sqlite_docstore import SQLiteDocumentStore, has_sqlite_docstore
+
+
+def load_storage_context(persist_dir, mmap=True, **kwargs) -> StorageContext:
+    """StorageContext for a persisted index: docstore.sqlite and flat_vector_store/ win over the JSON files."""
+    if has_sqlite_docstore(persist_dir):
+        kwargs.setdefault("docstore", SQLiteDocumentStore.from_persist_dir(persist_dir))
+    if has_flat_vector_store(persist_dir):
+        kwargs.setdefault("vector_store", FlatVectorStore.from_persist_dir(persist_dir, mmap=mmap))
+    return StorageContext.from_defaults(persist_dir=persist_dir, **kwargs)
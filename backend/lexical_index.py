@@ -0,0 +1,323 @@
+"""In-process BM25 index over the docstore, fused with vector search by reciprocal rank.
+
+Dense legal-bert retrieval is poor at exact strings such as "18 U.S.C. § 924(c)",
+docket numbers or case names; BM25 over citation-aware tokens catches those.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+
+import numpy as np
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import MetadataMode, NodeWithScore
+
+from backend.sqlite_docstore import docstore_node_ids, iter_docstore_nodes
+
+LEXICAL_INDEX_DIRNAME = "lexical_index"
+LEXICAL_INDEX_VERSION = 1
+LEXICAL_INDEX_ARRAYS = ("node_ids", "terms", "offsets", "doc_numbers", "term_freqs", "doc_lengths")
+RETRIEVAL_MODES = ("vector", "hybrid")
+
+# Section signs, numbers with separators and subsections (924(c), 3553(a)(2),
+# 21-1234), dotted abbreviations (u.s.c.) and plain words.
+TOKEN_PATTERN = re.compile(r"§|\d+(?:[-.:/]\d+)*(?:\([a-z0-9]+\))*|[a-z]+(?:\.[a-z]+)+\.?|[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their this to was were which with".split()
+)
+
+
+def tokenize(text):
+    """Lowercased, citation-aware tokens.
+
+    "18 U.S.C. § 924(c)" -> ["18", "usc", "§", "924(c)", "924"]: abbreviations
+    lose their dots and a subsection also indexes its base section number.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if "." in token and token[0].isalpha():
+            token = token.replace(".", "")
+        tokens.append(token)
+        if "(" in token:
+            tokens.append(token.split("(", 1)[0])
+    return tokens
+
+
+def node_text(node):
+    # Same text the embedding sees: chunk plus case name, court and other non-excluded metadata.
+    return node.get_content(metadata_mode=MetadataMode.EMBED)
+
+
+def node_ids_digest(node_ids):
+    digest = hashlib.sha1()
+    for node_id in sorted(node_ids):
+        digest.update(node_id.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SortedVocabulary:
+    """term -> term number by binary search over a sorted array of terms.
+
+    Loaded from disk, the array is memory-mapped, so worker processes share it
+    instead of each building a dict of every term.
+    """
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def get(self, term, default=None):
+        number = int(np.searchsorted(self.terms, term))
+        return number if number < len(self.terms) and self.terms[number] == term else default
+
+    def __contains__(self, term):
+        return self.get(term) is not None
+
+    def __getitem__(self, term):
+        number = self.get(term)
+        if number is None:
+            raise KeyError(term)
+        return number
+
+    def __len__(self):
+        return len(self.terms)
+
+
+# ------------------------------
+# BM25 Index
+# ------------------------------
+class BM25Index:
+    """BM25 over compact posting lists.
+
+    All postings live in two flat arrays (document numbers and term
+    frequencies) sliced per term by `offsets`, so the index is a handful of
+    numpy arrays rather than millions of Python objects. It is saved as .npy
+    files and memory-mapped when loaded, so processes serving the same index
+    share its pages.
+    """
+
+    def __init__(self, node_ids, vocabulary, offsets, doc_numbers, term_freqs, doc_lengths, k1=1.2, b=0.75,
+                 digest=None):
+        self.node_ids = node_ids if isinstance(node_ids, np.ndarray) else list(node_ids)
+        self.vocabulary = vocabulary  # term -> term number: a dict while building, SortedVocabulary once loaded
+        self.offsets = offsets
+        self.doc_numbers = doc_numbers
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.digest = digest or node_ids_digest(self.node_ids)
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        document_freqs = np.diff(offsets)
+        num_docs = len(self.node_ids)
+        self.idf = np.log1p((num_docs - document_freqs + 0.5) / (document_freqs + 0.5)).astype(np.float32)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @classmethod
+    def build(cls, items, **kwargs):
+        """Build from (node_id, text) pairs."""
+        node_ids = []
+        vocabulary = {}
+        postings = []  # term number -> {doc number: tf}
+        doc_lengths = []
+        for doc_number, (node_id, text) in enumerate(items):
+            node_ids.append(node_id)
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term = vocabulary.setdefault(token, len(vocabulary))
+                if term == len(postings):
+                    postings.append({})
+                postings[term][doc_number] = tf
+
+        lengths = np.array([len(p) for p in postings], dtype=np.int64)
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        doc_numbers = np.empty(offsets[-1], dtype=np.int32)
+        term_freqs = np.empty(offsets[-1], dtype=np.uint16)
+        for term, posting in enumerate(postings):
+            start = offsets[term]
+            doc_numbers[start:start + len(posting)] = list(posting.keys())
+            term_freqs[start:start + len(posting)] = np.minimum(list(posting.values()), 65535)
+        return cls(node_ids, vocabulary, offsets, doc_numbers, term_freqs,
+                   np.array(doc_lengths, dtype=np.int32), **kwargs)
+
+    @classmethod
+    def from_docstore(cls, docstore, **kwargs):
+        return cls.build(((node_id, node_text(node)) for node_id, node in iter_docstore_nodes(docstore)), **kwargs)
+
+    def search(self, query, top_k=10):
+        """(node_id, score) pairs of the best `top_k` matches, best first."""
+        terms = [self.vocabulary[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocabulary]
+        if not terms or not len(self.node_ids):
+            return []
+        scores = np.zeros(len(self.node_ids), dtype=np.float32)
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+        for term in terms:
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.doc_numbers[start:end]
+            tf = self.term_freqs[start:end].astype(np.float32)
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + length_norm[docs])
+
+        top_k = min(top_k, int(np.count_nonzero(scores)))
+        if top_k == 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(str(self.node_ids[i]), float(scores[i])) for i in best]
+
+    # ------------------------------
+    # Persistence
+    # ------------------------------
+    def save(self, persist_dir):
+        """Write lexical_index/ with terms sorted, so a loaded index can look them up without a dict."""
+        index_dir = os.path.join(persist_dir, LEXICAL_INDEX_DIRNAME)
+        if isinstance(self.vocabulary, SortedVocabulary):
+            terms, order = np.asarray(self.vocabulary.terms), np.arange(len(self.vocabulary))
+        else:
+            terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get), dtype=str)
+            order = np.argsort(terms, kind="stable")
+            terms = terms[order]
+        # Re-lay the postings out in sorted-term order.
+        lengths = np.diff(self.offsets)[order]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        starts = np.asarray(self.offsets)[order]
+        postings = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        arrays = {
+            "node_ids": np.array(self.node_ids, dtype=str),
+            "terms": terms,
+            "offsets": offsets,
+            "doc_numbers": np.asarray(self.doc_numbers)[postings],
+            "term_freqs": np.asarray(self.term_freqs)[postings],
+            "doc_lengths": np.asarray(self.doc_lengths),
+        }
+        header = {"version": LEXICAL_INDEX_VERSION, "digest": self.digest, "k1": self.k1, "b": self.b}
+
+        tmp_dir = f"{index_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, "header.json"), "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        old_dir = f"{index_dir}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(index_dir):
+            os.replace(index_dir, old_dir)
+        os.replace(tmp_dir, index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, persist_dir, mmap=True):
+        """The saved index, or None if there is none or it was written by another version."""
+        index_dir = os.path.join(persist_dir, LEXICAL_INDEX_DIRNAME)
+        header_path = os.path.join(index_dir, "header.json")
+        if not os.path.exists(header_path):
+            return None
+        with open(header_path, encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != LEXICAL_INDEX_VERSION:
+            return None
+        arrays = {name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in LEXICAL_INDEX_ARRAYS}
+        return cls(
+            arrays["node_ids"],
+            SortedVocabulary(arrays["terms"]),
+            arrays["offsets"],
+            arrays["doc_numbers"],
+            arrays["term_freqs"],
+            arrays["doc_lengths"],
+            k1=header["k1"],
+            b=header["b"],
+            digest=header["digest"],
+        )
+
+
+def load_or_build_lexical_index(persist_dir, docstore, save=False):
+    """Load the persisted BM25 index, rebuilding it if the docstore has changed.
+
+    Only index writers (Data_parsing, shared_index.publish_generation) pass
+    `save=True`. Servers build a stale index in memory: the directory they
+    read may be a published generation shared with other workers.
+    """
+    index = BM25Index.load(persist_dir)
+    if index is not None and index.digest == node_ids_digest(docstore_node_ids(docstore)):
+        return index
+    if save:
+        print("Building lexical index from the docstore...")
+    else:
+        print(f"Lexical index in {persist_dir} is missing or stale; building it in memory. "
+              f"Re-run Data_parsing.py (or publish the index again) to persist it.")
+    index = BM25Index.from_docstore(docstore)
+    if save:
+        index.save(persist_dir)
+    return index
+
+
+# ------------------------------
+# Hybrid Retriever
+# ------------------------------
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked lists of node IDs; returns (node_id, score) best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, node_id in enumerate(ranking):
+            scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Vector and BM25 candidates fused by reciprocal rank.
+
+    The vector retriever should fetch `candidates` nodes, not just the final
+    top k, so documents ranked moderately by both lists can still win.
+    """
+
+    def __init__(self, vector_retriever, lexical_index: BM25Index, docstore, similarity_top_k=3,
+                 candidates=20, rrf_k=60):
+        super().__init__()
+        self.vector_retriever = vector_retriever
+        self.lexical_index = lexical_index
+        self.docstore = docstore
+        self.similarity_top_k = similarity_top_k
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+
+    def _retrieve(self, query_bundle):
+        vector_hits = self.vector_retriever.retrieve(query_bundle)
+        lexical_hits = self.lexical_index.search(query_bundle.query_str, top_k=self.candidates)
+        nodes = {hit.node.node_id: hit.node for hit in vector_hits}
+        fused = reciprocal_rank_fusion(
+            [[hit.node.node_id for hit in vector_hits], [node_id for node_id, _ in lexical_hits]], k=self.rrf_k
+        )
+        results = []
+        for node_id, score in fused[:self.similarity_top_k]:
+            node = nodes.get(node_id) or self.docstore.get_node(node_id, raise_error=False)
+            if node is not None:
+                results.append(NodeWithScore(node=node, score=score))
+        return results
+
+
+def build_retriever(index, persist_dir, mode="vector", similarity_top_k=3, candidates=20):
+    """Retriever for `mode`: "vector" (dense only) or "hybrid" (dense + BM25, rank-fused)."""
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode {mode!r}; expected one of {', '.join(RETRIEVAL_MODES)}")
+    if mode == "vector":
+        return index.as_retriever(similarity_top_k=similarity_top_k)
+    lexical_index = load_or_build_lexical_index(persist_dir, index.docstore)
+    return HybridRetriever(
+        index.as_retriever(similarity_top_k=max(candidates, similarity_top_k)),
+        lexical_index,
+        index.docstore,
+        similarity_top_k=similarity_top_k,
+        candidates=candidates,
+    )
@@ -0,0 +1,78 @@
+import asyncio
+
+
+class SchedulerSaturated(Exception):
+    """Raised when a request cannot get an LLM slot; the API maps it to 503."""
+
+    def __init__(self, reason, retry_after=1):
+        super().__init__(f"LLM capacity exhausted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# ------------------------------
+# Admission-controlled LLM Scheduler
+# ------------------------------
+class LLMSlot:
+    """One granted unit of LLM concurrency. Releasing it more than once is a no-op."""
+
+    def __init__(self, scheduler):
+        self._scheduler = scheduler
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._scheduler._release()
+
+
+class LLMScheduler:
+    """Bounds concurrent LLM generations and the queue waiting for them.
+
+    At most `max_concurrent` generations run at once. Up to `max_queue` further
+    requests wait, each for at most `queue_timeout` seconds; anything beyond
+    that is rejected immediately so callers get a fast 503 instead of stacking
+    up behind a slow model.
+    """
+
+    def __init__(self, max_concurrent=2, max_queue=16, queue_timeout=30.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> LLMSlot:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerSaturated("queue full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise SchedulerSaturated("queue timeout")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        return LLMSlot(self)
+
+    def _release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def snapshot(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
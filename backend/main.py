@@ -1,31 +1,188 @@
 import os
-import json
-import datetime
+import hmac
 import logging
 import asyncio
-from fastapi import FastAPI, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Header, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from llama_index.core import StorageContext, load_index_from_storage, Settings
-from llama_index.llms.ollama import Ollama
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from llama_index.core import Settings
 from llama_index.core.schema import Document
-from llama_index.core.base.llms.types import ChatMessage
-from chromadb import PersistentClient
+
+from backend.answer_cache import SemanticAnswerCache, text_key
+from backend.chat_store import DEFAULT_SESSION, DEFAULT_USER, ChatStore
+from backend.context_packer import ContextPacker, PackedContext
+from backend.embedding_backend import EMBED_MODEL_NAME, load_embed_model
+from backend.fallback import search_fallback_context
+from backend.generation_stats import GenerationTimer, GenerationStats
+from backend.llm_scheduler import LLMScheduler, SchedulerSaturated
+from backend.metrics import TOKEN_BUCKETS, MetricsRegistry, RequestTrace, span
+from backend.query_embedder import BatchingQueryEmbedder
+from backend.retrieval_context import RetrievalContextManager, embed_and_retrieve
+from backend.single_flight import SingleFlight, normalise_prompt
+from backend.startup import Lazy, StartupProfile
+
+startup = StartupProfile()
+startup.mark("imports")
 
 # ------------------------------
 # Environment Setup
 # ------------------------------
 logging.getLogger("sentence_transformers.SentenceTransformer").setLevel(logging.ERROR)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
-model_name = "nlpaueb/legal-bert-base-uncased"
-Settings.embed_model = HuggingFaceEmbedding(model_name=model_name)
-Settings.llm = Ollama(model="llama3.1:latest", request_timeout=120.0)
+# HF name or local path of the query embedding model; it must be the one the index was built with.
+EMBED_MODEL = os.getenv("EMBED_MODEL", EMBED_MODEL_NAME)
+# torch (fp32), torch-int8, onnx or onnx-int8; see backend/embedding_backend.py.
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0")) or None
+# "blocking": load models and index before accepting connections. "background": accept connections
+# at once and warm up in a task; /ready answers 503 until it is done.
+WARMUP_MODE = os.getenv("WARMUP_MODE", "blocking")
+
+INDEX_PERSIST_DIR = os.getenv("INDEX_PERSIST_DIR", "./persisted_legal_index")
+# Serve the generation published under this directory instead (backend/shared_index.py); for multiple workers.
+SHARED_INDEX_ROOT = os.getenv("SHARED_INDEX_ROOT", "")
+FALLBACK_DATA_DIR = os.getenv("FALLBACK_DATA_DIR", "./Final_data")
+# Seconds between checks of the persist dir (or CURRENT) for a new index; 0 disables the watcher.
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "5" if SHARED_INDEX_ROOT else "0"))
+# Required in X-Admin-Token by /admin/reload; while unset, the endpoint is disabled.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Concurrent Ollama generations, how many requests may queue for one, and for how long.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_QUEUE_DEPTH = int(os.getenv("LLM_QUEUE_DEPTH", "16"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+# Retrieval threads mostly wait on the query-embedding batcher, so more of them means bigger batches.
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "16"))
+# Query embedding micro-batching: up to this many queries per forward pass, waiting at most this long for more.
+QUERY_EMBED_MAX_BATCH = int(os.getenv("QUERY_EMBED_MAX_BATCH", "32"))
+QUERY_EMBED_MAX_WAIT_MS = float(os.getenv("QUERY_EMBED_MAX_WAIT_MS", "2"))
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "4096"))
+# "vector" (dense only) or "hybrid" (dense + BM25 over the docstore, rank-fused).
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Semantic answer cache: reuse an answer when the same chunks are retrieved for a near-identical question.
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.97"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_MB = float(os.getenv("ANSWER_CACHE_MAX_MB", "64"))
+CHAT_DB_PATH = os.getenv("CHAT_DB_PATH", "./chat_history.db")
+# Prompt context: drop sentences that are this similar to earlier ones, then cap at this many tokens.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+# Let concurrent requests with the same question share one in-flight answer.
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "1") == "1"
+# Drop a client whose socket has not accepted a write for this many seconds.
+SSE_SEND_TIMEOUT = float(os.getenv("SSE_SEND_TIMEOUT", "30"))
+# While a request waits for retrieval or an LLM slot, check this often whether its client is still there.
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+# Send the pre-generation stage durations of each /streamresponse request in a Server-Timing header.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "0") == "1"
+
+# ------------------------------
+# Components
+# ------------------------------
+# Models are built on first use rather than at import, so importing this module stays cheap.
+def build_embed_model():
+    Settings.embed_model = load_embed_model(EMBED_MODEL, backend=EMBED_BACKEND, threads=EMBED_THREADS)
+    return Settings.embed_model
+
+def build_llm():
+    from llama_index.llms.ollama import Ollama
+    Settings.llm = Ollama(model="llama3.1:latest", request_timeout=120.0)
+    return Settings.llm
+
+embed_model = Lazy("embed_model", build_embed_model, startup)
+llm = Lazy("llm", build_llm, startup)
+
+retrieval_contexts = RetrievalContextManager(persist_dir=INDEX_PERSIST_DIR, json_dir=FALLBACK_DATA_DIR,
+                                             retrieval_mode=RETRIEVAL_MODE, embed_model=embed_model.get,
+                                             shared_root=SHARED_INDEX_ROOT or None)
+answer_cache = SemanticAnswerCache(
+    similarity_threshold=ANSWER_CACHE_THRESHOLD,
+    max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=ANSWER_CACHE_TTL,
+    max_bytes=int(ANSWER_CACHE_MAX_MB * 1024 * 1024),
+)
+# Answers generated against an older index must never be served after a reload.
+retrieval_contexts.add_listener(lambda context: answer_cache.invalidate(context.generation))
+generation_stats = GenerationStats()
+chat_store = ChatStore(CHAT_DB_PATH)
+query_embedder = BatchingQueryEmbedder(max_batch=QUERY_EMBED_MAX_BATCH, max_wait=QUERY_EMBED_MAX_WAIT_MS / 1000,
+                                       cache_size=QUERY_EMBED_CACHE_SIZE)
+context_packer = ContextPacker(token_budget=CONTEXT_TOKEN_BUDGET, duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD)
+flights = SingleFlight()
+llm_scheduler = LLMScheduler(max_concurrent=LLM_MAX_CONCURRENCY, max_queue=LLM_QUEUE_DEPTH, queue_timeout=LLM_QUEUE_TIMEOUT)
+# Query embedding and vector search are synchronous CPU work; keep them off the event loop.
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+logger = logging.getLogger("argulex.generation")
+index_logger = logging.getLogger("argulex.index")
+
+# ------------------------------
+# Metrics
+# ------------------------------
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram("argulex_stage_seconds", "Time spent in each request stage, and in index loads.",
+                                  labelnames=("stage",))
+requests_total = metrics.counter("argulex_requests_total",
+                                 "/streamresponse answers by outcome; `coalesced` requests shared another's answer.",
+                                 labelnames=("outcome",))
+ttft_seconds = metrics.histogram("argulex_time_to_first_token_seconds", "Time from LLM request to its first token.")
+prompt_tokens = metrics.histogram("argulex_prompt_tokens", "Prompt tokens per generation (LLM-reported, else words).",
+                                  buckets=TOKEN_BUCKETS)
+response_tokens = metrics.histogram("argulex_response_tokens", "Response tokens per generation.", buckets=TOKEN_BUCKETS)
+client_disconnects = metrics.counter("argulex_client_disconnects_total",
+                                     "/streamresponse clients gone before their stream ended.", labelnames=("reason",))
+context_tokens_saved = metrics.counter("argulex_context_tokens_saved_total",
+                                       "Prompt context tokens removed by deduplication and the token budget.")
+metrics.gauge("argulex_llm_active", "Generations holding an LLM slot.", lambda: llm_scheduler.active)
+metrics.gauge("argulex_llm_waiting", "Requests queued for an LLM slot.", lambda: llm_scheduler.waiting)
+metrics.gauge("argulex_flights_in_progress", "Distinct answers being produced (coalesced requests share one).",
+              lambda: flights.snapshot()["in_flight"])
+metrics.gauge("argulex_index_generation", "Generation number of the live index snapshot.",
+              lambda: retrieval_contexts.current.generation if retrieval_contexts.is_loaded else 0)
+retrieval_contexts.add_listener(lambda context: stage_seconds.observe(context.load_seconds, stage="index_load"))
 
 # ------------------------------
 # FastAPI Setup
 # ------------------------------
-app = FastAPI(title="Legal Argument Generator API")
+async def warm_up():
+    """Load the models, the index and fallback metadata, then run one query so no request pays first-call costs."""
+    try:
+        await asyncio.to_thread(embed_model.get)
+        with startup.phase("index"):
+            context = await retrieval_contexts.reload()
+        await asyncio.to_thread(llm.get)
+        with startup.phase("warmup_query"):
+            await asyncio.get_running_loop().run_in_executor(
+                retrieval_executor, embed_and_retrieve, context.retriever, "warm-up query", embed_model.get())
+    except Exception as e:
+        startup.error = f"{type(e).__name__}: {e}"
+        raise
+    startup.mark_ready()
+    logger.info(startup.describe())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the index and fallback metadata once per process; every request shares it.
+    warming = None
+    if WARMUP_MODE == "background":
+        warming = asyncio.create_task(warm_up())
+    else:
+        await warm_up()
+    watcher = None
+    if INDEX_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(retrieval_contexts.watch(INDEX_WATCH_INTERVAL))
+    try:
+        yield
+    finally:
+        for task in (warming, watcher):
+            if task:
+                task.cancel()
+        retrieval_executor.shutdown(wait=False)
+
+app = FastAPI(title="Legal Argument Generator API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,8 +199,8 @@ class ArgumentGenerator:
     def __init__(self, model):
         self.model = model
 
-    def generate_argument(self, question, context):
-        prompt = f"""
+    def build_prompt(self, question, context):
+        return f"""
 You are a legal defense lawyer assistant. Using only the content from the retrieved legal context below, provide a well-reasoned legal argument that addresses the question.
 If the context partially addresses the question, use what is available and avoid speculation beyond it.
 
@@ -57,90 +214,257 @@ Legal Question:
 
 Answer:
 """
-        response = self.model.complete(prompt)
+
+    def generate_argument(self, question, context):
+        response = self.model.complete(self.build_prompt(question, context))
         return response.text.strip()
 
-# ------------------------------
-# ChromaDB Utility Functions
-# ------------------------------
-def load_chat_history(chroma_client):
-    try:
-        chat_collection = chroma_client.get_or_create_collection("chat_history")
-        result = chat_collection.get()
-        return [ChatMessage(role=meta.get("role", "unknown"), content=doc)
-                for doc, meta in zip(result["documents"], result["metadatas"])]
-    except Exception as e:
-        print(f"Error loading chat history: {e}")
-        return []
-
-def save_chat_message(chroma_client, message_id, role, content):
-    chat_collection = chroma_client.get_or_create_collection("chat_history")
-    chat_collection.add(
-        ids=[str(message_id)],
-        documents=[content],
-        metadatas=[{"role": role, "timestamp": datetime.datetime.now().isoformat()}]
-    )
-
-# ------------------------------
-# Metadata Fallback Loader
-# ------------------------------
-def load_fallback_metadata(json_dir="./Final_data"):
-    fallback_contexts = {}
-    for folder in os.listdir(json_dir):
-        json_path = os.path.join(json_dir, folder, "data.json")
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                    snippet = data.get("opinions", [{}])[0].get("snippet", "")
-                    case_name = data.get("caseName", folder).lower()
-                    judge = data.get("judge", "Unknown")
-                    court = data.get("court", "Unknown")
-                    fallback_contexts[case_name] = f"{snippet}\n\nJudge: {judge}\nCourt: {court}"
-                except Exception as e:
-                    print(f"Error loading {json_path}: {e}")
-    return fallback_contexts
-
-def search_fallback_context(query, fallback_contexts):
-    query_lower = query.lower()
-    for case_name, context in fallback_contexts.items():
-        if case_name in query_lower:
-            return context
-    return None
+    async def astream_prompt(self, prompt):
+        """Yield the LLM's completion chunks for an already built prompt."""
+        stream = await self.model.astream_complete(prompt)
+        async for chunk in stream:
+            yield chunk
+
+    async def astream_argument(self, question, context):
+        """Yield the argument token by token as the LLM produces it."""
+        async for chunk in self.astream_prompt(self.build_prompt(question, context)):
+            if chunk.delta:
+                yield chunk.delta
 
 # ------------------------------
 # Streaming Response Endpoint
 # ------------------------------
-@app.get("/streamresponse")
-async def streamresponse(prompt: str):
-    # Load index and fallback contexts
-    storage_context = StorageContext.from_defaults(persist_dir="./persisted_legal_index")
-    index = load_index_from_storage(storage_context)
-    fallback_contexts = load_fallback_metadata()
-
-    # Retrieve relevant context
-    query_engine = index.as_query_engine(similarity_top_k=3, include_text=True)
-    response = query_engine.query(prompt)
-
-    retrieved_context = ""
-    if response.source_nodes:
-        for node in response.source_nodes:
-            retrieved_context += node.node.text.strip() + "\n\n"
+# EventSource dispatches a named "error" event to the client's onerror handler.
+SSE_GENERATION_ERROR = "event: error\ndata: Generation failed; please try again.\n\n"
+
+async def sse_words(token_stream, timer=None):
+    """Re-frame raw LLM deltas as one SSE event per completed word.
+
+    The chat UI joins events with a space, so forwarding sub-word tokens would
+    split words apart; flushing at whitespace keeps the text intact while still
+    sending each word the moment it is complete.
+    """
+    buffer = ""
+    async for delta in token_stream:
+        if timer:
+            timer.on_token()
+        if not delta:
+            continue
+        buffer += delta
+        if buffer[-1].isspace():
+            words, buffer = buffer.split(), ""
+        else:
+            *words, buffer = buffer.split()
+        for word in words:
+            yield f"data: {word}\n\n"
+    for word in buffer.split():
+        yield f"data: {word}\n\n"
+
+class FlightStreamingResponse(StreamingResponse):
+    """Streams a flight to one client and detaches from it however the response ends.
+
+    Detaching in __call__ rather than in the body generator also covers a
+    client that leaves before the first chunk, when the generator never runs.
+    The last client to detach cancels the generation, which frees its LLM slot.
+    Each write waits for the socket to drain (uvicorn's flow control), and a
+    client that stops reading for `send_timeout` seconds is dropped.
+    """
+
+    def __init__(self, flight, send_timeout, **kwargs):
+        super().__init__(flight.subscribe(), **kwargs)
+        self.flight = flight
+        self.send_timeout = send_timeout
+
+    async def __call__(self, scope, receive, send):
+        completed = timed_out = False
+
+        async def bounded_send(message):
+            nonlocal completed, timed_out
+            try:
+                await asyncio.wait_for(send(message), self.send_timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                raise
+            completed = message["type"] == "http.response.body" and not message.get("more_body", False)
+
+        try:
+            await super().__call__(scope, receive, bounded_send)
+        except Exception:
+            # Starlette may wrap the timeout in an ExceptionGroup; a stalled client is not a server error.
+            if not timed_out:
+                raise
+        finally:
+            if not completed:
+                client_disconnects.inc(reason="send_timeout" if timed_out else "disconnect")
+            self.flight.detach()
+
+def retrieve_context(context, prompt, trace=None):
+    """Return (query embedding, chunk IDs, PackedContext) for the prompt."""
+    embedding, nodes = embed_and_retrieve(context.retriever, prompt, embed_model=query_embedder, trace=trace)
+    if nodes:
+        with span(trace, "context_pack"):
+            packed = context_packer.pack(nodes)
+        context_tokens_saved.inc(packed.saved_tokens)
+        return embedding, packed.chunk_ids, packed
+    with span(trace, "fallback"):
+        fallback = search_fallback_context(prompt, context.fallback_index)
+    text = fallback if fallback else "No relevant discussion found."
+    return embedding, [text_key(text)], PackedContext.unpacked(text)
+
+async def replay_answer(answer):
+    yield answer
+
+def timing_headers(trace):
+    # Only stages finished before the response starts; generation time is in the log line and /metrics.
+    return {"Server-Timing": trace.server_timing()} if SERVER_TIMING_ENABLED else None
+
+async def answer_flight(flight, prompt, context):
+    """Retrieve, then replay a cached answer or generate one, publishing SSE events to the flight."""
+    trace = flight.trace = RequestTrace(stage_seconds)
+
+    # Retrieve relevant context on the worker pool
+    loop = asyncio.get_running_loop()
+    embedding, chunk_ids, packed_context = await loop.run_in_executor(
+        retrieval_executor, retrieve_context, context, prompt, trace)
+
+    # A near-identical question over the same chunks was already answered: replay it
+    with trace.span("cache_lookup"):
+        cached = answer_cache.lookup(embedding, chunk_ids) if ANSWER_CACHE_ENABLED else None
+    if cached is not None:
+        requests_total.inc(outcome="cached")
+        flight.start_streaming()
+        async for event in sse_words(replay_answer(cached)):
+            flight.publish(event)
+        return
+
+    # Admission control before generation, so a saturated server answers 503 straight away
+    try:
+        with trace.span("llm_queue"):
+            slot = await llm_scheduler.acquire()
+    except SchedulerSaturated as e:
+        requests_total.inc(outcome="rejected")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    # Stream the legal argument as the model generates it
+    arg_gen = ArgumentGenerator(llm.get())
+    with trace.span("prompt_build"):
+        llm_prompt = arg_gen.build_prompt(prompt, packed_context.text)
+
+    timer = GenerationTimer()
+    parts = []
+    usage = {}
+    outcome = "cancelled"
+
+    async def tokens():
+        async for chunk in arg_gen.astream_prompt(llm_prompt):
+            # Ollama reports token counts on its last chunk.
+            if isinstance(chunk.raw, dict) and chunk.raw.get("usage"):
+                usage.update(chunk.raw["usage"])
+            if chunk.delta:
+                parts.append(chunk.delta)
+                yield chunk.delta
+
+    try:
+        flight.start_streaming()
+        async for event in sse_words(tokens(), timer):
+            flight.publish(event)
+    except Exception:
+        outcome = "error"
+        logger.exception("Error during generation (%d attached requests)", flight.requests)
+        # Without it every client would see a normal-looking end of a truncated answer.
+        flight.publish(SSE_GENERATION_ERROR)
     else:
-        fallback = search_fallback_context(prompt, fallback_contexts)
-        retrieved_context = fallback if fallback else "No relevant discussion found."
+        outcome = "generated"
+        if ANSWER_CACHE_ENABLED:
+            answer_cache.store(embedding, chunk_ids, "".join(parts).strip(), generation=context.generation)
+    finally:
+        # Also reached when the last client disconnects and the flight is cancelled mid-stream.
+        slot.release()
+        timer.finish()
+        if outcome == "cancelled":
+            generation_stats.record_cancelled()
+        elif outcome == "error":
+            generation_stats.record_error()
+        else:
+            generation_stats.record(timer)
+        trace.record("generation", timer.total)
+        if timer.ttft is not None:
+            ttft_seconds.observe(timer.ttft)
+        prompt_tokens.observe(usage.get("prompt_tokens") or len(llm_prompt.split()))
+        response_tokens.observe(usage.get("completion_tokens") or timer.tokens)
+        requests_total.inc(outcome=outcome)
+        logger.info("generation ttft=%s total=%.3fs tokens=%d tokens_per_s=%s outcome=%s requests=%d %s %s",
+                    f"{timer.ttft:.3f}s" if timer.ttft is not None else "n/a", timer.total, timer.tokens,
+                    f"{timer.tokens_per_second:.1f}" if timer.tokens_per_second else "n/a", outcome,
+                    flight.requests, packed_context.describe(), trace.describe())
+
+async def wait_for_flight(flight, request):
+    """Wait until the flight streams (raising its error if it failed); False if the client left first.
+
+    asyncio.wait never cancels `flight.ready`, which the coalesced requests share.
+    """
+    while not flight.ready.done():
+        await asyncio.wait([flight.ready], timeout=DISCONNECT_POLL_INTERVAL)
+        if not flight.ready.done() and await request.is_disconnected():
+            return False
+    flight.ready.result()
+    return True
 
-    # Generate legal argument
-    arg_gen = ArgumentGenerator(Settings.llm)
-    legal_argument = arg_gen.generate_argument(prompt, retrieved_context)
+@app.get("/streamresponse")
+async def streamresponse(request: Request, prompt: str):
+    if not startup.is_ready:
+        raise HTTPException(status_code=503, detail="Server is warming up.", headers={"Retry-After": "5"})
+
+    # Pin the current index snapshot for the whole request
+    context = retrieval_contexts.current
 
-    # Stream response line-by-line
-    async def event_generator():
-        for line in legal_argument.splitlines():
-            yield f"data: {line}\n\n"
-            await asyncio.sleep(0.05)  # For real-time streaming effect
+    # Identical questions in flight over the same index share one retrieval and one generation
+    key = (normalise_prompt(prompt), context.generation) if COALESCE_ENABLED else object()
+    flight, is_leader = flights.join(key, lambda flight: answer_flight(flight, prompt, context))
+    if not is_leader:
+        requests_total.inc(outcome="coalesced")
+
+    # A client that leaves while queued gives up its share of the flight; the last one out cancels it,
+    # which frees its place in the LLM queue before any generation starts.
+    try:
+        ready = await wait_for_flight(flight, request)
+    except BaseException:
+        flight.detach()
+        raise
+    if not ready:
+        flight.detach()
+        client_disconnects.inc(reason="before_stream")
+        return Response(status_code=499)
+    return FlightStreamingResponse(flight, SSE_SEND_TIMEOUT, media_type="text/event-stream",
+                                   headers=timing_headers(flight.trace))
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@app.get("/stats/generation")
+async def generation_summary():
+    return {
+        **generation_stats.summary(),
+        "scheduler": llm_scheduler.snapshot(),
+        "answer_cache": answer_cache.stats(),
+        "coalescing": flights.snapshot(),
+        "query_embedding": query_embedder.stats(),
+    }
+
+@app.get("/ready")
+async def ready():
+    """200 once the models and index are loaded and warm, else 503; the body has the startup timeline."""
+    context = retrieval_contexts.current if retrieval_contexts.is_loaded else None
+    status = {
+        **startup.report(),
+        "pid": os.getpid(),
+        "embed_model_loaded": embed_model.loaded,
+        "llm_loaded": llm.loaded,
+        "index_generation": context.generation if context else None,
+        "index_dir": context.persist_dir if context else None,
+    }
+    return JSONResponse(status, status_code=200 if startup.is_ready else 503)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # ------------------------------
 # Root Endpoint
@@ -150,24 +474,47 @@ async def root():
     return {"message": "Welcome to the Legal Argument Generator API"}
 
 # ------------------------------
-# Chat Message Updater (Optional)
+# Index Hot Reload
+# ------------------------------
+@app.post("/admin/reload")
+async def reload_index(x_admin_token: Optional[str] = Header(default=None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    try:
+        context = await retrieval_contexts.reload()
+    except Exception:
+        index_logger.exception("Index reload failed")
+        raise HTTPException(status_code=500, detail="Index reload failed; see the server log.")
+    return {
+        "message": "Index reloaded.",
+        "generation": context.generation,
+        "load_seconds": round(context.load_seconds, 3),
+        "fallback_cases": len(context.fallback_index),
+    }
+
+# ------------------------------
+# Chat History
 # ------------------------------
 @app.post('/update')
-def update(new_messages: list):
-    chroma_client = PersistentClient(path="./chroma_db_legal")
-    chat_collection = chroma_client.get_or_create_collection("chat_history")
-    existing = chat_collection.get()
-    next_id = len(existing.get("ids", [])) + 1
-    for msg in new_messages:
-        role = msg.get("role", "user")
-        content = msg.get("content", "")
-        save_chat_message(chroma_client, next_id, role, content)
-        next_id += 1
-    return {"message": "Chat history updated."}
+def update(new_messages: list[dict] = Body(...), userId: str = DEFAULT_USER, sessionId: str = DEFAULT_SESSION):
+    messages = [(msg.get("role", "user"), msg.get("content", "")) for msg in new_messages]
+    seqs = chat_store.append_many(userId, sessionId, messages)
+    return {"message": "Chat history updated.", "seqs": seqs}
+
+@app.get('/history')
+def history(userId: str = DEFAULT_USER, sessionId: str = DEFAULT_SESSION, limit: int = 50, before: Optional[int] = None):
+    """Last `limit` messages of a session, oldest first; pass `before` from the response for the previous page."""
+    messages = chat_store.recent(userId, sessionId, limit=min(max(limit, 1), 500), before=before)
+    return {
+        "messages": [message.as_dict() for message in messages],
+        "before": messages[0].seq if messages and messages[0].seq > 1 else None,
+    }
 
 # ------------------------------
 # Start the server (CLI only)
 # ------------------------------
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
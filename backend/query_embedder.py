@@ -0,0 +1,112 @@
+"""Query embedding for the serving path: an exact-query LRU in front of a micro-batcher.
+
+Concurrent requests each used to run their own batch-size-1 BERT forward
+pass. Here callers (retrieval worker threads) queue their query and block;
+one batcher thread takes whatever has queued up, waiting at most
+`max_wait` seconds for more, embeds up to `max_batch` queries in one forward
+pass and hands each caller its vector. While a batch is running, new
+queries pile up for the next one, so batches grow with load on their own.
+"""
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from llama_index.core import Settings
+
+
+def batch_query_embedder(embed_model):
+    """Function embedding a list of queries in one call, the same way get_query_embedding would."""
+    if hasattr(embed_model, "_embed"):
+        # HuggingFaceEmbedding: get_query_embedding(q) is _embed([q], prompt_name="query")[0].
+        return lambda queries: embed_model._embed(queries, prompt_name="query")
+    return lambda queries: [embed_model.get_query_embedding(query) for query in queries]
+
+
+class BatchingQueryEmbedder:
+    """Drop-in for `embed_model.get_query_embedding`, safe to call from many threads.
+
+    `embed_model` defaults to whatever Settings.embed_model is when a batch runs.
+    """
+
+    def __init__(self, embed_model=None, max_batch=32, max_wait=0.002, cache_size=4096):
+        self.embed_model = embed_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self.counts = {"queries": 0, "cache_hits": 0, "batches": 0, "embedded": 0}
+
+    def get_query_embedding(self, query):
+        with self._lock:
+            self.counts["queries"] += 1
+            embedding = self._cache.get(query)
+            if embedding is not None:
+                self._cache.move_to_end(query)
+                self.counts["cache_hits"] += 1
+                return embedding
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((query, future))
+        return future.result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            queries = list(dict.fromkeys(query for query, _ in batch))  # same question twice: embed once
+            try:
+                vectors = dict(zip(queries, batch_query_embedder(self.embed_model or Settings.embed_model)(queries)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._lock:
+                self.counts["batches"] += 1
+                self.counts["embedded"] += len(queries)
+                for query, vector in vectors.items():
+                    self._cache[query] = vector
+                    self._cache.move_to_end(query)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for query, future in batch:
+                future.set_result(vectors[query])
+
+    def clear(self):
+        """Forget cached vectors, e.g. after the embedding model changes."""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            entries = len(self._cache)
+        return {
+            **counts,
+            "cache_entries": entries,
+            "cache_hit_rate": counts["cache_hits"] / counts["queries"] if counts["queries"] else None,
+            "mean_batch_size": counts["embedded"] / counts["batches"] if counts["batches"] else None,
+        }
@@ -0,0 +1,180 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from llama_index.core import load_index_from_storage, Settings
+from llama_index.core.schema import QueryBundle
+
+from backend.fallback import CaseNameIndex, load_fallback_metadata
+from backend.lexical_index import build_retriever
+from backend.index_storage import load_storage_context
+from backend.metrics import span
+from backend.shared_index import current_generation
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------
+# Retrieval Context Snapshot
+# ------------------------------
+@dataclass(frozen=True)
+class RetrievalContext:
+    """Everything a request needs for retrieval, loaded once and never mutated.
+
+    Requests grab the current snapshot when they start and keep using it until
+    they finish, so a reload never changes the index underneath a request.
+    """
+    index: object
+    retriever: object
+    fallback_index: CaseNameIndex
+    generation: int
+    loaded_at: float
+    load_seconds: float
+    persist_dir: str = ""
+
+
+def index_fingerprint(persist_dir):
+    """Cheap change detector for the persisted index: (name, size, mtime) of each file.
+
+    Only top-level files count; the lexical index directory is derived from the docstore.
+    """
+    if not os.path.isdir(persist_dir):
+        return None
+    entries = []
+    for name in sorted(os.listdir(persist_dir)):
+        path = os.path.join(persist_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+def embed_and_retrieve(retriever, query, embed_model=None, trace=None):
+    """Embed the query once and retrieve with that vector, returning both.
+
+    Callers such as the answer cache need the query embedding too; passing it
+    in through the QueryBundle stops the retriever from embedding the query again.
+    With a RequestTrace, the two steps are timed as the `embed` and `search` stages.
+    """
+    embed_model = embed_model or Settings.embed_model
+    with span(trace, "embed"):
+        embedding = embed_model.get_query_embedding(query)
+    with span(trace, "search"):
+        nodes = retriever.retrieve(QueryBundle(query_str=query, embedding=embedding))
+    return embedding, nodes
+
+
+# ------------------------------
+# Process-wide Context Manager
+# ------------------------------
+class RetrievalContextManager:
+    """Holds the live RetrievalContext and swaps in new ones atomically.
+
+    A reload builds a complete new snapshot in a worker thread and only then
+    replaces the reference, so in-flight requests are never blocked and never
+    observe a half-loaded index. If the load fails the previous snapshot stays live.
+
+    With `shared_root`, the index is the published generation that
+    <shared_root>/CURRENT names (see backend/shared_index.py), and watch()
+    switches when CURRENT moves on.
+    """
+
+    def __init__(self, persist_dir="./persisted_legal_index", json_dir="./Final_data", similarity_top_k=3,
+                 retrieval_mode="vector", embed_model=None, shared_root=None):
+        self.persist_dir = persist_dir
+        self.shared_root = shared_root
+        # Callable returning the index's embedding model, for a model that is loaded lazily; default Settings'.
+        self.embed_model = embed_model
+        self.json_dir = json_dir
+        self.similarity_top_k = similarity_top_k
+        self.retrieval_mode = retrieval_mode
+        self._current = None
+        self._generation = 0
+        self._fingerprint = None
+        self._reload_lock = asyncio.Lock()
+        self._listeners = []
+
+    @property
+    def current(self) -> RetrievalContext:
+        if self._current is None:
+            raise RuntimeError("Retrieval context has not been loaded yet.")
+        return self._current
+
+    def add_listener(self, callback):
+        """Call `callback(context)` every time a new snapshot goes live."""
+        self._listeners.append(callback)
+
+    @property
+    def is_loaded(self):
+        return self._current is not None
+
+    def _source(self):
+        """(directory to load, fingerprint of what is in it) for the index as it is on disk now."""
+        if self.shared_root:
+            current = current_generation(self.shared_root)
+            return (current[1], current[0]) if current else (None, None)
+        return self.persist_dir, index_fingerprint(self.persist_dir)
+
+    def _build(self):
+        start = time.perf_counter()
+        persist_dir, fingerprint = self._source()
+        if persist_dir is None:
+            raise FileNotFoundError(f"No index generation has been published under {self.shared_root}.")
+        storage_context = load_storage_context(persist_dir)
+        kwargs = {"embed_model": self.embed_model()} if self.embed_model else {}
+        index = load_index_from_storage(storage_context, **kwargs)
+        retriever = build_retriever(index, persist_dir, mode=self.retrieval_mode,
+                                    similarity_top_k=self.similarity_top_k)
+
+        if os.path.isdir(self.json_dir):
+            fallback_contexts = load_fallback_metadata(self.json_dir)
+        else:
+            print(f"Fallback metadata directory {self.json_dir} not found; fallback search disabled.")
+            fallback_contexts = {}
+
+        context = RetrievalContext(
+            index=index,
+            retriever=retriever,
+            fallback_index=CaseNameIndex(fallback_contexts),
+            generation=self._generation + 1,
+            loaded_at=time.time(),
+            load_seconds=time.perf_counter() - start,
+            persist_dir=persist_dir,
+        )
+        return context, fingerprint
+
+    def _publish(self, context, fingerprint):
+        self._generation = context.generation
+        self._fingerprint = fingerprint
+        self._current = context
+        logger.info("Retrieval context generation %d loaded from %s in %.2fs", context.generation,
+                    context.persist_dir, context.load_seconds)
+        for callback in self._listeners:
+            callback(context)
+        return context
+
+    def load(self):
+        """Synchronous load, for startup and for the CLI."""
+        return self._publish(*self._build())
+
+    async def reload(self):
+        """Build a new snapshot off the event loop and swap it in."""
+        async with self._reload_lock:
+            context, fingerprint = await asyncio.to_thread(self._build)
+            return self._publish(context, fingerprint)
+
+    async def watch(self, interval):
+        """Poll the persist dir (or CURRENT) and hot-swap the index when it changes."""
+        while True:
+            await asyncio.sleep(interval)
+            _, fingerprint = self._source()
+            if fingerprint is None or fingerprint == self._fingerprint:
+                continue
+            try:
+                await self.reload()
+            except Exception as e:
+                # Usually a re-ingest still writing files; keep serving the old
+                # snapshot and try again on the next tick.
+                print(f"Index reload failed, keeping generation {self._generation}: {e}")
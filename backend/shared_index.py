@@ -0,0 +1,127 @@
+"""Generation-numbered, read-only index builds shared by every API worker on a host.
+
+Publishing copies a finished persisted index into <root>/gen-NNNNNN/ in the
+formats that load as memory maps (flat_vector_store/, docstore.sqlite and
+lexical_index/), then points <root>/CURRENT at it with an atomic rename.
+Workers started with SHARED_INDEX_ROOT load the generation CURRENT names and,
+polling it, hot-swap to the next one. However many workers map a
+generation's files, their pages are in the OS page cache once.
+
+A published generation is never written again. Pruning keeps the newest
+`keep` generations, so workers still on the previous one have a poll
+interval's grace to move on.
+
+    <root>/CURRENT                      gen-000007
+    <root>/gen-000007/manifest.json     generation number, source, node count
+
+    python -m backend.shared_index publish ./persisted_legal_index --root ./shared_index
+    python -m backend.shared_index status --root ./shared_index
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+
+from backend.flat_vector_store import SIMPLE_VECTOR_STORE_FNAME, convert_simple_vector_store, has_flat_vector_store
+from backend.index_storage import load_storage_context
+from backend.lexical_index import load_or_build_lexical_index
+from backend.sqlite_docstore import convert_json_docstore, has_sqlite_docstore
+
+DEFAULT_SHARED_ROOT = "./shared_index"
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+MANIFEST_FILE = "manifest.json"
+
+
+def generation_name(number):
+    return f"{GENERATION_PREFIX}{number:06d}"
+
+
+def list_generations(root):
+    """Numbers of the complete generations under `root`, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    numbers = []
+    for name in os.listdir(root):
+        suffix = name[len(GENERATION_PREFIX):]
+        if name.startswith(GENERATION_PREFIX) and suffix.isdigit() and \
+                os.path.exists(os.path.join(root, name, MANIFEST_FILE)):
+            numbers.append(int(suffix))
+    return sorted(numbers)
+
+
+def current_generation(root):
+    """(number, directory) of the generation CURRENT points at, or None before the first publish."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return int(name[len(GENERATION_PREFIX):]), os.path.join(root, name)
+
+
+def publish_generation(persist_dir, root=DEFAULT_SHARED_ROOT, keep=2):
+    """Copy the index in `persist_dir` into the next generation, make it current and prune; returns its number."""
+    os.makedirs(root, exist_ok=True)
+    generations = list_generations(root)
+    number = (generations[-1] if generations else 0) + 1
+    generation_dir = os.path.join(root, generation_name(number))
+    build_dir = f"{generation_dir}.building"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    shutil.copytree(persist_dir, build_dir,
+                    ignore=shutil.ignore_patterns("*.tmp", "*.old", "*-journal", "ingest_manifest.json"))
+
+    # Only formats that load as memory maps or read on demand; the JSON ones are parsed into every worker.
+    if not has_sqlite_docstore(build_dir):
+        convert_json_docstore(build_dir, remove_json=True)
+    if not has_flat_vector_store(build_dir):
+        convert_simple_vector_store(build_dir)
+        os.remove(os.path.join(build_dir, SIMPLE_VECTOR_STORE_FNAME))
+    docstore = load_storage_context(build_dir).docstore
+    load_or_build_lexical_index(build_dir, docstore, save=True)
+
+    manifest = {
+        "generation": number,
+        "source": os.path.abspath(persist_dir),
+        "published_at": time.time(),
+        "nodes": docstore.count_nodes(),
+    }
+    with open(os.path.join(build_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(build_dir, generation_dir)
+
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(generation_name(number))
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+    prune_generations(root, keep=keep)
+    return number
+
+
+def prune_generations(root, keep=2):
+    """Delete all but the newest `keep` generations (never the current one); returns the numbers removed."""
+    current = current_generation(root)
+    removed = []
+    for number in list_generations(root)[:-max(keep, 1)]:
+        if current is not None and number == current[0]:
+            continue
+        shutil.rmtree(os.path.join(root, generation_name(number)), ignore_errors=True)
+        removed.append(number)
+    return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish or inspect shared, generation-numbered index builds.")
+    parser.add_argument("command", choices=["publish", "status"])
+    parser.add_argument("persist_dir", nargs="?", default="./persisted_legal_index")
+    parser.add_argument("--root", default=os.getenv("SHARED_INDEX_ROOT") or DEFAULT_SHARED_ROOT)
+    parser.add_argument("--keep", type=int, default=2, help="Generations to keep, the current one included.")
+    args = parser.parse_args()
+    if args.command == "publish":
+        number = publish_generation(args.persist_dir, args.root, keep=args.keep)
+        print(f"✅ Published {args.persist_dir} as generation {number} under {args.root}.")
+    current = current_generation(args.root)
+    print(f"Generations under {args.root}: {list_generations(args.root)}; "
+          f"current: {current[0] if current else 'none'}")
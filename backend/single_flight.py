@@ -0,0 +1,118 @@
+"""Single-flight request coalescing: identical concurrent questions share one answer stream.
+
+The first request for a key starts the work as its own asyncio task (the
+flight); later requests for the same key attach to it. Every subscriber
+replays the events published so far and then follows live ones, so it
+receives the complete stream whenever it joined. The flight belongs to no
+request, which means a disconnecting leader does not end it for the others;
+it is cancelled only when the last attached request detaches before it is done.
+
+Subscribers hold just a cursor into the flight's shared event list, so a
+slow client costs no memory of its own and never holds up the others.
+"""
+import asyncio
+
+
+def normalise_prompt(prompt):
+    return " ".join(prompt.casefold().split())
+
+
+class Flight:
+    def __init__(self, key):
+        self.key = key
+        # Resolved once the flight starts streaming, or failed with the error every request should raise.
+        self.ready = asyncio.get_running_loop().create_future()
+        self.events = []
+        self.finished = False
+        self.requests = 1
+        self.attached = 1  # requests still waiting for or reading the stream
+        self.cancelled = False
+        self.trace = None  # set by the flight's body; shared by every response
+        self.task = None
+        self._wakeup = asyncio.Event()
+
+    def start_streaming(self):
+        if not self.ready.done():
+            self.ready.set_result(None)
+
+    def publish(self, event):
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error=None):
+        if not self.ready.done():
+            if error is not None:
+                self.ready.set_exception(error)
+            else:
+                self.ready.set_result(None)
+        self.finished = True
+        self._notify()
+
+    def _notify(self):
+        # Wake every waiting subscriber; later waiters block on a fresh event.
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def detach(self):
+        """A request stopped listening; cancel the work if it was the last one. Returns True if it did."""
+        self.attached -= 1
+        if self.attached > 0 or self.finished or self.task is None:
+            return False
+        self.cancelled = True
+        self.task.cancel()
+        return True
+
+    async def subscribe(self, max_batch=64):
+        """Every event from the start of the flight, then live ones until it finishes.
+
+        A subscriber that has fallen behind gets up to `max_batch` events per
+        write, so it catches up in fewer, larger sends.
+        """
+        index = 0
+        while True:
+            if index < len(self.events):
+                batch = self.events[index:index + max_batch]
+                index += len(batch)
+                yield "".join(batch)
+                continue
+            if self.finished:
+                return
+            await self._wakeup.wait()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def join(self, key, run):
+        """Return (flight, is_leader); for a new key, `run(flight)` is started as the flight's task."""
+        flight = self._flights.get(key)
+        if flight is not None and not flight.finished and not flight.cancelled:
+            flight.requests += 1
+            flight.attached += 1
+            self.coalesced += 1
+            return flight, False
+        flight = Flight(key)
+        self._flights[key] = flight
+        self.started += 1
+        flight.task = asyncio.create_task(self._run(flight, run))
+        return flight, True
+
+    async def _run(self, flight, run):
+        error = None
+        try:
+            await run(flight)
+        except Exception as e:
+            error = e
+        finally:
+            flight.finish(error)
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            # Nobody may be waiting on `ready` any more; mark a failure as handled.
+            if flight.ready.done() and not flight.ready.cancelled():
+                flight.ready.exception()
+
+    def snapshot(self):
+        return {"in_flight": len(self._flights), "started": self.started, "coalesced": self.coalesced}
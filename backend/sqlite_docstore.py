@@ -0,0 +1,212 @@
+"""SQLite-backed docstore: node bodies are read on demand instead of parsing docstore.json.
+
+SimpleDocumentStore loads the whole docstore.json into memory when the index
+is loaded, although a query only ever needs its top-k nodes. SQLiteDocumentStore
+keeps the same LlamaIndex KV layout in one SQLite file (docstore.sqlite) and
+fetches rows by primary key.
+
+    python -m backend.sqlite_docstore ./persisted_legal_index   # convert docstore.json
+"""
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+from llama_index.core.storage.docstore.keyval_docstore import KVDocumentStore
+from llama_index.core.storage.docstore.utils import json_to_doc
+from llama_index.core.storage.kvstore.simple_kvstore import SimpleKVStore
+from llama_index.core.storage.kvstore.types import DEFAULT_BATCH_SIZE, DEFAULT_COLLECTION, BaseKVStore
+
+DOCSTORE_SQLITE_FNAME = "docstore.sqlite"
+DOCSTORE_JSON_FNAME = "docstore.json"
+# SQLite's default limit on host parameters per statement is 999 on older builds.
+MAX_PARAMS = 900
+
+
+# ------------------------------
+# Key-value Store
+# ------------------------------
+class SQLiteKVStore(BaseKVStore):
+    """LlamaIndex KV store on one SQLite table keyed by (collection, key)."""
+
+    def __init__(self, path):
+        self.path = path
+        # One connection, opened here and shared by every thread behind a lock
+        # (retrieval runs on a thread pool). The open file handle ties the store
+        # to the file it was built on: when an ingest run swaps a new index into
+        # the same directory, or a published generation is pruned, this store
+        # keeps reading the snapshot its vector store belongs to. Rollback
+        # journal, not WAL, so readers never create side files in the index dir.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._write(
+            "CREATE TABLE IF NOT EXISTS kv (collection TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (collection, key)) WITHOUT ROWID"
+        )
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, params=(), many=False):
+        """Run one statement in its own transaction; returns the number of rows changed."""
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(sql, params) if many else self._conn.execute(sql, params)
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def put(self, key: str, val: dict, collection: str = DEFAULT_COLLECTION) -> None:
+        self.put_all([(key, val)], collection=collection)
+
+    async def aput(self, key: str, val: dict, collection: str = DEFAULT_COLLECTION) -> None:
+        self.put(key, val, collection)
+
+    def put_all(self, kv_pairs, collection: str = DEFAULT_COLLECTION, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        # One transaction for the whole batch, whatever `batch_size` LlamaIndex asks for.
+        self._write(
+            "INSERT OR REPLACE INTO kv (collection, key, value) VALUES (?, ?, ?)",
+            [(collection, key, json.dumps(val)) for key, val in kv_pairs],
+            many=True,
+        )
+
+    async def aput_all(self, kv_pairs, collection: str = DEFAULT_COLLECTION,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.put_all(kv_pairs, collection=collection, batch_size=batch_size)
+
+    def get(self, key: str, collection: str = DEFAULT_COLLECTION) -> Optional[dict]:
+        rows = self._read("SELECT value FROM kv WHERE collection = ? AND key = ?", (collection, key))
+        return json.loads(rows[0][0]) if rows else None
+
+    async def aget(self, key: str, collection: str = DEFAULT_COLLECTION) -> Optional[dict]:
+        return self.get(key, collection)
+
+    def get_many(self, keys: List[str], collection: str = DEFAULT_COLLECTION) -> Dict[str, dict]:
+        found = {}
+        for offset in range(0, len(keys), MAX_PARAMS):
+            batch = keys[offset:offset + MAX_PARAMS]
+            rows = self._read(
+                f"SELECT key, value FROM kv WHERE collection = ? AND key IN ({','.join('?' * len(batch))})",
+                (collection, *batch),
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def get_all(self, collection: str = DEFAULT_COLLECTION) -> Dict[str, dict]:
+        rows = self._read("SELECT key, value FROM kv WHERE collection = ?", (collection,))
+        return {key: json.loads(value) for key, value in rows}
+
+    async def aget_all(self, collection: str = DEFAULT_COLLECTION) -> Dict[str, dict]:
+        return self.get_all(collection)
+
+    def keys(self, collection: str = DEFAULT_COLLECTION) -> List[str]:
+        rows = self._read("SELECT key FROM kv WHERE collection = ?", (collection,))
+        return [key for (key,) in rows]
+
+    def count(self, collection: str = DEFAULT_COLLECTION) -> int:
+        return self._read("SELECT COUNT(*) FROM kv WHERE collection = ?", (collection,))[0][0]
+
+    def delete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        return self._write("DELETE FROM kv WHERE collection = ? AND key = ?", (collection, key)) > 0
+
+    async def adelete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        return self.delete(key, collection)
+
+
+# ------------------------------
+# Document Store
+# ------------------------------
+class SQLiteDocumentStore(KVDocumentStore):
+    """KVDocumentStore over SQLiteKVStore: every write is already on disk, reads are by ID."""
+
+    def __init__(self, path, namespace: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(SQLiteKVStore(path), namespace=namespace, batch_size=batch_size)
+        self.path = path
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir, namespace: Optional[str] = None):
+        return cls(os.path.join(persist_dir, DOCSTORE_SQLITE_FNAME), namespace=namespace)
+
+    def persist(self, persist_path=None, fs=None) -> None:
+        # StorageContext.persist passes the docstore.json path; the data is already in SQLite.
+        pass
+
+    def node_ids(self) -> List[str]:
+        return self._kvstore.keys(collection=self._node_collection)
+
+    def count_nodes(self) -> int:
+        # Not __len__: StorageContext.from_defaults tests `docstore or SimpleDocumentStore()`,
+        # and an empty store must not be swapped for an in-memory one.
+        return self._kvstore.count(collection=self._node_collection)
+
+    def get_nodes(self, node_ids: List[str], raise_error: bool = True):
+        """Fetch the nodes in one query instead of one per node."""
+        found = self._kvstore.get_many(list(node_ids), collection=self._node_collection)
+        nodes = []
+        for node_id in node_ids:
+            if node_id in found:
+                nodes.append(json_to_doc(found[node_id]))
+            elif raise_error:
+                raise ValueError(f"doc_id {node_id} not found.")
+            else:
+                nodes.append(None)
+        return nodes
+
+
+def has_sqlite_docstore(persist_dir):
+    return os.path.exists(os.path.join(persist_dir, DOCSTORE_SQLITE_FNAME))
+
+
+def iter_docstore_nodes(docstore, batch_size=1000):
+    """(node_id, node) pairs, streamed in batches from SQLite rather than all deserialised at once."""
+    if not isinstance(docstore, SQLiteDocumentStore):
+        yield from docstore.docs.items()
+        return
+    node_ids = docstore.node_ids()
+    for offset in range(0, len(node_ids), batch_size):
+        batch = node_ids[offset:offset + batch_size]
+        yield from zip(batch, docstore.get_nodes(batch))
+
+
+def docstore_node_ids(docstore):
+    """IDs of every node, without deserialising the nodes when the store allows it."""
+    if isinstance(docstore, SQLiteDocumentStore):
+        return docstore.node_ids()
+    return list(docstore.docs.keys())
+
+
+# ------------------------------
+# Converter
+# ------------------------------
+def convert_json_docstore(persist_dir, remove_json=False):
+    """Copy docstore.json into docstore.sqlite (built aside, then renamed into place)."""
+    json_path = os.path.join(persist_dir, DOCSTORE_JSON_FNAME)
+    sqlite_path = os.path.join(persist_dir, DOCSTORE_SQLITE_FNAME)
+    tmp_path = f"{sqlite_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    collections = SimpleKVStore.from_persist_path(json_path).to_dict()
+    kvstore = SQLiteKVStore(tmp_path)
+    rows = 0
+    for collection, entries in collections.items():
+        kvstore.put_all(list(entries.items()), collection=collection)
+        rows += len(entries)
+    kvstore.close()
+    os.replace(tmp_path, sqlite_path)
+    if remove_json:
+        os.remove(json_path)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a persisted index's docstore.json to docstore.sqlite.")
+    parser.add_argument("persist_dir", nargs="?", default="./persisted_legal_index")
+    parser.add_argument("--remove-json", action="store_true", help="Delete docstore.json after converting.")
+    args = parser.parse_args()
+    rows = convert_json_docstore(args.persist_dir, remove_json=args.remove_json)
+    print(f"✅ Wrote {rows} rows to {os.path.join(args.persist_dir, DOCSTORE_SQLITE_FNAME)}.")
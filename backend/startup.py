@@ -0,0 +1,98 @@
+"""Cold-start bookkeeping: components built on first use, and a timeline of where startup time went.
+
+Offsets are measured from process start (not from this module's import), so
+the first phase, `imports`, covers interpreter start-up and module imports.
+Run benchmarks/bench_startup.py for a per-package breakdown of the imports.
+"""
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+import psutil
+
+
+class StartupProfile:
+    def __init__(self):
+        self.process_started = psutil.Process().create_time()
+        self.phases = []  # (name, offset from process start, seconds)
+        self.ready_at = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.time() - self.process_started
+
+    @contextmanager
+    def phase(self, name):
+        start = self.now()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, start, self.now() - start))
+
+    def mark(self, name):
+        """Record a phase that started at process start (or where the last mark ended) and ends now."""
+        with self._lock:
+            marks = [start + seconds for _, start, seconds in self.phases]
+            start = max(marks) if marks else 0.0
+            self.phases.append((name, start, self.now() - start))
+
+    def mark_ready(self):
+        self.ready_at = self.now()
+
+    @property
+    def is_ready(self):
+        return self.ready_at is not None
+
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "ready": self.is_ready,
+            "ready_after_s": round(self.ready_at, 3) if self.ready_at is not None else None,
+            "error": self.error,
+            "phases": [{"phase": name, "started_s": round(start, 3), "seconds": round(seconds, 3)}
+                       for name, start, seconds in phases],
+        }
+
+    def describe(self):
+        with self._lock:
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, _, seconds in self.phases)
+        status = f"ready {self.ready_at:.2f}s after process start" if self.is_ready else "not ready"
+        return f"startup: {phases}; {status}"
+
+
+class Lazy:
+    """A component built by `factory()` on first use, exactly once even when several threads ask together.
+
+    A failed build is not remembered; the next `get()` tries again.
+    """
+
+    def __init__(self, name, factory, profile=None):
+        self.name = name
+        self.factory = factory
+        self.profile = profile
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                with self.profile.phase(self.name) if self.profile else nullcontext():
+                    self._value = self.factory()
+                self._loaded = True
+        return self._value
+
+    def set(self, value):
+        """Use `value` instead of building the component, e.g. a stand-in LLM in benchmarks."""
+        with self._lock:
+            self._value = value
+            self._loaded = True
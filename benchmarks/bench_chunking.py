@@ -0,0 +1,120 @@
+"""Sentences/second of the semantic chunking step, before and after batching.
+
+Compares Data_parsing.sentence_grouping (one encode call per section, mean
+recomputed per sentence) with SemanticChunker (one batched encode, running
+centroid) on the same sections, and checks both produce identical chunks.
+tests/test_semantic_chunker.py runs the same parity check under pytest.
+
+    python -m benchmarks.bench_chunking --docs 200
+    python -m benchmarks.bench_chunking --dataset-path ./Final_data
+    python -m benchmarks.bench_chunking --model hash   # no model download; grouping loop only
+"""
+import time
+import random
+import hashlib
+import argparse
+
+import numpy as np
+
+import Data_parsing
+from semantic_chunker import SemanticChunker
+
+VOCABULARY = (
+    "court held defendant appeal evidence hearsay sentencing reliability testimony district circuit "
+    "statute section motion suppress warrant search seizure plaintiff judgment reversed affirmed remanded "
+    "jury instruction error harmless plain review de novo abuse discretion counsel ineffective assistance"
+).split()
+
+
+class HashingEncoder:
+    """Deterministic stand-in for a SentenceTransformer (no download, negligible cost)."""
+
+    def __init__(self, dim=768, seed=0):
+        rng = np.random.default_rng(seed)
+        self.topics = rng.standard_normal((64, dim)).astype(np.float32)
+        self.noise = 0.4 * rng.standard_normal((1024, dim)).astype(np.float32)
+
+    @staticmethod
+    def _bucket(key, size):
+        return int.from_bytes(hashlib.sha1(key.encode()).digest()[:4], "little") % size
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        # A "topic" from the first word plus per-sentence noise, so sentences
+        # sharing a first word are similar enough to be grouped together.
+        topics = [self._bucket((s.split() or [""])[0], len(self.topics)) for s in sentences]
+        noise = [self._bucket(s, len(self.noise)) for s in sentences]
+        return self.topics[topics] + self.noise[noise]
+
+
+def synthetic_sections(num_docs, seed=0):
+    """Case-shaped text: labelled sections made of runs of sentences on one topic."""
+    rng = random.Random(seed)
+    sections = []
+    for _ in range(num_docs):
+        parts = []
+        for label in ("Case:", "Facts:", "Ruling:"):
+            sentences = []
+            for _ in range(rng.randint(2, 6)):
+                topic = rng.choice(VOCABULARY).capitalize()
+                sentences.extend(f"{topic} " + " ".join(rng.choices(VOCABULARY, k=rng.randint(8, 30))) + "."
+                                 for _ in range(rng.randint(2, 10)))
+            parts.append(f"{label} " + " ".join(sentences))
+        sections.extend(Data_parsing.document_sections(" ".join(parts)))
+    return sections
+
+
+def dataset_sections(dataset_path, limit):
+    case_folders = sorted(Data_parsing.list_case_folders(dataset_path))[:limit]
+    extraction = Data_parsing.ExtractionReport()
+    return [section
+            for _, docs in Data_parsing.iter_case_documents(dataset_path, case_folders, extraction,
+                                                             cache_dir="./pdf_text_cache")
+            for doc in docs
+            for section in Data_parsing.document_sections(doc.get_content())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-mpnet-base-v2", help="SentenceTransformer name, or 'hash'.")
+    parser.add_argument("--dataset-path", default=None, help="Chunk real case folders instead of synthetic text.")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    Data_parsing.ensure_punkt()
+
+    if args.model == "hash":
+        model = HashingEncoder()
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+
+    if args.dataset_path:
+        sections = dataset_sections(args.dataset_path, args.docs)
+    else:
+        sections = synthetic_sections(args.docs)
+    num_sentences = sum(len(Data_parsing.sent_tokenize(section)) for section in sections)
+    print(f"{len(sections)} sections, {num_sentences} sentences, model={args.model}")
+
+    start = time.perf_counter()
+    baseline = [Data_parsing.sentence_grouping(section, model) for section in sections]
+    baseline_seconds = time.perf_counter() - start
+
+    chunker = SemanticChunker(model, batch_size=args.batch_size)
+    start = time.perf_counter()
+    batched = chunker.chunk_sections(sections)
+    batched_seconds = time.perf_counter() - start
+
+    # Parity: the batched engine must reproduce today's chunk boundaries exactly.
+    mismatches = [i for i, (a, b) in enumerate(zip(baseline, batched)) if a != b]
+    print(f"sentence_grouping : {baseline_seconds:8.2f}s  {num_sentences / baseline_seconds:10.1f} sentences/s")
+    print(f"SemanticChunker   : {batched_seconds:8.2f}s  {num_sentences / batched_seconds:10.1f} sentences/s")
+    print(f"speed-up          : {baseline_seconds / batched_seconds:8.2f}x")
+    if mismatches or len(baseline) != len(batched):
+        raise SystemExit(f"❌ Chunk boundaries differ in {len(mismatches)} of {len(sections)} sections "
+                         f"(first: {mismatches[:5]})")
+    print(f"✅ Identical chunks for all {len(sections)} sections "
+          f"({sum(len(c) for c in batched)} chunks).")
+
+
+if __name__ == "__main__":
+    main()
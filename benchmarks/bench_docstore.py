@@ -0,0 +1,116 @@
+"""Docstore open time, resident memory and node-fetch latency: docstore.json vs docstore.sqlite.
+
+Copies a persisted index (or generates a synthetic one), converts the copy's
+docstore to SQLite and opens each variant in a fresh subprocess, so RSS and
+load time are measured from a cold interpreter. Only the docstore is loaded:
+the JSON vector store dominates full index load time and is measured separately.
+
+    python -m benchmarks.bench_docstore --persist-dir ./persisted_legal_index
+    python -m benchmarks.bench_docstore --synthetic 50000
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from backend.sqlite_docstore import DOCSTORE_JSON_FNAME, convert_json_docstore
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def measure(persist_dir, fetches):
+    """Runs in the child process: open the docstore, then fetch random nodes by ID."""
+    from llama_index.core.storage.docstore import SimpleDocumentStore
+    from backend.sqlite_docstore import SQLiteDocumentStore, docstore_node_ids, has_sqlite_docstore
+    baseline_rss = rss_mb()
+
+    start = time.perf_counter()
+    if has_sqlite_docstore(persist_dir):
+        docstore = SQLiteDocumentStore.from_persist_dir(persist_dir)
+    else:
+        docstore = SimpleDocumentStore.from_persist_dir(persist_dir)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    node_ids = docstore_node_ids(docstore)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(fetches):
+        docstore.get_nodes(rng.sample(node_ids, min(3, len(node_ids))))
+    fetch_ms = (time.perf_counter() - start) / fetches * 1e3
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "rss_mb": loaded_rss,
+        "rss_after_imports_mb": baseline_rss,
+        "fetch_top3_ms": fetch_ms,
+        "nodes": len(node_ids),
+    }))
+
+
+def synthetic_index(persist_dir, count):
+    from llama_index.core import Settings, VectorStoreIndex
+    from llama_index.core.embeddings import MockEmbedding
+    from llama_index.core.schema import TextNode
+
+    Settings.embed_model = MockEmbedding(embed_dim=768)
+    rng = random.Random(0)
+    words = "court held defendant appeal evidence hearsay sentencing reliability testimony district".split()
+    nodes = [TextNode(id_=f"chunk-{i}", text=" ".join(rng.choices(words, k=120)),
+                      metadata={"case_folder": f"case{i // 20}", "chunk_index": i % 20},
+                      embedding=[rng.random() for _ in range(768)]) for i in range(count)]
+    VectorStoreIndex(nodes).storage_context.persist(persist_dir=persist_dir)
+
+
+def run_child(persist_dir, fetches):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_docstore", "--child", persist_dir, "--fetches", str(fetches)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default="./persisted_legal_index")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate an index of N synthetic chunks instead.")
+    parser.add_argument("--fetches", type=int, default=1000)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args.child, args.fetches)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        json_dir = os.path.join(workdir, "json")
+        sqlite_dir = os.path.join(workdir, "sqlite")
+        if args.synthetic:
+            synthetic_index(json_dir, args.synthetic)
+        else:
+            shutil.copytree(args.persist_dir, json_dir)
+        shutil.copytree(json_dir, sqlite_dir)
+        start = time.perf_counter()
+        convert_json_docstore(sqlite_dir, remove_json=True)
+        print(f"Converted docstore.json ({os.path.getsize(os.path.join(json_dir, DOCSTORE_JSON_FNAME)) / 2**20:.1f} MB) "
+              f"in {time.perf_counter() - start:.2f}s")
+
+        for name, persist_dir in (("json", json_dir), ("sqlite", sqlite_dir)):
+            result = run_child(persist_dir, args.fetches)
+            print(f"{name:6s} load {result['load_seconds']:7.2f}s   RSS {result['rss_mb']:8.1f} MB "
+                  f"(+{result['rss_mb'] - result['rss_after_imports_mb']:.1f} MB over the interpreter)   "
+                  f"top-3 fetch {result['fetch_top3_ms']:.3f} ms   {result['nodes']} nodes")
+
+
+if __name__ == "__main__":
+    main()
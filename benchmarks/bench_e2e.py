@@ -0,0 +1,221 @@
+"""End-to-end /streamresponse latency and throughput, with DummyLLM in place of Ollama.
+
+Runs the real FastAPI app under uvicorn in a background thread, swaps
+`Settings.llm` for a DummyLLM with a fixed first-token latency and token
+rate, and drives N concurrent SSE clients. Reports p50/p95/p99 of retrieval
+time (measured in the server), time to first token and total request time,
+plus requests/second, and writes everything to a JSON file.
+
+    python -m benchmarks.bench_e2e --persist-dir ./persisted_legal_index --clients 8 --requests 10
+    python -m benchmarks.bench_e2e --clients 16 --tokens-per-second 100 --baseline bench_e2e.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import datetime
+import threading
+
+import numpy as np
+
+PROMPTS = [
+    "Is hearsay admissible at a sentencing hearing?",
+    "What standard governs a motion to suppress evidence from a warrantless search?",
+    "When is a conviction under 18 U.S.C. § 924(c) reversed on appeal?",
+    "How do courts assess ineffective assistance of counsel claims?",
+    "What makes a jury instruction error harmless?",
+    "Can a defendant challenge the reliability of testimony used to enhance a sentence?",
+    "What is plain error review?",
+    "When does a district court abuse its discretion in denying a continuance?",
+]
+METRICS = ("retrieval_ms", "ttft_ms", "total_ms")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)), "mean": float(values.mean()), "count": int(len(values))}
+
+
+# ------------------------------
+# Server
+# ------------------------------
+def start_server(args):
+    """Import the app with the benchmark's settings, swap in DummyLLM, serve it from a thread."""
+    os.environ["INDEX_PERSIST_DIR"] = args.persist_dir
+    os.environ["RETRIEVAL_MODE"] = args.retrieval_mode
+    os.environ["ANSWER_CACHE_ENABLED"] = "1" if args.answer_cache else "0"
+    os.environ["COALESCE_ENABLED"] = "0" if args.no_coalesce else "1"
+    if args.llm_concurrency:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+        os.environ["LLM_QUEUE_DEPTH"] = str(max(args.clients, int(os.getenv("LLM_QUEUE_DEPTH", "16"))))
+
+    import uvicorn
+    import backend.main as server_app
+    from backend.dummy_llm import DummyLLM
+
+    server_app.llm.set(DummyLLM(tokens_per_second=args.tokens_per_second,
+                                first_token_latency=args.first_token_latency, max_tokens=args.max_tokens))
+
+    # Time retrieval where it happens; the client only sees it folded into TTFT.
+    retrieval_ms = []
+    retrieve_context = server_app.retrieve_context
+
+    def timed_retrieve_context(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return retrieve_context(*args, **kwargs)
+        finally:
+            retrieval_ms.append((time.perf_counter() - start) * 1e3)
+
+    server_app.retrieve_context = timed_retrieve_context
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(server_app.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            sys.exit("❌ Server failed to start.")
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}", retrieval_ms
+
+
+# ------------------------------
+# Clients
+# ------------------------------
+async def one_request(client, url, prompt):
+    start = time.perf_counter()
+    ttft = None
+    events = 0
+    async with client.stream("GET", f"{url}/streamresponse", params={"prompt": prompt}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return {"status": response.status_code}
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                events += 1
+    return {"status": 200, "ttft_ms": ttft * 1e3 if ttft is not None else None,
+            "total_ms": (time.perf_counter() - start) * 1e3, "events": events}
+
+
+async def drive(url, prompts, clients, requests_per_client):
+    """Closed loop: every client sends its requests back to back."""
+    import httpx
+
+    results = []
+
+    async def client_loop(client_number, client):
+        for i in range(requests_per_client):
+            prompt = prompts[(client_number * requests_per_client + i) % len(prompts)]
+            try:
+                results.append(await one_request(client, url, prompt))
+            except Exception as e:
+                results.append({"status": type(e).__name__})
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        await one_request(client, url, prompts[0])  # warm-up: first embed, lazy retriever state
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(n, client) for n in range(clients)))
+        wall_seconds = time.perf_counter() - start
+    return results, wall_seconds
+
+
+def summarise(results, wall_seconds, retrieval_ms):
+    ok = [r for r in results if r["status"] == 200]
+    errors = {}
+    for r in results:
+        if r["status"] != 200:
+            errors[str(r["status"])] = errors.get(str(r["status"]), 0) + 1
+    return {
+        "requests": len(results),
+        "completed": len(ok),
+        "errors": errors,
+        "wall_seconds": wall_seconds,
+        "requests_per_second": len(ok) / wall_seconds if wall_seconds else 0.0,
+        "events_per_second": sum(r["events"] for r in ok) / wall_seconds if wall_seconds else 0.0,
+        "retrieval_ms": percentiles(retrieval_ms),
+        "ttft_ms": percentiles([r["ttft_ms"] for r in ok if r["ttft_ms"] is not None]),
+        "total_ms": percentiles([r["total_ms"] for r in ok]),
+    }
+
+
+def print_summary(summary, baseline=None):
+    print(f"{summary['completed']}/{summary['requests']} requests in {summary['wall_seconds']:.2f}s   "
+          f"{summary['requests_per_second']:.2f} req/s   {summary['events_per_second']:.0f} words/s")
+    if summary["errors"]:
+        print(f"❌ Errors: {summary['errors']}")
+    for metric in METRICS:
+        stats = summary[metric]
+        if not stats:
+            continue
+        line = f"{metric:13s} p50 {stats['p50']:9.2f}   p95 {stats['p95']:9.2f}   p99 {stats['p99']:9.2f}"
+        previous = (baseline or {}).get(metric)
+        if previous:
+            line += f"   (p95 {stats['p95'] - previous['p95']:+.2f} vs baseline)"
+        print(line)
+    if baseline:
+        print(f"requests/s    {summary['requests_per_second'] - baseline['requests_per_second']:+.2f} vs baseline")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default="./persisted_legal_index")
+    parser.add_argument("--retrieval-mode", default=os.getenv("RETRIEVAL_MODE", "hybrid"))
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client.")
+    parser.add_argument("--prompts-file", default=None, help="One prompt per line (default: built-in legal questions).")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="Seconds before DummyLLM's first token.")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--llm-concurrency", type=int, default=0,
+                        help="Override LLM_MAX_CONCURRENCY (default: the server's setting).")
+    parser.add_argument("--answer-cache", action="store_true", help="Leave the semantic answer cache on.")
+    parser.add_argument("--no-coalesce", action="store_true",
+                        help="Give every request its own generation even when clients ask the same question.")
+    parser.add_argument("--output", default="bench_e2e.json")
+    parser.add_argument("--baseline", default=None, help="Earlier --output file to compare against.")
+    args = parser.parse_args()
+
+    prompts = PROMPTS
+    if args.prompts_file:
+        with open(args.prompts_file, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    server, thread, url, retrieval_ms = start_server(args)
+    try:
+        results, wall_seconds = asyncio.run(drive(url, prompts, args.clients, args.requests))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    del retrieval_ms[:1]  # the warm-up request
+
+    summary = summarise(results, wall_seconds, retrieval_ms)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+    print_summary(summary, baseline)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.datetime.now().isoformat(), "config": config, "summary": summary}, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Embedding backends against stock fp32 PyTorch: cosine parity, query latency and ingest throughput.
+
+Each backend embeds the same queries (one at a time, as a request does) and
+passages (in batches, as ingestion does); every vector is compared with the
+fp32 `torch` backend's. Exits non-zero if any backend's worst cosine
+similarity falls below --min-cosine.
+
+    python -m benchmarks.bench_embedding_backend
+    python -m benchmarks.bench_embedding_backend --backends torch onnx-int8 --threads 4
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from backend.embedding_backend import DEFAULT_ONNX_DIR, EMBED_BACKENDS, EMBED_MODEL_NAME, load_embed_model
+from benchmarks.bench_query_embedding import make_queries
+
+
+def make_passages(count, seed=0):
+    # Chunk-sized texts: about 250 words, near the semantic chunker's typical output.
+    return [" ".join(make_queries(12, seed=seed * 1000 + i)) for i in range(count)]
+
+
+def run_backend(name, args, queries, passages):
+    start = time.perf_counter()
+    model = load_embed_model(args.model, backend=name, threads=args.threads, onnx_dir=args.onnx_dir,
+                             embed_batch_size=args.batch_size)
+    load_seconds = time.perf_counter() - start
+    model.get_query_embedding("warm-up")
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.get_query_embedding(query))
+        latencies.append((time.perf_counter() - start) * 1e3)
+
+    start = time.perf_counter()
+    passage_vectors = model.get_text_embedding_batch(passages)
+    ingest_seconds = time.perf_counter() - start
+
+    return {
+        "load_s": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "texts_per_s": len(passages) / ingest_seconds,
+        "vectors": np.asarray(query_vectors + passage_vectors, dtype=np.float32),
+    }
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBED_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", choices=EMBED_BACKENDS, default=list(EMBED_BACKENDS))
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads (default: all cores).")
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--passages", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=32, help="Passages per forward pass.")
+    parser.add_argument("--onnx-dir", default=DEFAULT_ONNX_DIR)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries, seed=1)
+    passages = make_passages(args.passages)
+    backends = ["torch"] + [name for name in args.backends if name != "torch"]
+    results = {name: run_backend(name, args, queries, passages) for name in backends}
+
+    reference = results["torch"]["vectors"]
+    failed = False
+    print(f"{'backend':11s} {'load':>7s} {'query p50':>10s} {'p95':>9s} {'ingest':>12s} "
+          f"{'cos min':>8s} {'cos mean':>9s}")
+    for name, result in results.items():
+        similarity = cosine(result["vectors"], reference)
+        failed |= bool(similarity.min() < args.min_cosine)
+        print(f"{name:11s} {result['load_s']:6.1f}s {result['p50_ms']:8.1f}ms "
+              f"{result['p95_ms']:7.1f}ms {result['texts_per_s']:8.1f} t/s {similarity.min():8.4f} "
+              f"{similarity.mean():9.4f}")
+
+    if failed:
+        print(f"❌ A backend fell below cosine {args.min_cosine} against fp32.")
+        sys.exit(1)
+    print(f"✅ All backends within cosine {args.min_cosine} of fp32.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Lookup latency of the fallback case-name search: linear scan vs CaseNameIndex.
+
+The linear scan is the original search_fallback_context (substring test of
+every case name, first match in dict order). The index must find exactly
+the set of names the scan would match, and returns them longest first.
+
+    python -m benchmarks.bench_fallback --cases 50000
+    python -m benchmarks.bench_fallback --dataset-path ./Final_data
+"""
+import time
+import random
+import argparse
+
+from backend.fallback import CaseNameIndex, load_fallback_metadata
+
+SURNAMES = (
+    "smith johnson williams brown jones garcia miller davis rodriguez martinez hernandez lopez gonzalez "
+    "wilson anderson thomas taylor moore jackson martin lee perez thompson white harris sanchez clark "
+    "ramirez lewis robinson walker young allen king wright scott torres nguyen hill flores green adams"
+).split()
+PARTIES = ["united states", "people", "state", "commonwealth", "city of chicago", "county of cook"]
+QUESTION = "what did the court hold about hearsay and sentencing reliability in {name}?"
+
+
+def linear_scan(query, fallback_contexts):
+    query_lower = query.lower()
+    for case_name, context in fallback_contexts.items():
+        if case_name in query_lower:
+            return context
+    return None
+
+
+def linear_matches(query, fallback_contexts):
+    query_lower = query.lower()
+    return {case_name for case_name in fallback_contexts if case_name in query_lower}
+
+
+def synthetic_contexts(num_cases, seed=0):
+    rng = random.Random(seed)
+    contexts = {}
+    while len(contexts) < num_cases:
+        first = rng.choice(PARTIES + SURNAMES)
+        name = f"{first} v. {rng.choice(SURNAMES)}"
+        if rng.random() < 0.7:
+            name += f" {rng.randint(1, 99999)}"
+        contexts[name] = f"Snippet for {name}\n\nJudge: Unknown\nCourt: Unknown"
+    return contexts
+
+
+def queries_for(contexts, num_queries, seed=0):
+    rng = random.Random(seed)
+    names = list(contexts)
+    queries = []
+    for i in range(num_queries):
+        if i % 2:
+            queries.append(QUESTION.format(name=rng.choice(names)))
+        else:
+            queries.append(QUESTION.format(name="a case that is not in the corpus"))
+    return queries
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset-path", default=None, help="Use real case names instead of synthetic ones.")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    contexts = load_fallback_metadata(args.dataset_path) if args.dataset_path else synthetic_contexts(args.cases)
+    queries = queries_for(contexts, args.queries)
+
+    start = time.perf_counter()
+    index = CaseNameIndex(contexts)
+    build_seconds = time.perf_counter() - start
+    print(f"{len(contexts)} case names, {len(queries)} queries; index built in {build_seconds:.2f}s "
+          f"({len(index.postings)} posting lists)")
+
+    scan_seconds = timed(lambda q: linear_scan(q, contexts), queries)
+    index_seconds = timed(index.matches, queries)
+    print(f"linear scan    : {scan_seconds * 1e3:8.3f} ms/query")
+    print(f"CaseNameIndex  : {index_seconds * 1e3:8.3f} ms/query")
+    print(f"speed-up       : {scan_seconds / index_seconds:8.1f}x")
+
+    mismatches = [q for q in queries if {name for name, _ in index.matches(q)} != linear_matches(q, contexts)]
+    if mismatches:
+        raise SystemExit(f"❌ Match sets differ for {len(mismatches)} queries (first: {mismatches[0]!r})")
+    print(f"✅ Same matches as the linear scan for all {len(queries)} queries.")
+
+
+if __name__ == "__main__":
+    main()
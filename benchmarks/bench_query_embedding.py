@@ -0,0 +1,129 @@
+"""Query-embedding throughput at 1/8/32 concurrent clients: one forward pass per query vs the micro-batcher.
+
+Every client is a thread embedding distinct queries back to back, as the
+retrieval workers do. The LRU is measured separately with repeated queries.
+
+    python -m benchmarks.bench_query_embedding
+    python -m benchmarks.bench_query_embedding --model random-bert   # offline: BERT-base shape, random weights
+"""
+import time
+import random
+import argparse
+import threading
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+from backend.query_embedder import BatchingQueryEmbedder
+
+WORDS = (
+    "court held defendant appeal evidence hearsay sentencing reliability testimony district circuit statute motion "
+    "suppress warrant search seizure plaintiff judgment reversed affirmed remanded jury instruction error harmless"
+).split()
+
+
+class RandomBertEmbedding(BaseEmbedding):
+    """legal-bert's architecture (BERT-base) with random weights and hashed word IDs; same compute, no download."""
+
+    _model: Any = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(model_name="random-bert", **kwargs)
+        import torch
+        from transformers import BertConfig, BertModel
+        torch.manual_seed(0)
+        self._model = BertModel(BertConfig()).eval()
+
+    def _embed(self, texts: List[str], prompt_name=None) -> List[List[float]]:
+        import torch
+        ids = [[101] + [1000 + hash(word) % 29000 for word in text.lower().split()][:126] + [102] for text in texts]
+        width = max(len(row) for row in ids)
+        input_ids = torch.tensor([row + [0] * (width - len(row)) for row in ids])
+        mask = (input_ids != 0).long()
+        with torch.no_grad():
+            hidden = self._model(input_ids=input_ids, attention_mask=mask).last_hidden_state
+        pooled = (hidden * mask.unsqueeze(-1)).sum(1) / mask.sum(1, keepdim=True)
+        return pooled.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+
+def make_queries(count, seed=0):
+    rng = random.Random(seed)
+    return [f"question {i}: " + " ".join(rng.choices(WORDS, k=rng.randint(8, 24))) for i in range(count)]
+
+
+def run_clients(embed, queries, clients):
+    """Split `queries` over `clients` threads; returns (wall seconds, per-query latencies)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(share):
+        local = []
+        for query in share:
+            start = time.perf_counter()
+            embed(query)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(queries[i::clients],)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.array(latencies) * 1e3
+
+
+def report(name, clients, wall, latencies, extra=""):
+    print(f"{name:10s} {clients:3d} clients   {len(latencies) / wall:8.1f} queries/s   "
+          f"p50 {np.percentile(latencies, 50):8.2f} ms   p95 {np.percentile(latencies, 95):8.2f} ms{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="nlpaueb/legal-bert-base-uncased", help="HF model name, or 'random-bert'.")
+    parser.add_argument("--queries", type=int, default=256, help="Distinct queries per run.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.model == "random-bert":
+        model = RandomBertEmbedding()
+    else:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        model = HuggingFaceEmbedding(model_name=args.model)
+    model.get_query_embedding("warm-up")
+
+    for run, clients in enumerate(args.clients):
+        queries = make_queries(args.queries, seed=run)
+        wall, latencies = run_clients(model.get_query_embedding, queries, clients)
+        report("unbatched", clients, wall, latencies)
+
+        # A fresh batcher and unseen queries per run, so the LRU never answers.
+        batcher = BatchingQueryEmbedder(model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        wall, latencies = run_clients(batcher.get_query_embedding, make_queries(args.queries, seed=100 + run), clients)
+        report("batched", clients, wall, latencies, f"   mean batch {batcher.stats()['mean_batch_size']:.1f}")
+
+    # Exact repeats are answered by the LRU without a forward pass.
+    batcher = BatchingQueryEmbedder(model)
+    queries = make_queries(32, seed=999)
+    run_clients(batcher.get_query_embedding, queries, 1)
+    wall, latencies = run_clients(batcher.get_query_embedding, queries * 8, max(args.clients))
+    report("lru hits", max(args.clients), wall, latencies,
+           f"   hit rate {batcher.stats()['cache_hit_rate']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
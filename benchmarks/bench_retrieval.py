@@ -0,0 +1,110 @@
+"""Latency and recall@k of vector, BM25 and hybrid (rank-fused) retrieval.
+
+Each query is taken from a known chunk: either a citation found in it
+(statute section, docket number) or a random span of its words. A query
+counts as recalled when its source chunk is in the top k.
+
+    python -m benchmarks.bench_retrieval --persist-dir ./persisted_legal_index
+    python -m benchmarks.bench_retrieval --synthetic 5000 --model mock   # offline; vector recall is meaningless
+"""
+import time
+import random
+import argparse
+
+from llama_index.core import Settings, StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import QueryBundle, TextNode
+
+from backend.lexical_index import BM25Index, HybridRetriever, TOKEN_PATTERN
+
+WORDS = (
+    "court held defendant appeal evidence hearsay sentencing reliability testimony district circuit "
+    "statute motion suppress warrant search seizure plaintiff judgment reversed affirmed remanded "
+    "jury instruction error harmless plain review abuse discretion counsel ineffective assistance"
+).split()
+
+
+def synthetic_nodes(count, seed=0):
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(40, 120))
+        words.insert(rng.randrange(len(words)), f"{rng.randint(1, 50)} U.S.C. § {rng.randint(100, 9999)}(c)")
+        words.insert(rng.randrange(len(words)), f"No. {rng.randint(10, 24)}-{rng.randint(1000, 9999)}")
+        nodes.append(TextNode(id_=f"chunk-{i}", text=" ".join(words)))
+    return nodes
+
+
+def make_queries(nodes, count, seed=0):
+    """(query, source node id) pairs, half citation lookups and half word spans."""
+    rng = random.Random(seed)
+    queries = []
+    for node in rng.sample(nodes, min(count, len(nodes))):
+        text = node.get_content()
+        citations = [t for t in TOKEN_PATTERN.findall(text.lower()) if any(c.isdigit() for c in t) and len(t) > 4]
+        words = text.split()
+        if citations and len(queries) % 2 == 0:
+            query = f"What does the court say about {rng.choice(citations)}?"
+        else:
+            start = rng.randrange(max(1, len(words) - 8))
+            query = " ".join(words[start:start + 8])
+        queries.append((query, node.node_id))
+    return queries
+
+
+def evaluate(name, retrieve, queries, top_k):
+    hits = 0
+    latencies = []
+    for query, node_id in queries:
+        start = time.perf_counter()
+        results = retrieve(query)[:top_k]
+        latencies.append(time.perf_counter() - start)
+        hits += node_id in results
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e3
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1e3
+    print(f"{name:8s} recall@{top_k} {hits / len(queries):6.3f}   p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default="./persisted_legal_index")
+    parser.add_argument("--synthetic", type=int, default=0, help="Build an in-memory index of N synthetic chunks.")
+    parser.add_argument("--model", default="nlpaueb/legal-bert-base-uncased", help="Embedding model, or 'mock'.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.model == "mock":
+        Settings.embed_model = MockEmbedding(embed_dim=768)
+    else:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        Settings.embed_model = HuggingFaceEmbedding(model_name=args.model)
+
+    if args.synthetic:
+        index = VectorStoreIndex(synthetic_nodes(args.synthetic))
+    else:
+        index = load_index_from_storage(StorageContext.from_defaults(persist_dir=args.persist_dir))
+    nodes = list(index.docstore.docs.values())
+
+    start = time.perf_counter()
+    lexical_index = BM25Index.from_docstore(index.docstore)
+    print(f"{len(nodes)} chunks; BM25 index built in {time.perf_counter() - start:.2f}s, "
+          f"{len(lexical_index.vocabulary)} terms, {len(lexical_index.doc_numbers)} postings")
+
+    queries = make_queries(nodes, args.queries)
+    # Embed queries up front so vector and hybrid latencies measure search, not the encoder.
+    bundles = {q: QueryBundle(query_str=q, embedding=Settings.embed_model.get_query_embedding(q)) for q, _ in queries}
+    vector_retriever = index.as_retriever(similarity_top_k=max(args.candidates, args.top_k))
+    hybrid = HybridRetriever(vector_retriever, lexical_index, index.docstore,
+                             similarity_top_k=args.top_k, candidates=args.candidates)
+
+    evaluate("vector", lambda q: [n.node.node_id for n in vector_retriever.retrieve(bundles[q])], queries, args.top_k)
+    evaluate("bm25", lambda q: [node_id for node_id, _ in lexical_index.search(q, args.top_k)], queries, args.top_k)
+    evaluate("hybrid", lambda q: [n.node.node_id for n in hybrid.retrieve(bundles[q])], queries, args.top_k)
+    print(f"({sum(1 for q, _ in queries if q.endswith('?'))} of {len(queries)} queries are citation lookups)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Where cold-start time goes: import time per package, and the API's load phases until /ready.
+
+Imports are measured in a fresh interpreter with `python -X importtime`;
+each module's own (exclusive) time is summed under its top-level package.
+With --serve, the API is started with uvicorn and /ready is polled; its
+startup timeline (imports, embed_model, index, llm, warmup_query) is printed.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --modules backend.main Legal_chatbot --serve
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.bench_e2e import free_port
+
+
+def import_profile(module):
+    """(total seconds, {top-level package: exclusive seconds}) for importing `module` in a fresh interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"❌ Importing {module} failed:\n{result.stderr[-2000:]}")
+    packages = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(own) / 1e6
+        if not name.startswith("  "):  # imported directly by the -c statement
+            total += int(cumulative) / 1e6
+    return total, packages
+
+
+def serve_profile(timeout):
+    """Start the API with uvicorn and return (seconds until it listens, seconds until ready, /ready body)."""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+                              env={**os.environ, "WARMUP_MODE": os.getenv("WARMUP_MODE", "background")})
+    listening = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                sys.exit("❌ Server exited during startup.")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1)
+            except httpx.TransportError:
+                time.sleep(0.05)
+                continue
+            listening = listening or time.perf_counter() - start
+            if response.status_code == 200:
+                return listening, time.perf_counter() - start, response.json()
+            if response.json().get("error"):
+                sys.exit(f"❌ Warm-up failed: {response.json()['error']}")
+            time.sleep(0.1)
+        sys.exit(f"❌ Not ready after {timeout:.0f}s.")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["backend.main", "Legal_chatbot", "Data_parsing"])
+    parser.add_argument("--top", type=int, default=8, help="Packages to list per module.")
+    parser.add_argument("--serve", action="store_true", help="Also start the API and time it until /ready.")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        total, packages = import_profile(module)
+        print(f"import {module}: {total:.2f}s")
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {package:28s} {seconds:6.2f}s")
+
+    if args.serve:
+        listening, ready, status = serve_profile(args.timeout)
+        print(f"\nAPI accepting connections after {listening:.2f}s, ready after {ready:.2f}s")
+        for phase in status["phases"]:
+            print(f"    {phase['phase']:28s} {phase['seconds']:6.2f}s   (at {phase['started_s']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Recall@k, p50/p99 query latency and RSS: Chroma HNSW vs FlatVectorStore (float16 / int8).
+
+Ground truth is exact float32 cosine top-k. Every store is queried from a
+fresh subprocess so its resident memory is measured on its own.
+
+    python -m benchmarks.bench_vector_store --vectors 100000
+    python -m benchmarks.bench_vector_store --persist-dir ./persisted_legal_index   # real legal-bert vectors
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+from backend.flat_vector_store import SIMPLE_VECTOR_STORE_FNAME, FlatVectorStore, normalise
+from benchmarks.bench_docstore import rss_mb
+
+
+def synthetic_vectors(count, dim, seed=0):
+    # Clustered like real embeddings (many chunks per case/topic), not uniform noise.
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(count // 50, 1), dim)).astype(np.float32)
+    return centres[rng.integers(0, len(centres), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+
+
+def persisted_vectors(persist_dir):
+    with open(os.path.join(persist_dir, SIMPLE_VECTOR_STORE_FNAME), encoding="utf-8") as f:
+        embeddings = json.load(f)["embedding_dict"]
+    return np.array(list(embeddings.values()), dtype=np.float32)
+
+
+def build_chroma(path, vectors):
+    from chromadb import PersistentClient
+    from chroma_writer import max_batch_size
+
+    client = PersistentClient(path=path)
+    collection = client.create_collection("bench", embedding_function=None, metadata={"hnsw:space": "cosine"})
+    batch_size = max_batch_size(client, 5000)
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        collection.add(ids=[str(i) for i in range(start, end)], embeddings=vectors[start:end].tolist())
+
+
+def build_flat(persist_dir, vectors, dtype):
+    store = FlatVectorStore.from_arrays([str(i) for i in range(len(vectors))], vectors, dtype=dtype)
+    os.makedirs(persist_dir, exist_ok=True)
+    store.persist(os.path.join(persist_dir, SIMPLE_VECTOR_STORE_FNAME))
+
+
+def child(kind, path, queries_path, top_k):
+    """Load one store, run every query one at a time, print results as JSON."""
+    from chromadb import PersistentClient  # imported before the baseline so RSS is the store's alone
+
+    queries = np.load(queries_path)
+    baseline_rss = rss_mb()
+    start = time.perf_counter()
+    if kind == "chroma":
+        collection = PersistentClient(path=path).get_collection("bench")
+        search = lambda q: [int(i) for i in collection.query(query_embeddings=[q.tolist()], n_results=top_k)["ids"][0]]
+    else:
+        store = FlatVectorStore.from_persist_dir(path)
+        search = lambda q: store.search(q, top_k)[0][0].tolist()
+    search(queries[0])  # warm-up: first query loads the HNSW graph / pages in the matrix
+    load_seconds = time.perf_counter() - start
+
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    print(json.dumps({"results": results, "latencies": latencies, "load_seconds": load_seconds,
+                      "rss_mb": rss_mb() - baseline_rss}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--persist-dir", default=None, help="Use the vectors of a persisted index instead.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--child", nargs=3, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.top_k)
+        return
+
+    vectors = persisted_vectors(args.persist_dir) if args.persist_dir else synthetic_vectors(args.vectors, args.dim)
+    rng = np.random.default_rng(1)
+    # Queries near stored vectors, as a real question lands near its relevant chunks.
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = queries + 0.3 * queries.std() * rng.standard_normal(queries.shape).astype(np.float32)
+    truth = np.argsort(-(normalise(queries) @ normalise(vectors).T), axis=1)[:, :args.top_k]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        queries_path = os.path.join(workdir, "queries.npy")
+        np.save(queries_path, queries)
+        stores = [("chroma", os.path.join(workdir, "chroma")), ("float16", os.path.join(workdir, "flat16")),
+                  ("int8", os.path.join(workdir, "flat8"))]
+        for kind, path in stores:
+            start = time.perf_counter()
+            build_chroma(path, vectors) if kind == "chroma" else build_flat(path, vectors, kind)
+            print(f"built {kind:8s} in {time.perf_counter() - start:7.2f}s")
+
+        print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, top-{args.top_k}")
+        for kind, path in stores:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_vector_store", "--top-k", str(args.top_k),
+                 "--child", kind, path, queries_path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            recall = np.mean([len(set(r) & set(t)) / args.top_k for r, t in zip(result["results"], truth.tolist())])
+            latencies = np.array(result["latencies"]) * 1e3
+            print(f"{kind:8s} recall@{args.top_k} {recall:6.3f}   p50 {np.percentile(latencies, 50):7.2f} ms   "
+                  f"p99 {np.percentile(latencies, 99):7.2f} ms   RSS +{result['rss_mb']:7.1f} MB   "
+                  f"first query {result['load_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Per-worker memory of the API with 1, 4 and 8 uvicorn workers serving one shared index generation.
+
+The index (a persisted one, or --synthetic N chunks) is published under a
+temporary SHARED_INDEX_ROOT; every worker maps that generation's files.
+Once all workers answer /ready (each has run its warm-up query, a full scan
+of the vectors) and have served some requests, every worker's memory is read
+from /proc:
+
+    RSS  resident pages, shared ones included, as `ps` and most dashboards show it
+    USS  pages only this worker has: what one more worker costs
+    PSS  shared pages split between the processes mapping them; the PSS sum is the host total
+
+    python -m benchmarks.bench_workers --synthetic 50000
+    python -m benchmarks.bench_workers --persist-dir ./persisted_legal_index --workers 1 4 8
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+import psutil
+
+from benchmarks.bench_docstore import synthetic_index
+from benchmarks.bench_e2e import free_port
+
+
+def create_app():
+    """uvicorn --factory entry point: the API with DummyLLM, so generation needs no Ollama."""
+    import backend.main as server_app
+    from backend.dummy_llm import DummyLLM
+    server_app.llm.set(DummyLLM(tokens_per_second=0, first_token_latency=0, max_tokens=20))
+    return server_app.app
+
+
+def directory_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 2**20
+
+
+async def drive(url, requests, concurrency):
+    """Fresh connections each time, so the kernel spreads them over the workers."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore, httpx.AsyncClient(timeout=60) as client:
+            await client.get(f"{url}/streamresponse", params={"prompt": f"hearsay at sentencing question {i}"})
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+
+
+def wait_for_workers(url, server, workers, timeout):
+    """PIDs of all workers, once each has answered /ready with 200."""
+    ready = set()
+    start = time.perf_counter()
+    while len(ready) < workers:
+        if server.poll() is not None:
+            sys.exit("❌ Server exited during startup.")
+        if time.perf_counter() - start > timeout:
+            sys.exit(f"❌ Only {len(ready)} of {workers} workers ready after {timeout:.0f}s.")
+        try:
+            response = httpx.get(f"{url}/ready", timeout=2)
+        except httpx.TransportError:
+            time.sleep(0.2)
+            continue
+        if response.status_code == 200:
+            ready.add(response.json()["pid"])
+        else:
+            time.sleep(0.2)
+    return sorted(ready)
+
+
+def measure(workers, shared_root, args):
+    port = free_port()
+    env = {**os.environ, "SHARED_INDEX_ROOT": shared_root, "WARMUP_MODE": "blocking",
+           "RETRIEVAL_MODE": args.retrieval_mode}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_workers:create_app", "--factory",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        pids = wait_for_workers(url, server, workers, args.timeout)
+        asyncio.run(drive(url, args.requests_per_worker * workers, concurrency=2 * workers))
+        memory = [psutil.Process(pid).memory_full_info() for pid in pids]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    mb = 2**20
+    return {
+        "rss": sum(m.rss for m in memory) / len(memory) / mb,
+        "uss": sum(m.uss for m in memory) / len(memory) / mb,
+        "pss": sum(m.pss for m in memory) / len(memory) / mb,
+        "total_rss": sum(m.rss for m in memory) / mb,
+        "total_pss": sum(m.pss for m in memory) / mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default="./persisted_legal_index")
+    parser.add_argument("--synthetic", type=int, default=0, help="Publish an index of N synthetic chunks instead.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests-per-worker", type=int, default=20)
+    parser.add_argument("--retrieval-mode", default="hybrid")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    from backend.shared_index import current_generation, publish_generation
+
+    with tempfile.TemporaryDirectory() as workdir:
+        shared_root = os.path.join(workdir, "shared_index")
+        persist_dir = args.persist_dir
+        if args.synthetic:
+            persist_dir = os.path.join(workdir, "synthetic")
+            synthetic_index(persist_dir, args.synthetic)
+        publish_generation(persist_dir, shared_root)
+        print(f"Shared index generation: {directory_mb(current_generation(shared_root)[1]):.0f} MB on disk")
+
+        print(f"{'workers':>7s} {'RSS/worker':>11s} {'USS/worker':>11s} {'PSS/worker':>11s} "
+              f"{'sum RSS':>9s} {'sum PSS':>9s}")
+        for workers in args.workers:
+            result = measure(workers, shared_root, args)
+            print(f"{workers:7d} {result['rss']:9.0f}MB {result['uss']:9.0f}MB {result['pss']:9.0f}MB "
+                  f"{result['total_rss']:7.0f}MB {result['total_pss']:7.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
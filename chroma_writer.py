@@ -0,0 +1,118 @@
+"""Batched Chroma writes that reuse the embeddings ingestion already computed.
+
+Ingestion writes into a staged collection and only publishes it once the
+LlamaIndex side has been swapped in, so Chroma and the served docstore stay
+in step when a run fails.
+"""
+import time
+from dataclasses import dataclass
+
+CHUNK_COLLECTION = "legal_document_chunks"
+# No embedding function: every row is written with its legal-bert
+# embedding, so Chroma's default model must never run.
+COLLECTION_OPTIONS = {"embedding_function": None, "metadata": {"hnsw:space": "cosine"}}
+
+
+@dataclass
+class WriteStats:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add(self, other):
+        """Accumulate another call's stats (e.g. one per pipeline batch)."""
+        self.rows += other.rows
+        self.batches += other.batches
+        self.seconds += other.seconds
+        return self
+
+    def describe(self):
+        return f"{self.rows} rows in {self.batches} batches, {self.seconds:.2f}s ({self.rows_per_second:.0f} rows/s)"
+
+
+def max_batch_size(client, requested):
+    """Clamp to the largest batch the Chroma server accepts."""
+    limit = None
+    if hasattr(client, "get_max_batch_size"):
+        limit = client.get_max_batch_size()
+    elif hasattr(client, "max_batch_size"):
+        limit = client.max_batch_size
+    return min(requested, limit) if limit else requested
+
+
+def bulk_upsert(collection, nodes, batch_size=1000) -> WriteStats:
+    """Upsert nodes with their precomputed embeddings, `batch_size` rows per call.
+
+    Every node must already carry an embedding (IngestionPipeline sets them),
+    so Chroma never runs its own default embedding model over the corpus.
+    """
+    stats = WriteStats()
+    start = time.perf_counter()
+    for offset in range(0, len(nodes), batch_size):
+        batch = nodes[offset:offset + batch_size]
+        missing = [node.node_id for node in batch if node.embedding is None]
+        if missing:
+            raise ValueError(f"{len(missing)} nodes have no embedding (first: {missing[0]})")
+        collection.upsert(
+            ids=[node.node_id for node in batch],
+            embeddings=[node.embedding for node in batch],
+            documents=[node.text for node in batch],
+            metadatas=[node.metadata for node in batch],
+        )
+        stats.rows += len(batch)
+        stats.batches += 1
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def bulk_delete(collection, ids, batch_size=1000):
+    for offset in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[offset:offset + batch_size])
+
+
+def staged_collection_name(name=CHUNK_COLLECTION):
+    return f"{name}_building"
+
+
+def copy_rows(source, target, batch_size=1000) -> WriteStats:
+    """Upsert every row of `source`, with its stored embedding, into `target`."""
+    stats = WriteStats()
+    start = time.perf_counter()
+    offset = 0
+    while True:
+        rows = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not rows["ids"]:
+            break
+        target.upsert(ids=rows["ids"], embeddings=rows["embeddings"], documents=rows["documents"],
+                      metadatas=rows["metadatas"])
+        offset += len(rows["ids"])
+        stats.rows += len(rows["ids"])
+        stats.batches += 1
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def publish_staged_collection(client, name=CHUNK_COLLECTION, delete_ids=None, replace=False, batch_size=1000):
+    """Make the staged collection's rows live under `name`.
+
+    With `replace`, the staged collection becomes `name` (a full rebuild).
+    Otherwise `delete_ids` are removed from `name` and the staged rows merged
+    into it (an incremental run). Returns the live collection.
+    """
+    staged = client.get_collection(staged_collection_name(name))
+    if replace:
+        try:
+            client.delete_collection(name)
+        except Exception:
+            pass  # first build
+        staged.modify(name=name)
+        return client.get_collection(name)
+    live = client.get_or_create_collection(name, **COLLECTION_OPTIONS)
+    bulk_delete(live, list(delete_ids or []), batch_size=batch_size)
+    copy_rows(staged, live, batch_size=batch_size)
+    client.delete_collection(staged.name)
+    return live
@@ -0,0 +1,226 @@
+"""Persistent HTTP response cache for the CourtListener client, in SQLite.
+
+Responses are keyed by URL and normalised query parameters. Within
+`max_age` seconds an entry is served without touching the network; after
+that it is revalidated with If-None-Match / If-Modified-Since, and a 304
+refreshes it instead of downloading the body again. The least recently
+used entries are evicted once the cache outgrows `max_bytes`.
+
+    python http_cache.py --stats
+    python http_cache.py --clear
+"""
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_PATH = "./.courtlistener_cache.db"
+# Response headers worth keeping; the rest describe the original transfer.
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    validated_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def normalise_key(url, params=None):
+    """`scheme://host/path?sorted-params`, with the URL's own query merged into `params` and empty values dropped."""
+    parts = urlsplit(url)
+    pairs = parse_qsl(parts.query, keep_blank_values=False)
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        pairs.extend((name, str(v)) for v in values if v is not None and v != "")
+    query = urlencode(sorted(pairs))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+@dataclass
+class CachedResponse:
+    key: str
+    status: int
+    headers: dict
+    body: bytes
+    etag: str
+    last_modified: str
+    validated_at: float
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self, url):
+        """A fully read requests.Response, so callers cannot tell it came from the cache."""
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response._content_consumed = True
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+class HTTPCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=512 * 2**20, max_age=24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self.counts = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._connection().executescript(SCHEMA)
+        # Running size of all bodies, so a put does not sum the table; evict() re-reads the real total.
+        self._bytes = self._total_bytes()
+
+    def _connection(self):
+        # One connection per thread (the harvester downloads on a pool); WAL so readers never wait on a writer.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _total_bytes(self):
+        return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT status, headers, body, etag, last_modified, validated_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, last_modified, validated_at = row
+        with self._connection() as conn:
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(key, status, json.loads(headers), bytes(body), etag, last_modified, validated_at)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.validated_at < self.max_age
+
+    def can_revalidate(self, entry):
+        return bool(entry.etag or entry.last_modified)
+
+    def put(self, key, response, body):
+        if len(body) > self.max_bytes // 4:
+            return  # one huge download would flush everything else
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        now = time.time()
+        with self._connection() as conn:
+            # IMMEDIATE: the size being replaced cannot change before the insert.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, etag, last_modified, size, "
+                "validated_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status_code, json.dumps(headers), sqlite3.Binary(body), response.headers.get("ETag"),
+                 response.headers.get("Last-Modified"), len(body), now, now),
+            )
+        with self._lock:
+            self._bytes += len(body) - (row[0] if row else 0)
+            self.counts["stored"] += 1
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def mark_validated(self, key):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("UPDATE responses SET validated_at = ?, last_used = ? WHERE key = ?", (now, now, key))
+
+    def evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes.
+
+        Starts from the table's real total, which also corrects the running
+        one for entries written by other processes sharing the file.
+        """
+        with self._evict_lock:
+            conn = self._connection()
+            total = self._total_bytes()
+            if total > self.max_bytes:
+                target = self.max_bytes * 0.9
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                    if total <= target:
+                        break
+                    victims.append((key,))
+                    total -= size
+                with conn:
+                    conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                with self._lock:
+                    self.counts["evicted"] += len(victims)
+            with self._lock:
+                self._bytes = total
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM responses")
+        with self._lock:
+            self._bytes = 0
+
+    def stats(self):
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts["fresh_hits"] + counts["revalidated"] + counts["misses"]
+        return {
+            **counts,
+            "hit_rate": (counts["fresh_hits"] + counts["revalidated"]) / lookups if lookups else None,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def describe(self):
+        stats = self.stats()
+        hit_rate = f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "n/a"
+        return (f"HTTP cache: {hit_rate} hit rate ({stats['fresh_hits']} fresh, {stats['revalidated']} revalidated, "
+                f"{stats['misses']} fetched), {stats['entries']} entries, {stats['bytes'] / 2**20:.1f} MB, "
+                f"{stats['evicted']} evicted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the CourtListener HTTP cache.")
+    parser.add_argument("--path", default=os.getenv("COURTLISTENER_CACHE_PATH", DEFAULT_CACHE_PATH))
+    parser.add_argument("--stats", action="store_true", help="Print the cache summary line.")
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+    cache = HTTPCache(args.path)
+    if args.clear:
+        cache.clear()
+        print(f"✅ Cleared {args.path}.")
+    if args.stats:
+        print(f"{cache.describe()} ({args.path})")
+    else:
+        stats = cache.stats()
+        print(f"{stats['entries']} entries, {stats['bytes'] / 2**20:.1f} MB in {args.path}")
@@ -0,0 +1,124 @@
+"""Manifest of what has been ingested, for incremental re-ingestion.
+
+Maps each case folder to a hash of its files and the IDs of the chunks it
+produced, so a re-run only touches folders that were added, changed or removed.
+Each file's size, mtime and sha256 are kept too: a file whose size and mtime
+are unchanged is not read again, so planning a re-run costs a stat per file,
+not a pass over the corpus.
+"""
+import os
+import json
+import hashlib
+from dataclasses import dataclass, field
+
+from pdf_extraction import file_sha256
+
+MANIFEST_VERSION = 1
+
+
+def scan_case_folder(case_path, known_files=None):
+    """(hash, files) for the data.json / PDFs in a case folder: names and contents.
+
+    `files` maps each file name to [size, mtime_ns, sha256]. Files whose size
+    and mtime match their entry in `known_files` keep that sha256 unread.
+    """
+    known_files = known_files or {}
+    digest = hashlib.sha256()
+    files = {}
+    for name in sorted(os.listdir(case_path)):
+        if name == "data.json" or name.lower().endswith(".pdf"):
+            path = os.path.join(case_path, name)
+            stat = os.stat(path)
+            known = known_files.get(name)
+            if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+                content_hash = known[2]
+            else:
+                content_hash = file_sha256(path)
+            files[name] = [stat.st_size, stat.st_mtime_ns, content_hash]
+            digest.update(name.encode("utf-8") + b"\0")
+            digest.update(content_hash.encode("ascii") + b"\0")
+    return digest.hexdigest(), files
+
+
+def make_chunk_id(case_folder, source, index, text):
+    """Stable chunk ID derived from where the chunk came from and what it says."""
+    key = f"{case_folder}\0{source}\0{index}\0{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class IngestPlan:
+    new: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+
+    @property
+    def to_ingest(self):
+        return self.new + self.changed
+
+    @property
+    def has_changes(self):
+        return bool(self.new or self.changed or self.removed)
+
+    def describe(self):
+        return (f"{len(self.new)} new, {len(self.changed)} changed, "
+                f"{len(self.removed)} removed, {len(self.unchanged)} unchanged case folders")
+
+
+class IngestManifest:
+    def __init__(self, path, folders=None):
+        self.path = path
+        # case_folder -> {"hash": str, "chunk_ids": [str], "files": {name: [size, mtime_ns, sha256]}}
+        self.folders = folders or {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported ingest manifest version {data.get('version')} in {path}")
+        return cls(path, data.get("folders", {}))
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "folders": self.folders}, f)
+        os.replace(tmp_path, self.path)
+
+    def scan(self, dataset_path, folder):
+        """scan_case_folder, reusing the hashes recorded for the folder's unchanged files."""
+        return scan_case_folder(os.path.join(dataset_path, folder), self.folders.get(folder, {}).get("files"))
+
+    def plan(self, current_hashes) -> IngestPlan:
+        """Compare folder hashes on disk with what was last ingested."""
+        plan = IngestPlan()
+        for folder, folder_hash in sorted(current_hashes.items()):
+            entry = self.folders.get(folder)
+            if entry is None:
+                plan.new.append(folder)
+            elif entry["hash"] != folder_hash:
+                plan.changed.append(folder)
+            else:
+                plan.unchanged.append(folder)
+        plan.removed = sorted(set(self.folders) - set(current_hashes))
+        return plan
+
+    def chunk_ids_for(self, folders):
+        return [chunk_id for folder in folders for chunk_id in self.folders.get(folder, {}).get("chunk_ids", [])]
+
+    def record(self, folder, folder_hash, chunk_ids, files):
+        self.folders[folder] = {"hash": folder_hash, "chunk_ids": list(chunk_ids), "files": files}
+
+    def refresh_files(self, folder, files):
+        """Store new stats for a folder whose content is unchanged (e.g. touched or copied files)."""
+        if folder in self.folders and self.folders[folder]["files"] != files:
+            self.folders[folder]["files"] = files
+            return True
+        return False
+
+    def forget(self, folder):
+        self.folders.pop(folder, None)
@@ -0,0 +1,141 @@
+"""Streaming building blocks for ingestion: bounded stage pipeline and progress reporting.
+
+Each stage runs in its own thread and hands work to the next through a
+bounded queue, so a fast stage blocks instead of piling results up in
+memory and the whole pipeline holds at most `queue_size` items per stage.
+"""
+import time
+import queue
+import threading
+from itertools import islice
+
+_DONE = object()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class PipelineError(RuntimeError):
+    pass
+
+
+class StagedPipeline:
+    """source -> stage_1 -> ... -> stage_n -> consumer, one thread per step.
+
+    Each stage is a function taking one item and returning the item for the
+    next stage (or None to drop it). Iterating the pipeline yields the output
+    of the last stage; an exception in any thread stops the others and is
+    re-raised in the consumer.
+    """
+
+    def __init__(self, source, stages, queue_size=2):
+        self.source = source
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        self._stop = threading.Event()
+        self._error = None
+        self._threads = []
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _run_source(self):
+        try:
+            for item in self.source:
+                if not self._put(self.queues[0], item):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(self.queues[0], _DONE)
+
+    def _run_stage(self, position, fn):
+        try:
+            while True:
+                item = self._get(self.queues[position])
+                if item is _DONE:
+                    break
+                result = fn(item)
+                if result is not None and not self._put(self.queues[position + 1], result):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(self.queues[position + 1], _DONE)
+
+    def queue_depths(self):
+        return [q.qsize() for q in self.queues]
+
+    def __iter__(self):
+        self._threads = [threading.Thread(target=self._run_source, name="ingest-source", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._run_stage, args=(i, fn), name=f"ingest-{getattr(fn, '__name__', i)}", daemon=True)
+            for i, fn in enumerate(self.stages)
+        ]
+        for thread in self._threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(self.queues[-1])
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+        if self._error is not None:
+            raise PipelineError(f"Ingestion stage failed: {self._error}") from self._error
+
+
+class ProgressReporter:
+    """Periodic one-line progress and throughput report, instead of per-chunk prints."""
+
+    def __init__(self, total_folders, interval=10.0, depths=None):
+        self.total_folders = total_folders
+        self.interval = interval
+        self.depths = depths
+        self.folders = 0
+        self.chunks = 0
+        self.started_at = time.perf_counter()
+        self._last_report = self.started_at
+
+    def update(self, folders=0, chunks=0):
+        self.folders += folders
+        self.chunks += chunks
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, final=False):
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        folder_rate = self.folders / elapsed
+        remaining = self.total_folders - self.folders
+        eta = f", ETA {remaining / folder_rate / 60:.1f} min" if folder_rate and remaining > 0 else ""
+        depths = f", queues {'/'.join(map(str, self.depths()))}" if self.depths and not final else ""
+        label = "✅ Ingested" if final else "…"
+        print(f"{label} {self.folders}/{self.total_folders} case folders, {self.chunks} chunks in {elapsed:.0f}s "
+              f"({folder_rate:.2f} folders/s, {self.chunks / elapsed:.1f} chunks/s{eta}{depths})", flush=True)
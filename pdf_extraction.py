@@ -0,0 +1,157 @@
+"""PDF text extraction for ingestion: parallel, cached by file content.
+
+This module is deliberately light (no torch / llama_index imports) because
+every extraction worker process imports it.
+"""
+import os
+import re
+import time
+import hashlib
+import unicodedata
+from dataclasses import dataclass, field
+
+import pdfplumber
+
+# Bump when new_preprocess_text changes so stale cached text is not reused.
+NORMALISATION_VERSION = 1
+
+
+def new_preprocess_text(file_path, text):
+    text = unicodedata.normalize('NFKC', text)
+    text = re.sub(r'\.{3,}', '.', text)
+    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    text = re.sub(r'Page\s+\d+\s+of\s+\d+', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def read_pdf_text(pdf_file_path):
+    """Raw text of every page; raises if the PDF cannot be parsed."""
+    text_runs = []
+    with pdfplumber.open(pdf_file_path) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text_runs.append(page_text)
+    return "\n".join(text_runs)
+
+
+def extract_pdf_text(pdf_file_path):
+    try:
+        return read_pdf_text(pdf_file_path)
+    except Exception as e:
+        print(f"Error reading PDF {pdf_file_path}: {e}")
+        return ""
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ------------------------------
+# On-disk Text Cache
+# ------------------------------
+class PdfTextCache:
+    """Extracted-and-normalised PDF text stored on disk under the PDF's content hash.
+
+    Keys are content hashes, not paths, so a renamed or copied PDF is still a
+    hit and an edited one is always re-extracted.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, content_hash):
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.v{NORMALISATION_VERSION}.txt")
+
+    def get(self, content_hash):
+        try:
+            with open(self._path(content_hash), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, content_hash, text):
+        path = self._path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent workers never read a partial file.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+# ------------------------------
+# Parallel Extraction
+# ------------------------------
+@dataclass
+class PdfExtractionResult:
+    path: str
+    text: str = ""
+    content_hash: str = None
+    seconds: float = 0.0
+    cached: bool = False
+    error: str = None
+
+
+@dataclass
+class ExtractionReport:
+    results: dict = field(default_factory=dict)  # path -> PdfExtractionResult
+    wall_seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def failures(self):
+        return [r for r in self.results.values() if r.error]
+
+    @property
+    def cache_hits(self):
+        return sum(1 for r in self.results.values() if r.cached)
+
+    def add(self, result, keep_text=True):
+        if not keep_text:
+            # Streaming ingestion only needs timings and errors once the text is consumed.
+            result = PdfExtractionResult(result.path, "", result.content_hash, result.seconds, result.cached, result.error)
+        self.results[result.path] = result
+
+    def print_summary(self, slowest=5):
+        parsed = [r for r in self.results.values() if not r.cached and not r.error]
+        parse_seconds = sum(r.seconds for r in parsed)
+        print(f"✅ Extracted {len(self.results)} PDFs in {self.wall_seconds:.1f}s with {self.workers} worker(s): "
+              f"{self.cache_hits} from cache, {len(parsed)} parsed ({parse_seconds:.1f}s of parsing), "
+              f"{len(self.failures)} failed.")
+        for r in sorted(parsed, key=lambda r: r.seconds, reverse=True)[:slowest]:
+            print(f"   {r.seconds:6.2f}s  {r.path}")
+        for r in self.failures:
+            print(f"❌ {r.path}: {r.error}")
+
+
+def extract_and_normalise(pdf_file_path, cache_dir=None, content_hash=None):
+    """Worker entry point: cached text for one PDF, extracting it on a miss.
+
+    Pass `content_hash` when the file's sha256 is already known, so it is not read twice.
+    """
+    start = time.perf_counter()
+    result = PdfExtractionResult(path=pdf_file_path)
+    try:
+        cache = PdfTextCache(cache_dir) if cache_dir else None
+        if cache:
+            result.content_hash = content_hash or file_sha256(pdf_file_path)
+            cached_text = cache.get(result.content_hash)
+            if cached_text is not None:
+                result.text, result.cached = cached_text, True
+                return result
+        raw_text = read_pdf_text(pdf_file_path)
+        result.text = new_preprocess_text(pdf_file_path, raw_text) if raw_text else ""
+        if cache:
+            cache.put(result.content_hash, result.text)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.seconds = time.perf_counter() - start
+    return result
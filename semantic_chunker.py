@@ -0,0 +1,90 @@
+"""Batched semantic chunking.
+
+Produces the same chunks as Data_parsing.sentence_grouping but encodes the
+sentences of many sections in one large batch and keeps a running centroid
+and token count instead of recomputing them for every sentence.
+"""
+from functools import cache
+
+import nltk
+import numpy as np
+from nltk.tokenize import sent_tokenize
+
+
+@cache
+def ensure_punkt():
+    """Fetch nltk's sentence tokenizer on first use; importing a module must not touch the network."""
+    for resource in ("punkt", "punkt_tab"):  # nltk >= 3.8.2 loads punkt_tab
+        try:
+            nltk.data.find(f"tokenizers/{resource}")
+        except LookupError:
+            nltk.download(resource, quiet=True)
+
+
+def split_sentences(text):
+    """nltk's sent_tokenize, downloading punkt the first time it is needed."""
+    ensure_punkt()
+    return sent_tokenize(text)
+
+
+class SemanticChunker:
+    def __init__(self, model, threshold=0.75, max_tokens=150, batch_size=256, sentence_splitter=None):
+        self.model = model
+        self.threshold = threshold
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.sentence_splitter = sentence_splitter or split_sentences
+
+    def group_sentences(self, sentences, embeddings, norms):
+        """Greedy grouping of one section's sentences, in O(sentences * dim).
+
+        A sentence joins the current chunk while its cosine similarity to the
+        chunk centroid is at least `threshold` and the chunk has fewer than
+        `max_tokens` whitespace tokens. The cosine of the running *sum* equals
+        that of the mean, so the sum is kept instead of re-averaging.
+        """
+        chunks = []
+        current_chunk = []
+        centroid_sum = None
+        current_tokens = 0
+
+        for sentence, emb, emb_norm in zip(sentences, embeddings, norms):
+            if current_chunk:
+                denominator = np.linalg.norm(centroid_sum) * emb_norm
+                similarity = np.dot(centroid_sum, emb) / denominator if denominator else 0
+            else:
+                similarity = 0
+
+            if similarity >= self.threshold and current_tokens < self.max_tokens:
+                current_chunk.append(sentence)
+                centroid_sum += emb
+            else:
+                if current_chunk:
+                    chunks.append(" ".join(current_chunk))
+                current_chunk = [sentence]
+                centroid_sum = emb.astype(np.float64, copy=True)
+                current_tokens = 0
+            current_tokens += len(sentence.split())
+
+        if current_chunk:
+            chunks.append(" ".join(current_chunk))
+
+        return chunks
+
+    def chunk_sections(self, sections):
+        """Chunk many sections at once; returns one list of chunks per section."""
+        section_sentences = [self.sentence_splitter(section) for section in sections]
+        all_sentences = [s for sentences in section_sentences for s in sentences]
+        if not all_sentences:
+            return [[] for _ in sections]
+
+        embeddings = np.asarray(self.model.encode(all_sentences, batch_size=self.batch_size))
+        norms = np.linalg.norm(embeddings, axis=1)
+
+        results = []
+        offset = 0
+        for sentences in section_sentences:
+            end = offset + len(sentences)
+            results.append(self.group_sentences(sentences, embeddings[offset:end], norms[offset:end]))
+            offset = end
+        return results
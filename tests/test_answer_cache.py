@@ -0,0 +1,81 @@
+"""SemanticAnswerCache: when a cached answer may be replayed, and when it must not be."""
+import pytest
+
+from backend import answer_cache as answer_cache_module
+from backend.answer_cache import SemanticAnswerCache
+
+CHUNKS = ["chunk-2", "chunk-1"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_similar_question_over_same_chunks_hits():
+    cache = SemanticAnswerCache(similarity_threshold=0.97)
+    cache.store([1.0, 0.0, 0.0], CHUNKS, "Hearsay is admissible at sentencing.")
+    # Chunk order does not matter; the embedding is within the threshold (cos ~0.995).
+    assert cache.lookup([1.0, 0.1, 0.0], list(reversed(CHUNKS))) == "Hearsay is admissible at sentencing."
+    assert cache.stats()["hits"] == 1
+
+
+def test_dissimilar_question_or_other_chunks_misses():
+    cache = SemanticAnswerCache(similarity_threshold=0.97)
+    cache.store([1.0, 0.0, 0.0], CHUNKS, "answer")
+    assert cache.lookup([1.0, 0.5, 0.0], CHUNKS) is None  # cos ~0.89
+    assert cache.lookup([1.0, 0.0, 0.0], ["chunk-1", "chunk-3"]) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SemanticAnswerCache(ttl_seconds=60)
+    cache.store([0.0, 1.0], CHUNKS, "answer")
+    clock.now += 59
+    assert cache.lookup([0.0, 1.0], CHUNKS) == "answer"
+    clock.now += 2
+    assert cache.lookup([0.0, 1.0], CHUNKS) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.store([1.0, 0.0], ["a"], "answer a")
+    cache.store([1.0, 0.0], ["b"], "answer b")
+    assert cache.lookup([1.0, 0.0], ["a"]) == "answer a"  # "b" is now least recently used
+    cache.store([1.0, 0.0], ["c"], "answer c")
+    assert cache.lookup([1.0, 0.0], ["b"]) is None
+    assert cache.lookup([1.0, 0.0], ["a"]) == "answer a"
+    assert cache.lookup([1.0, 0.0], ["c"]) == "answer c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts():
+    cache = SemanticAnswerCache(max_bytes=200)
+    cache.store([1.0, 0.0], ["a"], "x" * 100)
+    cache.store([1.0, 0.0], ["b"], "y" * 100)
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] <= 200
+
+
+def test_index_change_invalidates_and_rejects_stale_answers():
+    cache = SemanticAnswerCache()
+    cache.invalidate(generation=1)
+    cache.store([1.0, 0.0], CHUNKS, "old answer", generation=1)
+    cache.invalidate(generation=2)
+    assert cache.lookup([1.0, 0.0], CHUNKS) is None
+    # A generation that started before the reload finishes after it: not cached.
+    cache.store([1.0, 0.0], CHUNKS, "old answer", generation=1)
+    assert cache.lookup([1.0, 0.0], CHUNKS) is None
+    cache.store([1.0, 0.0], CHUNKS, "new answer", generation=2)
+    assert cache.lookup([1.0, 0.0], CHUNKS) == "new answer"
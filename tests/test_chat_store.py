@@ -0,0 +1,64 @@
+"""ChatStore: sequence numbers stay unique and gap-free under concurrent writers."""
+import multiprocessing
+import threading
+
+from backend.chat_store import ChatStore
+
+
+def test_sequence_numbers_are_per_session(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    assert store.append("alice", "s1", "user", "q1") == 1
+    assert store.append_many("alice", "s1", [("assistant", "a1"), ("user", "q2")]) == [2, 3]
+    assert store.append("alice", "s2", "user", "other session") == 1
+    assert store.append("bob", "s1", "user", "other user") == 1
+    assert [m.content for m in store.recent("alice", "s1")] == ["q1", "a1", "q2"]
+    assert store.sessions("alice") == [{"session_id": "s1", "messages": 3}, {"session_id": "s2", "messages": 1}]
+
+
+def test_recent_pages_backwards(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    store.append_many("alice", "s1", [("user", f"m{i}") for i in range(1, 8)])
+    page = store.recent("alice", "s1", limit=3)
+    assert [m.seq for m in page] == [5, 6, 7]
+    page = store.recent("alice", "s1", limit=3, before=page[0].seq)
+    assert [m.seq for m in page] == [2, 3, 4]
+
+
+def test_concurrent_threads_never_collide(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    threads, per_thread = 8, 25
+    allocated = []
+    lock = threading.Lock()
+
+    def writer(number):
+        for i in range(per_thread):
+            if i % 5 == 0:
+                seqs = store.append_many("alice", "s1", [("user", f"t{number}-{i}"), ("assistant", "reply")])
+            else:
+                seqs = [store.append("alice", "s1", "user", f"t{number}-{i}")]
+            with lock:
+                allocated.extend(seqs)
+
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    total = threads * (per_thread + per_thread // 5)
+    assert sorted(allocated) == list(range(1, total + 1))
+    assert [m.seq for m in store.recent("alice", "s1", limit=total)] == list(range(1, total + 1))
+    assert store.sessions("alice") == [{"session_id": "s1", "messages": total}]
+
+
+def append_from_process(path, count):
+    store = ChatStore(path)
+    return [store.append("alice", "s1", "user", "from another process") for _ in range(count)]
+
+
+def test_concurrent_processes_never_collide(tmp_path):
+    path = str(tmp_path / "chat.db")
+    ChatStore(path)
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        results = pool.starmap(append_from_process, [(path, 20)] * 4)
+    assert sorted(seq for seqs in results for seq in seqs) == list(range(1, 81))
@@ -0,0 +1,85 @@
+"""ContextPacker: repeated sentences are dropped, chunks of a case merged, and the token budget held."""
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from backend.context_packer import ContextPacker, approx_tokens
+
+
+def words(text):
+    return len(text.split())
+
+
+def hit(text, node_id, score=1.0, **metadata):
+    return NodeWithScore(node=TextNode(id_=node_id, text=text, metadata=metadata), score=score)
+
+
+OPINION = ("The district court relied on hearsay at sentencing. "
+           "Hearsay is admissible at sentencing if it bears sufficient indicia of reliability. "
+           "The defendant did not object to the presentence report.")
+
+
+def test_repeated_sentences_keep_the_best_ranked_copy():
+    snippet = ("Hearsay is <mark>admissible</mark> at sentencing if it bears sufficient indicia of reliability. "
+               "The appeal was dismissed.")
+    packed = ContextPacker(count_tokens=words).pack([hit(OPINION, "opinion"), hit(snippet, "snippet")])
+    assert packed.duplicate_sentences == 1
+    assert packed.text.count("indicia of reliability") == 1
+    # The surviving copy is the opinion's (no markup), and the snippet's new sentence is kept.
+    assert "<mark>" not in packed.text
+    assert packed.text.endswith("The appeal was dismissed.\n\n")
+    assert packed.chunk_ids == ["opinion", "snippet"]
+
+
+def test_near_duplicates_are_dropped_but_different_sentences_are_not():
+    near = "HEARSAY is admissible at sentencing if it bears sufficient indicia of reliability and trustworthiness."
+    different = "The district court excluded hearsay at the trial itself."
+    packer = ContextPacker(count_tokens=words)
+    assert packer.pack([hit(OPINION, "a"), hit(near, "b")]).duplicate_sentences == 1
+    packed = packer.pack([hit(OPINION, "a"), hit(different, "b")])
+    assert packed.duplicate_sentences == 0 and different in packed.text
+
+
+def test_a_chunk_with_nothing_new_is_dropped():
+    packed = ContextPacker(count_tokens=words).pack([hit(OPINION, "a"), hit(OPINION, "b")])
+    assert packed.duplicate_sentences == 3
+    assert packed.text == OPINION + "\n\n"
+    assert packed.saved_tokens == words(OPINION)
+
+
+def test_chunks_of_one_case_merge_in_document_order():
+    chunks = [
+        hit("Third part of the opinion.", "c2", case_folder="101", source="pdf", chunk_index=2),
+        hit("Another case entirely.", "x0", case_folder="202", source="pdf", chunk_index=0),
+        hit("First part of the opinion.", "c0", case_folder="101", source="pdf", chunk_index=0),
+        hit("Second part of the opinion.", "c1", case_folder="101", source="pdf", chunk_index=1),
+        hit("Fifth part of the opinion.", "c4", case_folder="101", source="pdf", chunk_index=4),
+    ]
+    packed = ContextPacker(count_tokens=words).pack(chunks)
+    assert packed.merged_chunks == 3
+    # The merged passage sits at its best rank (first); a gap in chunk indexes is marked.
+    assert packed.text == ("First part of the opinion. Second part of the opinion. Third part of the opinion. "
+                           "[...] Fifth part of the opinion.\n\nAnother case entirely.\n\n")
+
+
+def test_budget_takes_whole_passages_then_whole_sentences():
+    first = "One two three four five. Six seven eight nine ten."
+    second = "Alpha beta gamma. Delta epsilon zeta eta. Theta iota kappa lambda mu."
+    third = "Never reached at all."
+    packer = ContextPacker(token_budget=17, count_tokens=words)
+    packed = packer.pack([hit(first, "a"), hit(second, "b"), hit(third, "c")])
+    assert packed.truncated
+    assert packed.text == first + "\n\n" + "Alpha beta gamma. Delta epsilon zeta eta.\n\n"
+    assert packed.packed_tokens <= 17
+    assert packed.input_tokens == words(first) + words(second) + words(third)
+
+
+def test_everything_fits_without_truncation():
+    packed = ContextPacker(token_budget=1500).pack([hit(OPINION, "a")])
+    assert not packed.truncated
+    assert packed.packed_tokens == packed.input_tokens == approx_tokens(OPINION + "\n\n")
+    assert "0 saved" in packed.describe()
+
+
+def test_approx_tokens_rounds_words_up_by_a_third():
+    assert approx_tokens("") == 0
+    assert approx_tokens("one") == 2
+    assert approx_tokens("one two three") == 4
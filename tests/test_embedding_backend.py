@@ -0,0 +1,62 @@
+"""The faster legal-bert backends must embed like the stock fp32 model (cosine >= 0.99).
+
+Needs the model locally: in the Hugging Face cache, or a directory named by
+EMBED_MODEL. Skipped otherwise, as is any backend whose runtime is not installed.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from backend.embedding_backend import EMBED_MODEL_NAME, load_embed_model
+
+MODEL = os.getenv("EMBED_MODEL", EMBED_MODEL_NAME)
+MIN_COSINE = 0.99
+QUERIES = [
+    "Is hearsay admissible at a sentencing hearing?",
+    "What is the standard of review for a motion to suppress evidence from a warrantless search?",
+    "ineffective assistance of counsel",
+    "Does 18 U.S.C. § 924(c) require a consecutive sentence?",
+]
+# What each backend needs on top of torch/transformers; `onnx` is used to export the graph.
+RUNTIMES = {"torch-int8": [], "onnx": ["onnxruntime", "onnx"], "onnx-int8": ["onnxruntime", "onnx"]}
+
+
+def model_available(model):
+    if os.path.isdir(model):
+        return True
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(model, "config.json"), str)
+
+
+pytestmark = pytest.mark.skipif(not model_available(MODEL), reason=f"{MODEL} is not available locally")
+
+
+def embed(model):
+    vectors = np.asarray([model.get_query_embedding(query) for query in QUERIES], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    return embed(load_embed_model(MODEL, backend="torch"))
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("onnx_models"))
+
+
+@pytest.mark.parametrize("backend", sorted(RUNTIMES))
+def test_backend_matches_fp32(reference, onnx_dir, backend):
+    for module in RUNTIMES[backend]:
+        pytest.importorskip(module)
+    vectors = embed(load_embed_model(MODEL, backend=backend, onnx_dir=onnx_dir))
+    similarity = (vectors * reference).sum(axis=1)
+    assert vectors.shape == reference.shape
+    assert similarity.min() >= MIN_COSINE, f"{backend}: worst cosine {similarity.min():.4f}"
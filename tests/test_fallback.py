@@ -0,0 +1,54 @@
+"""CaseNameIndex: which case names a query mentions, and in what order."""
+from backend.fallback import CaseNameIndex, search_fallback_context
+
+CONTEXTS = {
+    "smith v. jones": "smith context",
+    "smith v. jones industries": "industries context",
+    "roe": "roe context",
+    "united states v. roe": "united states context",
+    "doe v. board of education": "doe context",
+}
+
+
+def brute_force(query):
+    query_lower = query.lower()
+    found = [name for name in CONTEXTS if name in query_lower]
+    return sorted(found, key=lambda name: (-len(name), query_lower.find(name), name))
+
+
+def test_longest_match_first():
+    index = CaseNameIndex(CONTEXTS)
+    matches = index.matches("Does Smith v. Jones Industries overrule Smith v. Jones?")
+    assert [name for name, _ in matches] == ["smith v. jones industries", "smith v. jones"]
+    assert search_fallback_context("What did Smith v. Jones Industries hold?", index) == "industries context"
+
+
+def test_equal_lengths_ordered_by_position():
+    contexts = {"alpha v. beta": "first", "gamma v. delt": "second"}
+    index = CaseNameIndex(contexts)
+    matches = index.matches("Compare gamma v. delt with alpha v. beta.")
+    assert [context for _, context in matches] == ["second", "first"]
+
+
+def test_names_shorter_than_a_gram_are_still_found():
+    index = CaseNameIndex(CONTEXTS)
+    assert "roe" in index.short_names
+    assert [name for name, _ in index.matches("Was United States v. Roe decided?")] == ["united states v. roe", "roe"]
+
+
+def test_matches_agree_with_a_full_scan():
+    index = CaseNameIndex(CONTEXTS)
+    queries = [
+        "smith v. jones",
+        "doe v. board of education and roe",
+        "nothing relevant here",
+        "SMITH V. JONES INDUSTRIES, united states v. roe, doe v. board of education",
+    ]
+    for query in queries:
+        assert [name for name, _ in index.matches(query)] == brute_force(query)
+
+
+def test_no_match_returns_none():
+    index = CaseNameIndex(CONTEXTS)
+    assert index.matches("an unrelated question") == []
+    assert search_fallback_context("an unrelated question", index) is None
@@ -0,0 +1,137 @@
+"""FlatVectorStore: blocked top-k and metadata masks agree with a brute-force scan."""
+import numpy as np
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import (
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+)
+
+from backend.flat_vector_store import DTYPES, FlatVectorStore
+
+ROWS, DIM = 500, 16
+COURTS = ("scotus", "ca9", "ca2", "nysd")
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(ROWS, DIM)).astype(np.float32)
+    node_ids = [f"n{i}" for i in range(ROWS)]
+    metadata = [{"court": COURTS[i % len(COURTS)], "year": 2000 + i % 7, "tags": ["not", "scalar"]}
+                for i in range(ROWS)]
+    ref_doc_ids = [f"case{i // 5}" for i in range(ROWS)]
+    queries = rng.normal(size=(10, DIM)).astype(np.float32)
+    return node_ids, vectors, metadata, ref_doc_ids, queries
+
+
+def build(corpus, dtype):
+    node_ids, vectors, metadata, ref_doc_ids, _ = corpus
+    # Small blocks, so results are merged across many of them.
+    return FlatVectorStore.from_arrays(node_ids, vectors, dtype=dtype, ref_doc_ids=ref_doc_ids, metadata=metadata,
+                                       block_rows=64)
+
+
+def brute_force(store, query, top_k, allowed):
+    """Same quantised vectors, every row scored, then sorted."""
+    matrix = np.asarray(store._vectors, dtype=np.float32)
+    if store._scales is not None:
+        matrix = matrix * store._scales[:, None]
+    query = query / np.linalg.norm(query)
+    scores = matrix @ query
+    rows = [row for row in np.argsort(-scores, kind="stable") if allowed(row)][:top_k]
+    return [store._ids[row] for row in rows]
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_top_k_matches_brute_force(corpus, dtype):
+    store = build(corpus, dtype)
+    for query in corpus[4]:
+        result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=10))
+        assert result.ids == brute_force(store, query, 10, lambda row: True)
+        assert result.similarities == sorted(result.similarities, reverse=True)
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_quantised_scores_stay_close_to_float32(corpus, dtype):
+    node_ids, vectors, _, _, queries = corpus
+    store = build(corpus, dtype)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for query in queries:
+        result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=5))
+        exact = unit[[node_ids.index(i) for i in result.ids]] @ (query / np.linalg.norm(query))
+        assert np.allclose(result.similarities, exact, atol=0.02)
+
+
+FILTER_CASES = [
+    (MetadataFilters(filters=[MetadataFilter(key="court", value="ca9")]),
+     lambda m: m["court"] == "ca9"),
+    (MetadataFilters(filters=[MetadataFilter(key="court", value="ca9", operator=FilterOperator.NE)]),
+     lambda m: m["court"] != "ca9"),
+    (MetadataFilters(filters=[MetadataFilter(key="year", value=[2001, 2003], operator=FilterOperator.IN)]),
+     lambda m: m["year"] in (2001, 2003)),
+    (MetadataFilters(filters=[MetadataFilter(key="court", value=["scotus", "ca2"], operator=FilterOperator.NIN),
+                              MetadataFilter(key="year", value=2004)]),
+     lambda m: m["court"] not in ("scotus", "ca2") and m["year"] == 2004),
+    (MetadataFilters(filters=[MetadataFilter(key="court", value="nysd"),
+                              MetadataFilters(filters=[MetadataFilter(key="year", value=2000),
+                                                       MetadataFilter(key="year", value=2006)],
+                                              condition=FilterCondition.OR)],
+                     condition=FilterCondition.AND),
+     lambda m: m["court"] == "nysd" and m["year"] in (2000, 2006)),
+    (MetadataFilters(filters=[MetadataFilter(key="court", value="missing")]),
+     lambda m: False),
+]
+
+
+@pytest.mark.parametrize("filters,predicate", FILTER_CASES)
+def test_filter_masks_match_brute_force(corpus, filters, predicate):
+    metadata = corpus[2]
+    store = build(corpus, "float16")
+    for query in corpus[4][:3]:
+        result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=8, filters=filters))
+        assert result.ids == brute_force(store, query, 8, lambda row: predicate(metadata[row]))
+
+
+def test_node_and_doc_id_restrictions(corpus):
+    store = build(corpus, "float16")
+    query = corpus[4][0]
+    allowed_nodes = [f"n{i}" for i in range(0, ROWS, 3)]
+    result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=5, node_ids=allowed_nodes))
+    assert result.ids == brute_force(store, query, 5, lambda row: row % 3 == 0)
+    result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=20,
+                                          doc_ids=["case3", "case40"]))
+    assert sorted(result.ids, key=lambda i: int(i[1:])) == [f"n{i}" for i in (*range(15, 20), *range(200, 205))]
+
+
+def test_deletes_and_re_adds(corpus):
+    node_ids, vectors, _, _, queries = corpus
+    store = build(corpus, "float16")
+    query = queries[0]
+    top = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=3)).ids
+    store.delete_nodes(node_ids=[top[0]])
+    assert store.count() == ROWS - 1
+    result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=3))
+    assert top[0] not in result.ids and result.ids[:2] == top[1:]
+
+    # Re-adding a node with the query's own vector makes it the best match, once.
+    store.add([TextNode(id_=top[1], text="", embedding=query.tolist(), metadata={"court": "ca9"})])
+    result = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=3))
+    assert result.ids[0] == top[1] and result.ids.count(top[1]) == 1
+    assert store.count() == ROWS - 1
+
+
+def test_persisted_store_searches_the_same(corpus, tmp_path):
+    store = build(corpus, "int8")
+    store.delete_nodes(node_ids=["n0", "n1"])
+    store.persist(str(tmp_path / "default__vector_store.json"))
+    loaded = FlatVectorStore.from_persist_dir(str(tmp_path), block_rows=64)
+    assert loaded.count() == ROWS - 2
+    filters = MetadataFilters(filters=[MetadataFilter(key="court", value="scotus")])
+    for query in corpus[4][:3]:
+        expected = store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=6, filters=filters))
+        actual = loaded.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=6, filters=filters))
+        assert actual.ids == expected.ids
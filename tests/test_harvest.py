@@ -0,0 +1,194 @@
+"""BulkHarvester against a stub CourtListener on http.server: shards, 429s, resume and the folder layout."""
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pytest
+
+from CourtListenerAPI import CHECKPOINT_FILE, BulkHarvester, CourtListenerClient, date_shards
+
+FILED_AFTER, FILED_BEFORE = "2020-01-01", "2020-01-04"
+CASES_PER_DAY = 5
+PAGE_SIZE = 2
+
+
+def day_cases(day):
+    """Search results filed on `day` (1-4): each case has one opinion PDF on the storage host."""
+    cases = []
+    for number in range(CASES_PER_DAY):
+        cluster_id = day * 100 + number
+        cases.append({
+            "cluster_id": cluster_id,
+            "caseName": f"Case {cluster_id}",
+            "dateFiled": f"2020-01-0{day}",
+            "opinions": [{"id": cluster_id * 10, "local_path": f"pdf/{cluster_id}.pdf", "snippet": "held"}],
+        })
+    return cases
+
+
+class StubCourtListener:
+    """Serves /api/search/ with cursor pages and /storage/pdf/<id>.pdf; scripted failures are consumed once."""
+
+    def __init__(self):
+        self.requests = []
+        self.throttle_once = set()  # search cursors answered with one 429 first
+        self.fail_search = set()  # search cursors answered with 400 until cleared
+        self.fail_pdfs = set()  # PDF names answered with 404 until cleared
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def reply(self, handler, status, body=b"", headers=()):
+        handler.send_response(status)
+        for name, value in headers:
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler):
+        parts = urlsplit(handler.path)
+        with self.lock:
+            self.requests.append(handler.path)
+        if parts.path == "/api/search/":
+            self.search(handler, {key: values[0] for key, values in parse_qs(parts.query).items()})
+        elif parts.path.startswith("/storage/pdf/"):
+            name = parts.path.rsplit("/", 1)[1]
+            if name in self.fail_pdfs:
+                self.reply(handler, 404)
+            else:
+                self.reply(handler, 200, b"%PDF-1.4 " + name.encode() * 100, [("Content-Type", "application/pdf")])
+        else:
+            self.reply(handler, 404)
+
+    def search(self, handler, query):
+        after, before = query["filed_after"], query["filed_before"]
+        offset = int(query.get("cursor", 0))
+        cursor = f"{after}..{before}@{offset}"
+        with self.lock:
+            throttled = cursor in self.throttle_once
+            self.throttle_once.discard(cursor)
+        if throttled:
+            self.reply(handler, 429, b"slow down", [("Retry-After", "0")])
+            return
+        if cursor in self.fail_search:
+            self.reply(handler, 400, b"bad cursor")
+            return
+        days = range(int(after[-2:]), int(before[-2:]) + 1)
+        results = [case for day in days for case in day_cases(day)]
+        page = results[offset:offset + int(query["page_size"])]
+        next_url = None
+        if offset + len(page) < len(results):
+            next_url = f"{self.url}/api/search/?" + urlencode({**query, "cursor": offset + len(page)})
+        body = json.dumps({"count": len(results), "next": next_url, "results": page}).encode()
+        self.reply(handler, 200, body, [("Content-Type", "application/json")])
+
+    def search_requests(self):
+        return [path for path in self.requests if path.startswith("/api/search/")]
+
+
+@pytest.fixture
+def stub():
+    stub = StubCourtListener()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+def harvester(stub, out_dir, shards=2):
+    client = CourtListenerClient("test-key", base_url=f"{stub.url}/api/", storage_url=f"{stub.url}/storage/",
+                                 rate=0, max_retries=2, timeout=10)
+    return BulkHarvester(client, str(out_dir), page_size=PAGE_SIZE, shards=shards, download_workers=4)
+
+
+def saved_folders(out_dir):
+    return sorted(name for name in os.listdir(out_dir)
+                  if os.path.exists(os.path.join(out_dir, name, "data.json")))
+
+
+ALL_FOLDERS = sorted(str(day * 100 + number) for day in range(1, 5) for number in range(CASES_PER_DAY))
+
+
+def test_pages_every_date_shard_into_case_folders(stub, tmp_path):
+    assert date_shards(FILED_AFTER, FILED_BEFORE, 2) == [("2020-01-01", "2020-01-02"), ("2020-01-03", "2020-01-04")]
+    stats, failures = harvester(stub, tmp_path).harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert failures == []
+    assert stats["saved"] == 20 and stats["pdfs"] == 20 and stats["pages"] == 10
+    assert saved_folders(tmp_path) == ALL_FOLDERS
+    # The layout ingestion reads: <case_folder>/data.json + *.pdf, no partial files left behind.
+    case_dir = tmp_path / "301"
+    assert sorted(os.listdir(case_dir)) == ["3010.pdf", "data.json"]
+    assert json.loads((case_dir / "data.json").read_text())["caseName"] == "Case 301"
+    assert (case_dir / "3010.pdf").read_bytes().startswith(b"%PDF")
+
+    # A second run with the same query finds every shard done and fetches nothing.
+    requests_before = len(stub.requests)
+    stats, failures = harvester(stub, tmp_path).harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert failures == [] and stats["saved"] == 0 and len(stub.requests) == requests_before
+
+
+def test_429_is_retried_after_retry_after(stub, tmp_path):
+    stub.throttle_once = {"2020-01-01..2020-01-02@2", "2020-01-03..2020-01-04@0"}
+    crawler = harvester(stub, tmp_path)
+    stats, failures = crawler.harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert failures == []
+    assert crawler.client.retries == 2
+    assert saved_folders(tmp_path) == ALL_FOLDERS
+    searches = stub.search_requests()
+    assert len(searches) == 12  # 10 pages, two of them requested twice
+
+
+def test_resume_continues_from_the_checkpoint(stub, tmp_path):
+    # The first shard's third page fails: that shard stops, the other finishes.
+    stub.fail_search = {"2020-01-01..2020-01-02@4"}
+    stats, failures = harvester(stub, tmp_path).harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert len(failures) == 1 and "2020-01-01..2020-01-02" in failures[0]
+    assert stats["saved"] == 14
+    checkpoint = json.loads((tmp_path / CHECKPOINT_FILE).read_text())
+    first = checkpoint["shards"]["2020-01-01..2020-01-02"]
+    assert first["pages"] == 2 and not first["done"] and "cursor=4" in first["next"]
+    assert checkpoint["shards"]["2020-01-03..2020-01-04"]["done"]
+
+    stub.fail_search = set()
+    stub.requests.clear()
+    stats, failures = harvester(stub, tmp_path).harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert failures == []
+    assert stats["saved"] == 6 and stats["pages"] == 3
+    # Only the failed shard is walked again, starting at the page it stopped on.
+    searches = stub.search_requests()
+    assert len(searches) == 3 and all("2020-01-01" in path for path in searches)
+    assert "cursor=4" in searches[0]
+    assert saved_folders(tmp_path) == ALL_FOLDERS
+
+
+def test_case_without_its_pdf_gets_no_data_json_until_a_retry(stub, tmp_path):
+    stub.fail_pdfs = {"202.pdf"}
+    stats, failures = harvester(stub, tmp_path).harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert stats["incomplete"] == 1 and stats["saved"] == 19
+    assert len(failures) == 1 and "resume to retry" in failures[0]
+    assert "202" not in saved_folders(tmp_path)
+    assert not os.path.exists(tmp_path / "202" / "data.json")
+    checkpoint = json.loads((tmp_path / CHECKPOINT_FILE).read_text())
+    assert list(checkpoint["retry"]) == ["202"]
+
+    # Resumed: every shard is done, so only the held-back case is fetched again.
+    stub.fail_pdfs = set()
+    stub.requests.clear()
+    stats, failures = harvester(stub, tmp_path).harvest("hearsay", FILED_AFTER, FILED_BEFORE)
+    assert failures == [] and stats["saved"] == 1 and stats["incomplete"] == 0
+    assert stub.requests == ["/storage/pdf/202.pdf"]
+    assert saved_folders(tmp_path) == ALL_FOLDERS
+    assert json.loads((tmp_path / CHECKPOINT_FILE).read_text())["retry"] == {}
@@ -0,0 +1,127 @@
+"""HTTPCache through CourtListenerClient: fresh hits, 304 revalidation and the LRU byte budget."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from CourtListenerAPI import CourtListenerClient
+from http_cache import HTTPCache, normalise_key
+
+ETAG = '"v1"'
+
+
+class Server:
+    """Answers every path with a JSON body and ETag "v1"; If-None-Match "v1" gets a 304."""
+
+    def __init__(self):
+        self.seen = []  # (path, If-None-Match, status)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match == ETAG:
+                    server.seen.append((self.path, if_none_match, 304))
+                    self.send_response(304)
+                    self.send_header("ETag", ETAG)
+                    self.end_headers()
+                    return
+                body = b'{"path": "' + self.path.encode() + b'"}'
+                server.seen.append((self.path, if_none_match, 200))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", ETAG)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def client_with(cache):
+    return CourtListenerClient("test-key", rate=0, max_retries=0, timeout=10, cache=cache)
+
+
+def test_fresh_entry_is_served_without_a_request(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.db"), max_age=3600)
+    client = client_with(cache)
+    first = client.request(f"{server.url}/search/", params={"q": "hearsay"})
+    second = client.request(f"{server.url}/search/", params={"q": "hearsay", "court": ""})
+    assert first.json() == second.json() == {"path": "/search/?q=hearsay"}
+    assert len(server.seen) == 1
+    assert cache.stats()["fresh_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_stale_entry_is_revalidated_with_a_304(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.db"), max_age=0)
+    client = client_with(cache)
+    first = client.request(f"{server.url}/search/", params={"q": "hearsay"})
+    key = normalise_key(f"{server.url}/search/", {"q": "hearsay"})
+    validated_at = cache.get(key).validated_at
+
+    second = client.request(f"{server.url}/search/", params={"q": "hearsay"})
+    # The second request was conditional, got no body, and the cached body was returned.
+    assert server.seen == [("/search/?q=hearsay", None, 200), ("/search/?q=hearsay", ETAG, 304)]
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == ETAG
+    assert cache.get(key).validated_at >= validated_at
+    stats = cache.stats()
+    assert stats["revalidated"] == 1 and stats["misses"] == 1 and stats["stored"] == 1
+
+
+def test_streamed_downloads_bypass_the_cache(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.db"))
+    client = client_with(cache)
+    with client.request(f"{server.url}/file.pdf", stream=True) as response:
+        assert response.status_code == 200
+    assert cache.stats()["entries"] == 0
+
+
+def response_with(etag=None):
+    response = requests.Response()
+    response.status_code = 200
+    if etag:
+        response.headers["ETag"] = etag
+    return response
+
+
+def test_running_byte_total_tracks_puts_replaces_and_clears(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = HTTPCache(path, max_bytes=10_000)
+    cache.put("a", response_with(), b"x" * 1000)
+    cache.put("b", response_with(), b"x" * 500)
+    cache.put("a", response_with(), b"x" * 200)  # replacing "a" releases its old size
+    assert cache._bytes == cache.stats()["bytes"] == 700
+    # A new instance picks the total up from the table.
+    assert HTTPCache(path, max_bytes=10_000)._bytes == 700
+    cache.clear()
+    assert cache._bytes == 0 and cache.stats()["entries"] == 0
+
+
+def test_eviction_drops_least_recently_used_below_the_budget(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache.db"), max_bytes=10_000)
+    for name in "abcd":
+        cache.put(name, response_with(), b"x" * 2000)
+    cache.get("a")  # "a" is now the most recently used
+    assert cache.counts["evicted"] == 0
+    cache.put("e", response_with(), b"x" * 2400)
+    # 10,400 bytes > 10,000: the least recently used entry ("b") goes, leaving 8,400 (under 90%).
+    assert [name for name in "abcde" if cache.get(name) is not None] == ["a", "c", "d", "e"]
+    assert cache._bytes == cache.stats()["bytes"] == 8400
+    assert cache.counts["evicted"] == 1
@@ -0,0 +1,60 @@
+"""LLMScheduler admission control: what /streamresponse turns into a 503."""
+import asyncio
+
+import pytest
+
+from backend.llm_scheduler import LLMScheduler, SchedulerSaturated
+
+
+def test_full_queue_is_rejected_immediately():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=1, max_queue=1, queue_timeout=5)
+        slot = await scheduler.acquire()
+        queued = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert scheduler.waiting == 1
+
+        with pytest.raises(SchedulerSaturated) as excinfo:
+            await scheduler.acquire()
+        assert excinfo.value.reason == "queue full"
+        assert excinfo.value.retry_after >= 1
+
+        slot.release()
+        (await queued).release()
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["rejected"] == 1
+    assert snapshot["active"] == snapshot["waiting"] == 0
+
+
+def test_queue_timeout():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        slot = await scheduler.acquire()
+        with pytest.raises(SchedulerSaturated) as excinfo:
+            await scheduler.acquire()
+        assert excinfo.value.reason == "queue timeout"
+        slot.release()
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["timed_out"] == 1
+    assert snapshot["waiting"] == 0
+
+
+def test_released_slot_admits_the_next_request_once():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrent=1, max_queue=4, queue_timeout=1)
+        slot = await scheduler.acquire()
+        queued = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        slot.release()
+        slot.release()  # a second release must not free a second slot
+        second = await queued
+        assert scheduler.active == 1
+        with pytest.raises(SchedulerSaturated):
+            await asyncio.wait_for(scheduler.acquire(), timeout=2)
+        second.release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,39 @@
+"""SemanticChunker must reproduce Data_parsing.sentence_grouping's chunk boundaries exactly."""
+import re
+
+import pytest
+
+import Data_parsing
+from benchmarks.bench_chunking import HashingEncoder, synthetic_sections
+from semantic_chunker import SemanticChunker
+
+
+def split_sentences(text):
+    """Deterministic stand-in for nltk's punkt, which may not be downloaded."""
+    return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+
+@pytest.fixture
+def baseline(monkeypatch):
+    monkeypatch.setattr(Data_parsing, "ensure_punkt", lambda: None)
+    monkeypatch.setattr(Data_parsing, "sent_tokenize", split_sentences)
+    return Data_parsing.sentence_grouping
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 256])
+def test_batched_chunks_match_sentence_grouping(baseline, batch_size):
+    model = HashingEncoder(dim=64)
+    sections = synthetic_sections(40, seed=3)
+    expected = [baseline(section, model) for section in sections]
+
+    chunker = SemanticChunker(model, batch_size=batch_size, sentence_splitter=split_sentences)
+    assert chunker.chunk_sections(sections) == expected
+    assert sum(len(chunks) for chunks in expected) > len(sections)  # the corpus does get split
+
+
+def test_sections_without_sentences(baseline):
+    model = HashingEncoder(dim=64)
+    sections = ["", "Case: One short sentence.", "   "]
+    chunker = SemanticChunker(model, sentence_splitter=split_sentences)
+    assert chunker.chunk_sections(sections) == [[], ["Case: One short sentence."], []]
+    assert chunker.chunk_sections([]) == []
@@ -0,0 +1,119 @@
+"""SingleFlight: coalesced requests share one answer, and one client leaving does not end it for the rest."""
+import asyncio
+
+import pytest
+
+from backend.single_flight import SingleFlight, normalise_prompt
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=5))
+
+
+def scripted_answer(tokens, gate=None):
+    """Flight body publishing one event per token; waits on `gate` (if any) after the first."""
+    async def answer(flight):
+        flight.start_streaming()
+        for number, token in enumerate(tokens):
+            flight.publish(token)
+            if number == 0 and gate is not None:
+                await gate.wait()
+            await asyncio.sleep(0)
+    return answer
+
+
+async def read_all(flight):
+    return "".join([batch async for batch in flight.subscribe()])
+
+
+def test_normalise_prompt_ignores_case_and_spacing():
+    assert normalise_prompt("  Is HEARSAY\tadmissible?\n") == normalise_prompt("is hearsay admissible?")
+
+
+def test_identical_requests_share_one_run():
+    async def scenario():
+        flights = SingleFlight()
+        runs = []
+
+        async def answer(flight):
+            runs.append(flight.key)
+            flight.start_streaming()
+            for token in "abc":
+                flight.publish(token)
+                await asyncio.sleep(0)
+
+        leader, is_leader = flights.join("q", answer)
+        follower, is_follower_leader = flights.join("q", answer)
+        assert (is_leader, is_follower_leader) == (True, False) and follower is leader
+        results = await asyncio.gather(read_all(leader), read_all(follower))
+        return results, runs, flights.snapshot(), leader.requests
+
+    results, runs, snapshot, requests = run(scenario())
+    assert results == ["abc", "abc"]
+    assert runs == ["q"] and requests == 2
+    assert snapshot == {"in_flight": 0, "started": 1, "coalesced": 1}
+
+
+def test_answer_reaches_others_when_the_first_client_disconnects():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+        leader, _ = flights.join("q", scripted_answer(["first ", "second ", "third"], gate))
+        follower, _ = flights.join("q", scripted_answer(["never run"]))
+        await leader.ready
+
+        # The leader's client reads the first event and goes away mid-stream.
+        stream = leader.subscribe()
+        assert await stream.__anext__() == "first "
+        await stream.aclose()
+        cancelled = leader.detach()
+        # A client joining after the disconnect, while the answer is still being written, replays it from the start.
+        late, late_is_leader = flights.join("q", scripted_answer(["never run"]))
+
+        gate.set()
+        texts = await asyncio.gather(read_all(follower), read_all(late))
+        await leader.task
+        return cancelled, late is leader, late_is_leader, texts, leader
+
+    cancelled, late_joined, late_is_leader, texts, flight = run(scenario())
+    assert cancelled is False and not flight.cancelled
+    assert late_joined and not late_is_leader
+    assert texts == ["first second third", "first second third"]
+    assert flight.finished and flight.requests == 3 and flight.attached == 2
+
+
+def test_last_client_leaving_cancels_the_run():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+        leader, _ = flights.join("q", scripted_answer(["first ", "second"], gate))
+        follower, _ = flights.join("q", scripted_answer(["never run"]))
+        await leader.ready
+        first = leader.detach()
+        second = follower.detach()
+        with pytest.raises(asyncio.CancelledError):
+            await leader.task
+        # A new request for the same key starts afresh instead of joining the cancelled flight.
+        replacement, is_leader = flights.join("q", scripted_answer(["new"]))
+        return first, second, leader, is_leader, await read_all(replacement)
+
+    first, second, flight, is_leader, replacement_text = run(scenario())
+    assert (first, second) == (False, True)
+    assert flight.cancelled and flight.finished
+    assert is_leader and replacement_text == "new"
+
+
+def test_failure_before_streaming_is_raised_to_every_request():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def failing(flight):
+            await asyncio.sleep(0)
+            raise RuntimeError("retrieval failed")
+
+        leader, _ = flights.join("q", failing)
+        follower, _ = flights.join("q", failing)
+        return await asyncio.gather(leader.ready, follower.ready, return_exceptions=True)
+
+    errors = run(scenario())
+    assert [str(error) for error in errors] == ["retrieval failed", "retrieval failed"]
@@ -0,0 +1,52 @@
+"""SQLiteDocumentStore keeps reading the snapshot it was opened on, from any thread."""
+import os
+import shutil
+import threading
+
+from llama_index.core.schema import TextNode
+
+from backend.sqlite_docstore import SQLiteDocumentStore
+from Data_parsing import swap_in_directory
+
+
+def build_docstore(persist_dir, node_ids):
+    os.makedirs(persist_dir, exist_ok=True)
+    docstore = SQLiteDocumentStore.from_persist_dir(persist_dir)
+    docstore.add_documents([TextNode(id_=node_id, text=f"text of {node_id}") for node_id in node_ids])
+    return docstore
+
+
+def read_in_thread(docstore, node_ids):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(nodes=docstore.get_nodes(node_ids)))
+    thread.start()
+    thread.join()
+    return result["nodes"]
+
+
+def test_reads_from_other_threads_share_the_connection(tmp_path):
+    docstore = build_docstore(str(tmp_path / "index"), ["n0", "n1"])
+    assert [node.get_content() for node in read_in_thread(docstore, ["n1", "n0"])] == ["text of n1", "text of n0"]
+    assert docstore.count_nodes() == 2
+
+
+def test_store_keeps_its_snapshot_after_a_swap(tmp_path):
+    persist_dir, build_dir = str(tmp_path / "index"), str(tmp_path / "index.building")
+    live = build_docstore(persist_dir, ["n0", "n1"])
+    assert live.get_node("n0").get_content() == "text of n0"
+
+    # An ingest run replaces the directory with an index that no longer has n0.
+    build_docstore(build_dir, ["n2"])
+    swap_in_directory(build_dir, persist_dir)
+
+    # A thread that had not touched the store before the swap still reads the old file.
+    assert [node.node_id for node in read_in_thread(live, ["n0", "n1"])] == ["n0", "n1"]
+    assert sorted(live.node_ids()) == ["n0", "n1"]
+    assert SQLiteDocumentStore.from_persist_dir(persist_dir).node_ids() == ["n2"]
+
+
+def test_store_keeps_its_snapshot_after_its_directory_is_deleted(tmp_path):
+    generation = str(tmp_path / "gen-000001")
+    docstore = build_docstore(generation, ["n0"])
+    shutil.rmtree(generation)
+    assert read_in_thread(docstore, ["n0"])[0].get_content() == "text of n0"